@@ -0,0 +1,115 @@
+"""
+Shared fakes for the workflow tests: a scripted web service and chat model, so runs and
+refreshes execute end to end without network access or API keys.
+"""
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+
+# Settings are read at import time, so they are fixed before any src module loads
+os.environ.setdefault("RESEARCH_DATA_DIR", tempfile.mkdtemp(prefix="research-tests-"))
+os.environ.setdefault("FIRECRAWL_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("RESEARCH_CRAWL", "0")  # Tests pass a crawler explicitly
+os.environ.setdefault("RESEARCH_DOMAIN_SPACING", "0")  # The fake web needs no politeness delay
+
+import pytest
+from src.firecrawl import SearchResult
+
+PAGE_TEXT = (
+    "Acme has 5,000 employees in the fintech industry. Its culture is remote-friendly and its core "
+    "values guide the mission. The interview process takes 3-4 weeks: recruiter screen, technical "
+    "phone screen, then an onsite with coding, system design and behavioral rounds. "
+)
+
+class FakeWeb:
+    """Stands in for WebResearchService: search returns every page, scrapes serve PAGES."""
+
+    def __init__(self, pages=None):
+        self.pages = dict(pages or {f"https://site{i}.example/post": PAGE_TEXT * 4 for i in range(5)})
+        self.validators = {}  # url -> (etag, last_modified) served with scrapes and by probe_url
+        self.probes = 0
+        self.searches = 0
+        self.scrapes = []  # (url, max_chars, keywords) per scrape
+
+    def search_web(self, query, num_results=5):
+        self.searches += 1
+        return [SearchResult(url=url, title=f"Result {i}") for i, url in enumerate(self.pages)][:num_results]
+
+    def scrape_url(self, url):
+        self.scrapes.append((url, None, None))
+        return {"markdown": self.pages[url], "url": url}
+
+    def scrape_url_bounded(self, url, max_chars=5000, keywords=None):
+        self.scrapes.append((url, max_chars, keywords))
+        text = self.pages[url]
+        if keywords:
+            # Mimic the relevance filter: keep sentences mentioning a keyword
+            text = ". ".join(s for s in text.split(". ") if any(k in s.lower() for k in keywords))
+        etag, last_modified = self.validators.get(url, (None, None))
+        return {"markdown": text[:max_chars], "url": url, "streamed": True, "etag": etag, "last_modified": last_modified}
+
+    def probe_url(self, url, etag=None, last_modified=None):
+        self.probes += 1
+        current = self.validators.get(url)
+        if current is None:
+            return {"status": None, "etag": None, "last_modified": None}
+        status = 304 if (etag, last_modified) == current else 200
+        return {"status": status, "etag": current[0], "last_modified": current[1]}
+
+BACKGROUND = {"company_size": "1001-5000", "industry": "Fintech", "company_culture": "Remote", "values": ["Trust"], "recent_news": []}
+PROCESS = {"typical_stages": ["Screen", "Onsite"], "duration": "3-4 weeks", "common_questions": ["Why us?"],
+           "technical_assessment": True, "system_design": True, "behavioral_focus": True,
+           "coding_challenges": True, "take_home_projects": False}
+GUIDE = {"technical_topics": ["Algorithms"], "behavioral_topics": ["Conflict"], "resources": ["LeetCode"],
+         "strategy": "Practice", "common_pitfalls": ["Rushing"]}
+
+class FakeModel:
+    """Chat model answering each prompt with a fixed JSON response for its step."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages, config=None, **kwargs):
+        text = " ".join(message.content for message in messages)
+        self.prompts.append(text)
+        lowered = text.lower()
+        if "preparation" in lowered and "guide" in lowered:
+            data = GUIDE
+        elif "interview process" in lowered:
+            data = PROCESS
+        else:
+            data = BACKGROUND
+        tokens = len(text) // 4
+        return SimpleNamespace(
+            content=f"```json\n{json.dumps(data)}\n```",
+            usage_metadata={"input_tokens": tokens, "output_tokens": 50, "total_tokens": tokens + 50},
+            response_metadata={},
+        )
+
+    def bind(self, **kwargs):
+        return self
+
+@pytest.fixture
+def make_workflow(tmp_path):
+    """Build Workflows whose stores live under tmp_path and whose backends are fakes."""
+    from src.budget import BudgetGovernor
+    from src.companies import CompanyIndex
+    from src.domains import DomainStats
+    from src.routing import ModelRouter
+    from src.store import ResultStore
+    from src.workflow import Workflow
+
+    def make(web=None, model=None, **kwargs):
+        model = model or FakeModel()
+        kwargs.setdefault("store", ResultStore(str(tmp_path / "results.db")))
+        kwargs.setdefault("companies", CompanyIndex(str(tmp_path / "companies.db")))
+        kwargs.setdefault("domains", DomainStats(str(tmp_path / "domains.db")))
+        kwargs.setdefault("budget", BudgetGovernor(path=str(tmp_path / "budget.db")))
+        workflow = Workflow(checkpoint_path=str(tmp_path / "checkpoints.db"),
+                            router=ModelRouter(model_factory=lambda name: model), **kwargs)
+        workflow.firecrawl = web or FakeWeb()
+        workflow.model = model
+        return workflow
+    return make
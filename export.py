@@ -0,0 +1,26 @@
+import argparse
+from itertools import islice
+from dotenv import load_dotenv
+from src.export import export_results, iter_rows
+
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description="Export stored research results to Parquet or Arrow for analytics")
+    parser.add_argument("path", help="Output file: .parquet, or .arrow/.feather/.ipc for Arrow IPC")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Results per row group")
+    parser.add_argument("--since-hours", type=float, default=None, help="Only export results refreshed within this many hours")
+    parser.add_argument("--head", type=int, default=None, metavar="N", help="Print the first N rows of an existing export instead")
+    parser.add_argument("--columns", nargs="+", default=None, help="Columns to print with --head")
+    args = parser.parse_args()
+
+    if args.head is not None:
+        for row in islice(iter_rows(args.path, args.columns), args.head):
+            print(row)
+        return
+    since = args.since_hours * 3600 if args.since_hours is not None else None
+    rows = export_results(args.path, batch_size=args.batch_size, since=since)
+    print(f"✅ Wrote {rows} results to {args.path}")
+
+if __name__ == "__main__":
+    main()
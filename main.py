@@ -1,6 +1,8 @@
 from dotenv import load_dotenv
+import argparse
 import os
 from src.workflow import Workflow
+from src.admission import AdmissionRejected
 from src.langsmith_config import langsmith_config
 import time
 
@@ -75,10 +77,15 @@ def display_preparation_guide(guide):
             print(f"  {i}. {pitfall}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Interview Research Agent")
+    parser.add_argument("--profile", action="store_true", help="Profile each run (reports in RESEARCH_PROFILE_DIR)")
+    args = parser.parse_args()
+    
     # Initialize LangSmith
     langsmith_config.setup()
     
     workflow = Workflow()
+    last_company = ""
     print("\n" + "=" * 50)
     print("🌟 Interview Research Agent")
     print("=" * 50)
@@ -89,10 +96,15 @@ def main():
         print("-" * 50)
         print("\nPlease provide the company and job role:")
         
-        company = input("🏢 Company: ").strip()
+        prompt = f"🏢 Company [{last_company}]: " if last_company else "🏢 Company: "
+        company = input(prompt).strip() or last_company
         if company.lower() in {"quit", "exit"}:
             print("\n👋 Exiting Interview Research Agent. Good luck with your interview preparation!")
             break
+        if company:
+            # Research the company while the role is being typed (reused for later roles too)
+            workflow.prefetch_company(company)
+            last_company = company
             
         role = input("💼 Job Role: ").strip()
         if role.lower() in {"quit", "exit"}:
@@ -112,7 +124,7 @@ def main():
                 print(f"\n🔍 Starting research for {role} at {company}...")
                 
                 # Execute research workflow
-                result = workflow.run(company, role, config=config)
+                result = workflow.run(company, role, config=config, profile=args.profile)
                 
                 print(f"\n✅ Research completed in {time.time() - start_time:.1f} seconds")
                 print("=" * 60)
@@ -123,15 +135,22 @@ def main():
                 
                 if result.interview_process:
                     display_interview_process(result.interview_process)
+                    if result.process_reused_from:
+                        print(f"  ♻️ Reused from research for: {result.process_reused_from}")
                 
                 if result.preparation_guide:
                     display_preparation_guide(result.preparation_guide)
+
+                if result.errors:
+                    print(f"\n⚠️ Some research steps failed, so this result was not saved: {'; '.join(result.errors)}")
                     
                 # LangSmith trace link
                 if langsmith_config.is_enabled:
                     print("\n" + "=" * 80)
                     print(f"🔍 Research trace available at: https://smith.langchain.com/")
                     
+            except AdmissionRejected as e:
+                print(f"🚦 Research not started ({e.status}): {e}")
             except Exception as e:
                 print(f"❌ Research failed: {e}")
                 if langsmith_config.is_enabled:
@@ -0,0 +1,258 @@
+"""
+Admission control in front of the workflow: bounded concurrency, a priority queue and backpressure.
+
+Every run that has to do upstream work (search, scraping, LLM calls) takes a slot first; stored
+results are served without one. Runs beyond the concurrency limit wait in a bounded queue where
+interactive requests go ahead of batch ones (job workers, the cache warmer). A full queue or a
+run that cannot be admitted within its queue deadline is rejected right away with a status
+instead of piling up behind the upstream APIs.
+
+The concurrency limit adapts to the upstreams (AIMD): it is cut multiplicatively on 429
+responses or when the recent latency of an upstream climbs well above its long-run baseline,
+and raised by one while runs saturate it and the upstreams stay healthy. Each upstream kind
+(scraping, each model) has its own baseline, since a healthy LLM call takes many times longer
+than a scrape.
+
+The controller is per process; its state is not shared between worker processes or hosts.
+Set RESEARCH_PROCESSES to the number of processes using the same upstream accounts: the
+default concurrency bounds are then divided between them, so together they stay near the
+intended load. Each process still sees the upstreams' 429s and latency itself, so every one
+backs off on its own when the shared upstream is congested.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROCESSES = max(1, int(os.getenv("RESEARCH_PROCESSES", "1")))  # Processes sharing the upstreams, across hosts
+# Upper bound of the adaptive limit: RESEARCH_MAX_IN_FLIGHT is per process, else 4 shared by all processes
+MAX_IN_FLIGHT = int(os.getenv("RESEARCH_MAX_IN_FLIGHT") or max(1, 4 // PROCESSES))
+MIN_IN_FLIGHT = int(os.getenv("RESEARCH_MIN_IN_FLIGHT", "1"))
+QUEUE_SIZE = int(os.getenv("RESEARCH_ADMISSION_QUEUE", "32"))
+# Longest a run may wait for a slot, per priority
+QUEUE_TIMEOUTS = {
+    "interactive": float(os.getenv("RESEARCH_INTERACTIVE_QUEUE_TIMEOUT", "30")),
+    "batch": float(os.getenv("RESEARCH_BATCH_QUEUE_TIMEOUT", "900")),
+}
+PRIORITIES = {"interactive": 0, "batch": 1}  # Lower is served first
+LATENCY_TOLERANCE = float(os.getenv("RESEARCH_LATENCY_TOLERANCE", "2.0"))  # Recent/baseline latency ratio that counts as congestion
+DECREASE_FACTOR = 0.75
+ADJUST_EVERY = 10  # Upstream observations between latency-based adjustments
+DECREASE_COOLDOWN = 5.0  # Seconds between decreases, so one burst of 429s only cuts the limit once
+SHORT_ALPHA = 0.3  # Recent latency EWMA
+LONG_ALPHA = 0.02  # Baseline latency EWMA
+SERVICE_ALPHA = 0.2  # Run duration EWMA, for queue wait estimates
+
+class AdmissionRejected(RuntimeError):
+    """A run was not admitted; status says why (queue_full, deadline_exceeded or shed)"""
+
+    QUEUE_FULL = "queue_full"
+    DEADLINE = "deadline_exceeded"
+    SHED = "shed"  # Displaced from a full queue by a higher-priority run
+
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "rejected")
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.rejected: Optional[AdmissionRejected] = None
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class AdmissionController:
+    """Admits runs up to an adaptive concurrency limit, queueing the rest by priority"""
+
+    def __init__(self,
+                 max_in_flight: Optional[int] = None,
+                 min_in_flight: Optional[int] = None,
+                 queue_size: Optional[int] = None,
+                 latency_tolerance: float = LATENCY_TOLERANCE):
+        """
+        Args:
+            max_in_flight: Upper bound of the concurrency limit, which starts here (RESEARCH_MAX_IN_FLIGHT)
+            min_in_flight: Lower bound the limit is never cut below (RESEARCH_MIN_IN_FLIGHT)
+            queue_size: Runs that may wait for a slot (RESEARCH_ADMISSION_QUEUE)
+            latency_tolerance: Recent/baseline upstream latency ratio treated as congestion
+        """
+        self.max_in_flight = max(1, MAX_IN_FLIGHT if max_in_flight is None else max_in_flight)
+        self.min_in_flight = max(1, min(self.max_in_flight, MIN_IN_FLIGHT if min_in_flight is None else min_in_flight))
+        self.queue_size = QUEUE_SIZE if queue_size is None else queue_size
+        self.latency_tolerance = latency_tolerance
+        self.limit = self.max_in_flight
+        self.in_flight = 0
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._saturated = False  # Whether runs hit the limit since the last adjustment
+        self._latency: Dict[str, Tuple[float, float]] = {}  # Upstream kind -> (recent, baseline) latency EWMAs
+        self._observations = 0
+        self._last_decrease = 0.0
+        self._service_s: Optional[float] = None
+        self._counts: Dict[str, int] = {"admitted": 0, AdmissionRejected.QUEUE_FULL: 0,
+                                        AdmissionRejected.DEADLINE: 0, AdmissionRejected.SHED: 0, "throttled": 0}
+
+    # ===== ADMISSION =====
+    @contextmanager
+    def slot(self, priority: str = "interactive", timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        Hold a run slot for the duration of the block.
+
+        Args:
+            priority: "interactive" or "batch"
+            timeout: Longest to wait for a slot in seconds (defaults per priority)
+
+        Raises:
+            AdmissionRejected: The queue is full, the wait would exceed the timeout, or a
+                higher-priority run displaced this one from the queue
+        """
+        self.acquire(priority, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def acquire(self, priority: str = "interactive", timeout: Optional[float] = None) -> None:
+        """Wait for a run slot; see slot()."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {', '.join(PRIORITIES)}")
+        timeout = QUEUE_TIMEOUTS[priority] if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if not self._queue and self.in_flight < self.limit:
+                self._admit()
+                return
+            self._saturated = True
+            waiter = _Waiter(PRIORITIES[priority], next(self._seq))
+            # Reject early when the expected wait already exceeds the deadline
+            estimate = self._estimated_wait(waiter)
+            if estimate is not None and estimate > timeout:
+                self._reject(AdmissionRejected.DEADLINE,
+                             f"Server busy: {priority} run would wait about {estimate:.0f}s for a slot "
+                             f"(limit {timeout:g}s); try again later")
+            if len(self._queue) >= self.queue_size:
+                self._make_room(waiter, priority)
+            heapq.heappush(self._queue, waiter)
+            while True:
+                if waiter.rejected is not None:
+                    raise waiter.rejected
+                if self._queue[0] is waiter and self.in_flight < self.limit:
+                    heapq.heappop(self._queue)
+                    self._admit()
+                    # The next waiter may fit too if the limit was raised meanwhile
+                    self._cond.notify_all()
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(waiter)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                    self._reject(AdmissionRejected.DEADLINE,
+                                 f"Server busy: {priority} run was not admitted within {timeout:g}s; try again later")
+                self._cond.wait(remaining)
+
+    def release(self, service_s: Optional[float] = None) -> None:
+        """Give a slot back; service_s is how long the run held it."""
+        with self._cond:
+            self.in_flight -= 1
+            if service_s is not None:
+                self._service_s = service_s if self._service_s is None else \
+                    SERVICE_ALPHA * service_s + (1 - SERVICE_ALPHA) * self._service_s
+            self._cond.notify_all()
+
+    def _admit(self) -> None:
+        self.in_flight += 1
+        self._counts["admitted"] += 1
+        if self.in_flight >= self.limit:
+            self._saturated = True
+
+    def _reject(self, status: str, message: str) -> None:
+        self._counts[status] += 1
+        print(f"🚦 Rejected: {message}")
+        raise AdmissionRejected(status, message)
+
+    def _make_room(self, waiter: _Waiter, priority: str) -> None:
+        """Displace the newest lowest-priority waiter for a higher-priority run, or reject this one."""
+        victim = max(self._queue, default=None)  # None when queueing is disabled (queue_size 0)
+        if victim is None or victim.priority <= waiter.priority:
+            self._reject(AdmissionRejected.QUEUE_FULL,
+                         f"Server busy: {len(self._queue)} runs already queued; try again later")
+        self._queue.remove(victim)
+        heapq.heapify(self._queue)
+        self._counts[AdmissionRejected.SHED] += 1
+        victim.rejected = AdmissionRejected(AdmissionRejected.SHED,
+                                            f"Server busy: displaced from the queue by a {priority} run; try again later")
+        self._cond.notify_all()
+
+    def _estimated_wait(self, waiter: _Waiter) -> Optional[float]:
+        """Expected queue time from the runs ahead of this one and the average run duration."""
+        if self._service_s is None:
+            return None
+        ahead = sum(1 for other in self._queue if other < waiter)
+        return (ahead + 1) * self._service_s / self.limit
+
+    # ===== ADAPTIVE LIMIT =====
+    def observe(self, latency_s: float, throttled: bool = False, kind: str = "upstream") -> None:
+        """
+        Record one upstream call (LLM request or scrape) to adapt the concurrency limit.
+
+        Args:
+            latency_s: How long the call took
+            throttled: Whether the upstream answered 429 / rate limited
+            kind: Upstream the call went to ("scrape" or a model name); latency is only
+                compared with the baseline of the same kind
+        """
+        with self._cond:
+            now = time.monotonic()
+            if throttled:
+                self._counts["throttled"] += 1
+                self._decrease(now, f"{kind} rate limited (429)")
+                return
+            recent, baseline = self._latency.get(kind, (latency_s, latency_s))
+            self._latency[kind] = (SHORT_ALPHA * latency_s + (1 - SHORT_ALPHA) * recent,
+                                   LONG_ALPHA * latency_s + (1 - LONG_ALPHA) * baseline)
+            self._observations += 1
+            if self._observations < ADJUST_EVERY:
+                return
+            self._observations = 0
+            congested = [(kind, recent, baseline) for kind, (recent, baseline) in self._latency.items()
+                         if recent > baseline * self.latency_tolerance]
+            if congested:
+                kind, recent, baseline = congested[0]
+                self._decrease(now, f"{kind} latency {recent:.1f}s vs {baseline:.1f}s baseline")
+            elif self._saturated and self.limit < self.max_in_flight:
+                self.limit += 1
+                print(f"🚦 Concurrency limit raised to {self.limit}")
+                self._cond.notify_all()
+            self._saturated = self.in_flight >= self.limit
+
+    def _decrease(self, now: float, reason: str) -> None:
+        if now - self._last_decrease < DECREASE_COOLDOWN or self.limit <= self.min_in_flight:
+            return
+        self._last_decrease = now
+        self._observations = 0
+        self.limit = max(self.min_in_flight, int(self.limit * DECREASE_FACTOR))
+        print(f"🚦 Concurrency limit cut to {self.limit}: {reason}")
+
+    def stats(self) -> Dict[str, float]:
+        """Current limit, in-flight and queued runs, and admission counts since start."""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "queued": len(self._queue),
+                **self._counts,
+            }
+
+
+# Global instance shared by all workflows in the process
+admission_controller = AdmissionController()
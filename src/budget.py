@@ -0,0 +1,159 @@
+"""
+Spend tracking and staged degradation for Firecrawl requests and LLM tokens.
+
+Spend is tracked per run and over a rolling window shared by every process using the same data
+directory. As either budget fills up, runs degrade in stages instead of failing:
+
+    0  normal
+    1  fewer sources per research step
+    2  shorter excerpts per source
+    3  cheap model everywhere, no escalation
+    4  skip the preparation guide
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+from .models import NodeUsage
+from .store import DATA_DIR
+
+KINDS = ("searches", "scrapes", "tokens")
+# Budget pressure (fraction used) at which each degradation stage starts
+STAGE_THRESHOLDS = (0.6, 0.75, 0.85, 0.95)
+STAGE_NAMES = ("normal", "fewer sources", "shorter excerpts", "cheap model", "skip guide")
+
+def _limit(name: str, default: str = "0") -> float:
+    return float(os.getenv(name, default))
+
+class BudgetGovernor:
+    """Tracks searches, scrapes and tokens per run and over a rolling window, and picks a degradation stage"""
+
+    def __init__(self,
+                 run_limits: Optional[Dict[str, float]] = None,
+                 window_limits: Optional[Dict[str, float]] = None,
+                 window_days: Optional[float] = None,
+                 path: Optional[str] = None):
+        """
+        Args:
+            run_limits: Per-run caps by kind (0 = unlimited); defaults from RESEARCH_RUN_MAX_*
+            window_limits: Rolling-window caps by kind (0 = unlimited); defaults from RESEARCH_BUDGET_*
+            window_days: Length of the rolling window (RESEARCH_BUDGET_WINDOW_DAYS, default 30)
+            path: SQLite file for the spend log; defaults to <RESEARCH_DATA_DIR>/budget.db
+        """
+        self.run_limits = run_limits or {
+            "searches": _limit("RESEARCH_RUN_MAX_SEARCHES", "6"),
+            "scrapes": _limit("RESEARCH_RUN_MAX_SCRAPES", "20"),
+            "tokens": _limit("RESEARCH_RUN_MAX_TOKENS", "80000"),
+        }
+        self.window_limits = window_limits or {
+            "searches": _limit("RESEARCH_BUDGET_SEARCHES"),
+            "scrapes": _limit("RESEARCH_BUDGET_SCRAPES"),
+            "tokens": _limit("RESEARCH_BUDGET_TOKENS"),
+        }
+        self.window = (window_days or _limit("RESEARCH_BUDGET_WINDOW_DAYS", "30")) * 86400
+        self.path = path or os.getenv("RESEARCH_BUDGET_PATH") or os.path.join(DATA_DIR, "budget.db")
+        self._runs: Dict[str, Dict[str, float]] = {}
+        self._window_spend: Dict[str, float] = dict.fromkeys(KINDS, 0.0)
+        self._window_loaded = 0.0
+        self._reported: Dict[str, int] = {}  # Last stage announced per run
+        self._totals: Dict[str, float] = dict.fromkeys(KINDS, 0.0)  # Everything this process has spent
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS spend (ts REAL NOT NULL, kind TEXT NOT NULL, amount REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS spend_ts ON spend (ts)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _refresh_window(self, now: float) -> None:
+        """Reload rolling-window totals (they include other processes' spend) at most once a minute."""
+        if now - self._window_loaded < 60:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM spend WHERE ts < ?", (now - self.window,))
+            totals = dict(conn.execute("SELECT kind, SUM(amount) FROM spend GROUP BY kind").fetchall())
+        self._window_spend = {kind: totals.get(kind) or 0.0 for kind in KINDS}
+        self._window_loaded = now
+
+    def start_run(self, run: str) -> None:
+        """Reset a run's spend (called when a run starts)."""
+        with self._lock:
+            self._runs[run] = dict.fromkeys(KINDS, 0.0)
+            self._reported.pop(run, None)
+
+    def finish_run(self, run: str) -> Dict[str, float]:
+        """Forget a finished run and return what it spent."""
+        with self._lock:
+            self._reported.pop(run, None)
+            return self._runs.pop(run, dict.fromkeys(KINDS, 0.0))
+
+    def record(self, run: str, **amounts: float) -> None:
+        """Record spend for a run, e.g. record(run, searches=1) or record(run, tokens=1200)."""
+        amounts = {kind: amount for kind, amount in amounts.items() if amount}
+        if not amounts:
+            return
+        now = time.time()
+        with self._lock:
+            spend = self._runs.setdefault(run, dict.fromkeys(KINDS, 0.0))
+            for kind, amount in amounts.items():
+                spend[kind] += amount
+                self._window_spend[kind] += amount
+                self._totals[kind] += amount
+        try:
+            with self._connect() as conn:
+                conn.executemany("INSERT INTO spend (ts, kind, amount) VALUES (?, ?, ?)",
+                                 [(now, kind, amount) for kind, amount in amounts.items()])
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not persist budget spend: {e}")
+
+    def record_usage(self, run: str, usage: Iterable[NodeUsage]) -> None:
+        self.record(run, tokens=sum(u.input_tokens + u.output_tokens for u in usage))
+
+    def pressure(self, run: str, upcoming: Optional[Dict[str, float]] = None) -> float:
+        """
+        Highest fraction used across all run and window budgets (0 when unlimited).
+
+        Args:
+            run: Run key
+            upcoming: Spend about to happen (e.g. the prompt tokens of the next call), counted as used
+        """
+        upcoming = upcoming or {}
+        with self._lock:
+            self._refresh_window(time.time())
+            spend = self._runs.get(run, {})
+            fractions = [(spend.get(kind, 0.0) + upcoming.get(kind, 0.0)) / limit
+                         for kind, limit in self.run_limits.items() if limit > 0]
+            fractions += [(self._window_spend[kind] + upcoming.get(kind, 0.0)) / limit
+                          for kind, limit in self.window_limits.items() if limit > 0]
+        return max(fractions, default=0.0)
+
+    def stage(self, run: str, upcoming: Optional[Dict[str, float]] = None) -> int:
+        """Current degradation stage for a run (see module docstring), optionally including upcoming spend."""
+        pressure = self.pressure(run, upcoming)
+        stage = sum(pressure >= threshold for threshold in STAGE_THRESHOLDS)
+        with self._lock:
+            if stage > self._reported.get(run, 0):
+                self._reported[run] = stage
+                print(f"💸 Budget {pressure:.0%} used; degrading to stage {stage} ({STAGE_NAMES[stage]})")
+        return stage
+
+    def totals(self) -> Dict[str, float]:
+        """Everything this process has spent so far, by kind."""
+        with self._lock:
+            return dict(self._totals)
+
+    def report(self, run: str) -> str:
+        with self._lock:
+            spend = self._runs.get(run, {})
+            return " | ".join(f"{kind}: {spend.get(kind, 0):.0f}" for kind in KINDS)
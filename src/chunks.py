@@ -0,0 +1,203 @@
+"""
+Content-addressed store for scraped source excerpts.
+
+Graph state carries only chunk ids (see ContentRef in models.py); the text lives here once,
+however many nodes or runs reference it. With a directory configured, chunks are written to
+disk and read back through mmap, so the in-memory tier is only a small hot cache. The disk
+tier is capped: past RESEARCH_CHUNK_DISK_MB the least recently used chunk files are removed
+(results keep their own excerpts, so only checkpoints of old runs lose evidence).
+"""
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+from .store import DATA_DIR, content_hash
+
+MAX_CHUNK_CHARS = 5000  # Longest excerpt stored per source
+CACHE_CHARS = int(os.getenv("RESEARCH_CHUNK_CACHE_CHARS", "2000000"))  # In-memory tier
+DISK_BYTES = int(float(os.getenv("RESEARCH_CHUNK_DISK_MB", "512")) * 1024 * 1024)  # Disk tier cap (0 = unlimited)
+GC_TARGET = 0.9  # A collection trims the disk tier to this share of its cap
+
+class ChunkStore:
+    """Deduplicating chunk store with a size-bounded LRU memory tier and optional disk tier"""
+
+    def __init__(self, max_total_chars: Optional[int] = None, directory: Optional[str] = None,
+                 max_disk_bytes: Optional[int] = None):
+        """
+        Args:
+            max_total_chars: Characters kept in memory before evicting; defaults to RESEARCH_CHUNK_CACHE_CHARS
+            directory: Optional directory for durable, memory-mapped chunk files
+            max_disk_bytes: Size of the disk tier before old chunk files are removed (RESEARCH_CHUNK_DISK_MB)
+        """
+        self.max_total_chars = max_total_chars or CACHE_CHARS
+        self.max_disk_bytes = DISK_BYTES if max_disk_bytes is None else max_disk_bytes
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._chunks: "OrderedDict[str, str]" = OrderedDict()
+        self._total_chars = 0
+        self._lock = threading.Lock()
+        self._gc_lock = threading.Lock()
+        self._disk_bytes = sum(size for _, size, _ in self._files())
+
+    def intern(self, text: str) -> Tuple[str, str]:
+        """
+        Store a chunk (truncated to MAX_CHUNK_CHARS) once.
+
+        Returns:
+            (chunk_id, text) where text is the canonical stored string; callers should keep
+            that object instead of their own copy so every holder shares one allocation
+        """
+        text = text[:MAX_CHUNK_CHARS]
+        chunk_id = content_hash(text)
+        with self._lock:
+            existing = self._chunks.get(chunk_id)
+            if existing is not None:
+                self._chunks.move_to_end(chunk_id)
+                return chunk_id, existing
+            self._remember(chunk_id, text)
+        if self.directory:
+            if os.path.exists(self._path(chunk_id)):
+                self._touch(chunk_id)
+            else:
+                self._write(chunk_id, text)
+        return chunk_id, text
+
+    def put(self, text: str) -> str:
+        """Store a chunk and return its id."""
+        return self.intern(text)[0]
+
+    def get(self, chunk_id: str) -> Optional[str]:
+        """Return a chunk's text, or None if it is unknown (or evicted from a memory-only store)."""
+        with self._lock:
+            text = self._chunks.get(chunk_id)
+            if text is not None:
+                self._chunks.move_to_end(chunk_id)
+        if text is not None:
+            if self.directory:
+                self._touch(chunk_id)
+            return text
+        text = self._read(chunk_id)
+        if text is not None:
+            with self._lock:
+                self._remember(chunk_id, text)
+        return text
+
+    def iter_text(self, chunk_ids: List[str]) -> Iterator[Tuple[str, str]]:
+        """
+        Lazily yield (chunk_id, text), skipping unknown ids, so prompts are joined once at the end
+        and cold chunks are read from disk only while the prompt is being assembled.
+        """
+        for chunk_id in chunk_ids:
+            text = self.get(chunk_id)
+            if text is not None:
+                yield chunk_id, text
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def _remember(self, chunk_id: str, text: str) -> None:
+        # Caller holds the lock
+        self._chunks[chunk_id] = text
+        self._total_chars += len(text)
+        while self._total_chars > self.max_total_chars and len(self._chunks) > 1:
+            _, evicted = self._chunks.popitem(last=False)
+            self._total_chars -= len(evicted)
+
+    def _path(self, chunk_id: str) -> str:
+        return os.path.join(self.directory, chunk_id[:2], chunk_id)
+
+    def _write(self, chunk_id: str, text: str) -> None:
+        path = self._path(chunk_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = text.encode("utf-8")
+        # Write then rename so concurrent readers never see a partial chunk
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with self._lock:
+            # Under the lock, so two threads writing the same new chunk count it once
+            added = 0 if os.path.exists(path) else len(data)
+            os.replace(tmp_path, path)
+            self._disk_bytes += added
+            over = self.max_disk_bytes and self._disk_bytes > self.max_disk_bytes
+        if over:
+            self.collect()
+
+    def _touch(self, chunk_id: str) -> None:
+        """Mark a chunk file as recently used so collection removes it last."""
+        try:
+            os.utime(self._path(chunk_id))
+        except OSError:
+            pass
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every chunk file on disk."""
+        if not self.directory:
+            return []
+        files = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def collect(self) -> int:
+        """
+        Remove the least recently used chunk files until the disk tier is under GC_TARGET of its cap.
+
+        Returns:
+            Number of files removed (0 when another thread is already collecting)
+        """
+        if not self._gc_lock.acquire(blocking=False):
+            return 0
+        try:
+            files = sorted(self._files())
+            total = sum(size for _, size, _ in files)
+            target = self.max_disk_bytes * GC_TARGET
+            removed = freed = 0
+            for _, size, path in files:
+                if total <= target:
+                    break
+                with self._lock:
+                    try:
+                        os.remove(path)
+                        freed += size
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                removed += 1
+            with self._lock:
+                # Subtract what was freed rather than assign the scan total, which would drop
+                # chunks written while this collection ran
+                self._disk_bytes = max(0, self._disk_bytes - freed)
+            return removed
+        finally:
+            self._gc_lock.release()
+
+    def _read(self, chunk_id: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(chunk_id), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return ""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    # Decode straight from the mapping, without an intermediate bytes copy
+                    text = str(view, "utf-8")
+        except FileNotFoundError:
+            return None
+        self._touch(chunk_id)
+        return text
+
+
+# Global instance shared by all workflows in the process so identical pages are stored once.
+# Disk-backed by default so chunk ids in checkpoints stay resolvable after a crash.
+chunk_store = ChunkStore(directory=os.getenv("RESEARCH_CHUNK_DIR") or os.path.join(DATA_DIR, "chunks"))
@@ -0,0 +1,219 @@
+"""
+Company name resolution: maps free-text company input to one canonical name before any lookup.
+"""
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from urllib.parse import urlparse
+from .store import DATA_DIR
+
+# Legal-form and filler words dropped when normalizing ("Google LLC" -> "google")
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "company",
+    "plc", "gmbh", "ag", "sa", "nv", "bv", "holdings", "group", "the"
+}
+
+# Seed aliases (including tickers and parent names) and domains for frequently researched companies
+KNOWN_COMPANIES: Dict[str, Dict[str, List[str]]] = {
+    "Google": {"aliases": ["Alphabet", "GOOGL", "GOOG", "Google LLC", "Alphabet Inc"], "domains": ["google.com", "abc.xyz"]},
+    "Meta": {"aliases": ["Facebook", "FB", "META", "Meta Platforms"], "domains": ["meta.com", "facebook.com", "metacareers.com"]},
+    "Amazon": {"aliases": ["AMZN", "Amazon.com"], "domains": ["amazon.com", "amazon.jobs"]},
+    "Apple": {"aliases": ["AAPL", "Apple Inc"], "domains": ["apple.com"]},
+    "Microsoft": {"aliases": ["MSFT"], "domains": ["microsoft.com"]},
+    "Netflix": {"aliases": ["NFLX"], "domains": ["netflix.com"]},
+    "NVIDIA": {"aliases": ["NVDA"], "domains": ["nvidia.com"]},
+    "Tesla": {"aliases": ["TSLA", "Tesla Motors"], "domains": ["tesla.com"]},
+    "Uber": {"aliases": ["UBER", "Uber Technologies"], "domains": ["uber.com"]},
+    "Airbnb": {"aliases": ["ABNB"], "domains": ["airbnb.com"]},
+    "Salesforce": {"aliases": ["CRM"], "domains": ["salesforce.com"]},
+    "Stripe": {"aliases": [], "domains": ["stripe.com"]},
+}
+
+FUZZY_THRESHOLD = float(os.getenv("RESEARCH_COMPANY_FUZZY_THRESHOLD", "0.7"))
+MIN_FUZZY_LENGTH = 4  # Shorter inputs (tickers, acronyms) only match exactly
+TYPO_CHARS = 7  # Edit-distance fallback allows one typo per this many characters ("Microsft")
+
+def normalize_company(name: str) -> str:
+    """Lowercase, strip punctuation and legal suffixes: "The Walt Disney Co." -> "walt disney"."""
+    words = re.sub(r"[^\w\s&]", " ", name.lower()).split()
+    stripped = [word for word in words if word not in LEGAL_SUFFIXES]
+    return " ".join(stripped or words)
+
+def _domain(text: str) -> Optional[str]:
+    """Host of input that looks like a URL or bare domain ("careers.google.com"), else None."""
+    text = text.strip().lower()
+    if " " in text or "." not in text:
+        return None
+    host = urlparse(text if "://" in text else f"https://{text}").hostname or ""
+    return host[4:] if host.startswith("www.") else host or None
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _edit_distance(a: str, b: str) -> int:
+    """Edits (insert, delete, substitute, swap adjacent characters) turning a into b."""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[-1]
+
+class CompanyIndex:
+    """
+    Alias index resolving company input to a canonical name.
+
+    Resolution order: exact normalized name or alias, domain (including subdomains), then fuzzy
+    matching on character trigrams, then a typo-tolerant edit distance. Names researched before
+    are learned and persisted, so later misspellings of them resolve too.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: Optional[float] = None):
+        """
+        Args:
+            path: SQLite file path; defaults to RESEARCH_COMPANY_INDEX_PATH or <RESEARCH_DATA_DIR>/companies.db
+            threshold: Minimum trigram Jaccard similarity for a fuzzy match
+        """
+        self.path = path or os.getenv("RESEARCH_COMPANY_INDEX_PATH") or os.path.join(DATA_DIR, "companies.db")
+        self.threshold = FUZZY_THRESHOLD if threshold is None else threshold
+        self._aliases: Dict[str, str] = {}  # normalized alias -> canonical name
+        self._domains: Dict[str, str] = {}  # domain -> canonical name
+        self._grams: Dict[str, Set[str]] = defaultdict(set)  # trigram -> normalized aliases
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS company_aliases (
+                    alias TEXT PRIMARY KEY,
+                    canonical TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS company_domains (
+                    domain TEXT PRIMARY KEY,
+                    canonical TEXT NOT NULL
+                );
+                """
+            )
+            aliases = conn.execute("SELECT alias, canonical FROM company_aliases").fetchall()
+            domains = conn.execute("SELECT domain, canonical FROM company_domains").fetchall()
+        for canonical, known in KNOWN_COMPANIES.items():
+            self._index(canonical, [canonical, *known["aliases"]], known["domains"])
+        for alias, canonical in aliases:
+            self._index(canonical, [alias], [])
+        for domain, canonical in domains:
+            self._domains[domain] = canonical
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _index(self, canonical: str, aliases: Iterable[str], domains: Iterable[str]) -> None:
+        for alias in aliases:
+            key = normalize_company(alias)
+            if key and key not in self._aliases:
+                self._aliases[key] = canonical
+                for gram in _trigrams(key):
+                    self._grams[gram].add(key)
+        for domain in domains:
+            self._domains.setdefault(domain.lower(), canonical)
+
+    def add(self, canonical: str, aliases: Iterable[str] = (), domains: Iterable[str] = ()) -> None:
+        """Register a canonical company name with extra aliases and domains (persisted)."""
+        aliases = [canonical, *aliases]
+        domains = list(domains)
+        with self._lock:
+            self._index(canonical, aliases, domains)
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO company_aliases (alias, canonical) VALUES (?, ?)",
+                [(normalize_company(alias), canonical) for alias in aliases if normalize_company(alias)]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO company_domains (domain, canonical) VALUES (?, ?)",
+                [(domain.lower(), canonical) for domain in domains]
+            )
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Canonical name for an exact alias, domain or close spelling; None if unknown."""
+        key = normalize_company(name)
+        with self._lock:
+            if key in self._aliases:
+                return self._aliases[key]
+            domain = _domain(name)
+            if domain:
+                parts = domain.split(".")
+                # careers.google.com, then google.com (never the bare TLD)
+                for i in range(len(parts) - 1):
+                    canonical = self._domains.get(".".join(parts[i:]))
+                    if canonical:
+                        return canonical
+            if len(key) < MIN_FUZZY_LENGTH:
+                return None
+            return self._fuzzy(key)
+
+    def domains(self, canonical: str) -> List[str]:
+        """Known domains of a canonical company name, seeded ones first."""
+        with self._lock:
+            return [domain for domain, name in self._domains.items() if name == canonical]
+
+    def _fuzzy(self, key: str) -> Optional[str]:
+        """Best alias by trigram Jaccard similarity above the threshold (caller holds the lock)."""
+        grams = _trigrams(key)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for alias in self._grams.get(gram, ()):
+                shared[alias] += 1
+        best, best_score = None, self.threshold
+        for alias, count in shared.items():
+            score = count / (len(grams) + len(_trigrams(alias)) - count)
+            if score >= best_score:
+                best, best_score = alias, score
+        if best is None:
+            best = self._typo(key, shared)
+        return self._aliases[best] if best else None
+
+    @staticmethod
+    def _typo(key: str, candidates: Dict[str, int]) -> Optional[str]:
+        """
+        Alias within one edit per TYPO_CHARS characters of the key.
+
+        A dropped or swapped letter breaks up to three trigrams, which sinks the Jaccard score
+        of short names ("microsft" vs "microsoft" is 0.58), so close spellings get this second look.
+        """
+        allowed = len(key) // TYPO_CHARS
+        best, best_edits = None, allowed + 1
+        # Most shared trigrams first, so ties go to the closer trigram match
+        for alias in sorted(candidates, key=candidates.get, reverse=True):
+            if abs(len(alias) - len(key)) >= best_edits:
+                continue
+            edits = _edit_distance(key, alias)
+            if edits < best_edits:
+                best, best_edits = alias, edits
+        return best
+
+    def resolve(self, name: str) -> str:
+        """
+        Canonical company name for free-text input.
+
+        Unknown names are returned tidied (surrounding whitespace collapsed) and are learned
+        once research for them completes (see add).
+        """
+        name = " ".join(name.split())
+        canonical = self.lookup(name)
+        if canonical and canonical.lower() != name.lower():
+            print(f"🔗 Resolved company '{name}' to '{canonical}'")
+        return canonical or name
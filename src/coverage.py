@@ -0,0 +1,86 @@
+"""
+Field coverage estimates for gathered source excerpts.
+
+Each research node fills a model (CompanyBackground, InterviewProcess). Before asking the LLM,
+the gathered text is checked for regex signals of each field, so source gathering can stop as
+soon as the fields are likely answerable, or keep going when the pages are thin.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+# node -> field -> (weight, signals); a field counts as covered after SIGNAL_HITS matches
+FIELD_SIGNALS: Dict[str, Dict[str, Tuple[float, List[str]]]] = {
+    "research_company": {
+        "company_size": (1.0, [
+            r"\b\d[\d,.]*\s*(?:k|\+)?\s*(?:employees|staff|people|workers|team members)\b",
+            r"\bheadcount\b", r"\bworkforce\b", r"\bcompany size\b",
+        ]),
+        "industry": (1.0, [
+            r"\bindustry\b", r"\bsector\b", r"\bspeciali[sz](?:es|ing) in\b",
+            r"\b(?:provider|maker|manufacturer|developer) of\b", r"\b(?:saas|fintech|e-?commerce|healthcare|semiconductor)\b",
+        ]),
+        "company_culture": (1.0, [
+            r"\bculture\b", r"\bwork[- ]life\b", r"\bwork environment\b", r"\bemployees (?:say|describe)\b", r"\bremote\b",
+        ]),
+        "values": (1.0, [r"\b(?:core )?values\b", r"\bmission\b", r"\bprinciples\b", r"\bwe believe\b"]),
+        "recent_news": (0.5, [
+            r"\b(?:announce[ds]?|launch(?:ed|es)?|acquir(?:ed|es)|acquisition|funding|partnership|layoffs?)\b",
+        ]),
+    },
+    "research_process": {
+        "typical_stages": (1.5, [
+            r"\b(?:phone|recruiter|technical|initial) (?:screen|call)", r"\bon-?site\b", r"\bvirtual onsite\b",
+            r"\b(?:first|second|third|final) (?:round|interview)\b", r"\binterview loop\b", r"\b\d+ rounds?\b",
+        ]),
+        "duration": (1.0, [
+            r"\b\d+\s*(?:-|to)?\s*\d*\s*(?:days?|weeks?|months?)\b", r"\b(?:a|one|two|three|four) (?:weeks?|months?)\b",
+        ]),
+        "common_questions": (1.0, [r"\bquestions?\b", r"\basked\b", r"\btell me about\b", r"\?\s"]),
+        "technical_assessment": (1.0, [
+            r"\bcoding\b", r"\bleetcode\b", r"\balgorithms?\b", r"\bdata structures?\b",
+            r"\b(?:online|technical) (?:assessment|test)\b", r"\b(?:hackerrank|codesignal)\b",
+        ]),
+        "system_design": (0.5, [r"\bsystem design\b", r"\barchitecture\b", r"\bdesign (?:round|interview)\b"]),
+        "behavioral_focus": (0.5, [r"\bbehaviou?ral\b", r"\bculture fit\b", r"\bleadership principles\b", r"\bstar method\b"]),
+    },
+}
+SIGNAL_HITS = 2  # Matches needed before a field counts as fully covered
+
+_COMPILED: Dict[str, Dict[str, Tuple[float, List[Pattern]]]] = {
+    node: {
+        field: (weight, [re.compile(pattern, re.IGNORECASE) for pattern in patterns])
+        for field, (weight, patterns) in fields.items()
+    }
+    for node, fields in FIELD_SIGNALS.items()
+}
+
+class Coverage(NamedTuple):
+    score: float  # Weighted share of fields covered, 0-1
+    missing: List[str]  # Fields with no signal at all
+
+def estimate_coverage(node: str, texts: Sequence[str]) -> Optional[Coverage]:
+    """
+    Estimate how well gathered texts cover a node's target model fields.
+
+    A field's coverage is its signal matches across all texts over SIGNAL_HITS (capped at 1);
+    the score is the weighted mean over fields. Returns None for nodes without signals.
+    """
+    fields = _COMPILED.get(node)
+    if fields is None:
+        return None
+    total = sum(weight for weight, _ in fields.values())
+    score = 0.0
+    missing = []
+    for field, (weight, patterns) in fields.items():
+        hits = 0
+        for text in texts:
+            for pattern in patterns:
+                hits += len(pattern.findall(text))
+                if hits >= SIGNAL_HITS:
+                    break
+            if hits >= SIGNAL_HITS:
+                break
+        if not hits:
+            missing.append(field)
+        score += weight * min(1.0, hits / SIGNAL_HITS)
+    return Coverage(round(score / total, 3), missing)
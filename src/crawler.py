@@ -0,0 +1,528 @@
+"""
+Bounded, incremental crawl of a company's own careers and engineering-blog pages.
+
+Web search for interview information is noisy, while the company's careers pages ("how we
+hire", teams, culture) and engineering blog are high signal but rarely rank. For each company
+the crawler:
+
+- finds the site: domains known to the company index, else one search for its careers page;
+- reads the sitemaps listed in robots.txt (or /sitemap.xml), following sitemap indexes, and
+  keeps careers and engineering URLs that robots.txt allows; sites without a sitemap are
+  crawled by following links from /careers, /jobs, /engineering and /blog, up to
+  RESEARCH_CRAWL_MAX_DEPTH hops;
+- fetches the RESEARCH_CRAWL_MAX_PAGES best URLs.
+
+Every request (robots.txt, sitemaps, link pages and the pages themselves) goes through the
+scrape scheduler and is charged to the job's budget run. Research runs crawl with
+discover=False: finding the site and reading its sitemaps then happens in the background
+(crawl_later) and the run uses the pages stored so far.
+
+The selected pages and their excerpts are kept in crawl.db. Sitemaps are re-read after
+RESEARCH_CRAWL_SITEMAP_TTL_HOURS and later crawls only fetch pages whose sitemap lastmod
+changed (pages without a lastmod once they are older than RESEARCH_CRAWL_PAGE_MAX_AGE_DAYS).
+"""
+import gzip
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import urllib.request
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import partial
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from .budget import BudgetGovernor
+from .chunks import MAX_CHUNK_CHARS
+from .companies import CompanyIndex, normalize_company
+from .domains import domain_of
+from .scheduler import ScrapeScheduler, scrape_scheduler
+from .store import DATA_DIR, company_key
+
+CRAWL_ENABLED = os.getenv("RESEARCH_CRAWL", "1") != "0"
+MAX_PAGES = int(os.getenv("RESEARCH_CRAWL_MAX_PAGES", "8"))  # Pages kept per company
+MAX_DEPTH = int(os.getenv("RESEARCH_CRAWL_MAX_DEPTH", "1"))  # Link hops from the seed pages when there is no sitemap
+MAX_SITEMAPS = int(os.getenv("RESEARCH_CRAWL_MAX_SITEMAPS", "6"))  # Sitemap files read per crawl
+SITEMAP_TTL = float(os.getenv("RESEARCH_CRAWL_SITEMAP_TTL_HOURS", "24")) * 3600
+PAGE_MAX_AGE = float(os.getenv("RESEARCH_CRAWL_PAGE_MAX_AGE_DAYS", "7")) * 86400
+DISCOVERY_RETRY = 7 * 86400  # Seconds before looking again for a company whose site was not found
+MAX_SITES = 3  # Known domains crawled per company
+SITEMAP_MAX_DEPTH = 2  # Nesting of sitemap indexes followed
+MAX_SITEMAP_BYTES = 10 * 1024 * 1024
+MAX_LINK_PAGE_BYTES = 1024 * 1024
+MAX_CANDIDATES = 5000  # Section URLs collected from sitemaps before ranking
+USER_AGENT = "company-research-agent"
+SEED_PATHS = ("careers", "jobs", "engineering", "blog")
+
+# Host labels and path segments that put a page in a section
+SECTION_HOSTS = {
+    "careers": {"careers", "jobs", "join", "hiring"},
+    "engineering": {"engineering", "eng", "tech", "techblog"},
+}
+SECTION_PATHS = {
+    "careers": re.compile(r"/(?:careers?|jobs|join(?:-us)?|hiring|life-at[\w-]*|working-at[\w-]*|work-with-us|interview\w*)(?:/|$)", re.IGNORECASE),
+    "engineering": re.compile(r"/(?:engineering|eng-blog|tech-?blog|blog/(?:engineering|tech)|developers?/blog)(?:/|$)", re.IGNORECASE),
+}
+# Path terms that make a page more useful for interview research
+PRIORITY_TERMS = {
+    "interview": 4.0, "hire": 3.0, "hiring": 3.0, "recruit": 2.0, "culture": 2.0, "values": 2.0,
+    "process": 1.5, "life": 1.0, "engineering": 1.0, "architecture": 1.0, "team": 0.5,
+}
+JOB_POSTING = re.compile(r"\d{4,}|[0-9a-f]{8}-[0-9a-f]{4}")  # Listing ids: /jobs/123456, /jobs/3f2a9c1e-...
+
+class CrawledPage(NamedTuple):
+    url: str
+    section: str  # careers or engineering
+    title: str
+    lastmod: Optional[str]  # As listed in the sitemap
+    fetched_at: str  # ISO timestamp of the fetch the excerpt came from
+    excerpt: str
+
+class CrawlResult(NamedTuple):
+    pages: List[CrawledPage]
+    fetched: int  # Pages fetched by this crawl (the rest were unchanged)
+    searches: int  # Web searches spent finding the site
+
+class _Candidate(NamedTuple):
+    url: str
+    section: str
+    lastmod: Optional[str]
+    score: float
+
+def registrable_domain(host: str) -> str:
+    """careers.google.com -> google.com; keeps three labels for co.uk-style suffixes."""
+    parts = host.lower().strip(".").split(".")
+    keep = 3 if len(parts) > 2 and len(parts[-1]) == 2 and len(parts[-2]) <= 3 else 2
+    return ".".join(parts[-keep:])
+
+def classify(url: str) -> Optional[str]:
+    """Section of a URL (careers or engineering) from its host label or path, else None."""
+    parsed = urlparse(url)
+    label = (parsed.hostname or "").split(".")[0]
+    for section, labels in SECTION_HOSTS.items():
+        if label in labels:
+            return section
+    for section, pattern in SECTION_PATHS.items():
+        if pattern.search(parsed.path):
+            return section
+    return None
+
+def page_score(url: str, section: str) -> float:
+    """Usefulness of a page from its path: interview and hiring pages first, job listings last."""
+    path = urlparse(url).path.lower()
+    segments = [segment for segment in path.split("/") if segment]
+    score = sum(weight for term, weight in PRIORITY_TERMS.items() if term in path)
+    if section == "careers" and any(JOB_POSTING.search(segment) for segment in segments):
+        score -= 3.0
+    return score - 0.25 * max(0, len(segments) - 3)
+
+def page_title(url: str) -> str:
+    """Readable title from the last path segment: /careers/how-we-hire -> "How we hire"."""
+    parsed = urlparse(url)
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    if not segments:
+        return parsed.hostname or url
+    title = re.sub(r"\.\w+$", "", segments[-1]).replace("-", " ").replace("_", " ").strip()
+    return title[:1].upper() + title[1:] if title else parsed.hostname or url
+
+def parse_sitemap(data: bytes) -> Tuple[List[str], List[Tuple[str, Optional[str]]]]:
+    """
+    Parse a sitemap or sitemap index.
+
+    Returns:
+        (child sitemap URLs, [(page URL, lastmod)]); a truncated document yields what was read
+    """
+    children: List[str] = []
+    pages: List[Tuple[str, Optional[str]]] = []
+    loc = lastmod = None
+    try:
+        for _, element in ElementTree.iterparse(io.BytesIO(data), events=("end",)):
+            tag = element.tag.rsplit("}", 1)[-1]
+            if tag == "loc":
+                loc = (element.text or "").strip()
+            elif tag == "lastmod":
+                lastmod = (element.text or "").strip() or None
+            elif tag in ("url", "sitemap"):
+                if loc:
+                    if tag == "sitemap":
+                        children.append(loc)
+                    else:
+                        pages.append((loc, lastmod))
+                loc = lastmod = None
+                element.clear()
+    except ElementTree.ParseError:
+        pass
+    return children, pages
+
+class _LinkExtractor(HTMLParser):
+    """Collects absolute href targets of a page."""
+
+    def __init__(self, base: str):
+        super().__init__(convert_charrefs=True)
+        self.base = base
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href and not href.startswith(("#", "mailto:", "javascript:")):
+                self.links.append(urljoin(self.base, href).split("#", 1)[0])
+
+class SiteCrawler:
+    """Finds, selects and incrementally re-fetches careers and engineering pages per company"""
+
+    def __init__(self, path: Optional[str] = None, companies: Optional[CompanyIndex] = None,
+                 scheduler: Optional[ScrapeScheduler] = None, max_pages: Optional[int] = None,
+                 max_depth: Optional[int] = None, budget: Optional[BudgetGovernor] = None):
+        """
+        Args:
+            path: SQLite file path; defaults to RESEARCH_CRAWL_PATH or <RESEARCH_DATA_DIR>/crawl.db
+            companies: Company index providing (and learning) company domains
+            scheduler: Scrape scheduler every request goes through
+            max_pages: Pages kept per company (RESEARCH_CRAWL_MAX_PAGES)
+            max_depth: Link hops followed from seed pages on sites without a sitemap (RESEARCH_CRAWL_MAX_DEPTH)
+            budget: Budget governor the searches and requests are charged to
+        """
+        self.path = path or os.getenv("RESEARCH_CRAWL_PATH") or os.path.join(DATA_DIR, "crawl.db")
+        self.companies = companies or CompanyIndex()
+        self.scheduler = scheduler or scrape_scheduler
+        self.max_pages = MAX_PAGES if max_pages is None else max_pages
+        self.max_depth = MAX_DEPTH if max_depth is None else max_depth
+        self.budget = budget or BudgetGovernor()
+        # Background discovery and sitemap reads: company key -> future of the latest crawl
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="site-crawl")
+        self._background: Dict[str, Future] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS crawl_sites (
+                    company TEXT PRIMARY KEY,
+                    domains TEXT NOT NULL,
+                    discovered_at REAL NOT NULL,
+                    checked_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS crawl_pages (
+                    company TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    section TEXT NOT NULL,
+                    lastmod TEXT,
+                    excerpt TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (company, url)
+                );
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _lock(self, key: str) -> threading.Lock:
+        # One crawl per company at a time: a concurrent caller waits and reuses its pages
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    # ===== CRAWL =====
+    def crawl(self, company: str, service: Any, job: Optional[str] = None, discover: bool = True) -> CrawlResult:
+        """
+        Crawl a company's careers and engineering pages, fetching only new or changed ones.
+
+        Args:
+            company: Canonical company name
+            service: WebResearchService used for the site search and page fetches
+            job: Research job the requests are scheduled under and budget run they are charged to
+            discover: Find the site and read its sitemaps here when due; with False they are left
+                to a background crawl (crawl_later) and the stored pages are used meanwhile
+
+        Returns:
+            The selected pages with their excerpts, and the fetches and searches it took
+        """
+        key = company_key(company)
+        run = job or key
+        pending = self._background.get(key)
+        if not discover and pending is not None and not pending.done():
+            # The background crawl holds the company's lock: use the pages stored so far
+            stored = self._stored_pages(key)
+            return CrawlResult([self._page(url, row) for url, row in stored.items()], 0, 0)
+        with self._lock(key):
+            now = time.time()
+            site = self._site(key)
+            searches = 0
+            undiscovered = site is None or (not site["domains"] and now - site["discovered_at"] > DISCOVERY_RETRY)
+            fresh = bool(site and site["checked_at"] and now - site["checked_at"] < SITEMAP_TTL)
+            if not discover and (undiscovered or (site["domains"] and not fresh)):
+                # Site search and sitemap reads (up to MAX_SITEMAPS files) stay off the research path
+                self.crawl_later(company, service)
+            elif undiscovered:
+                domains, searches = self._discover(company, service)
+                self.budget.record(run, searches=searches)
+                site = {"domains": domains, "discovered_at": now, "checked_at": None}
+                self._save_site(key, site)
+            if site is None or not site["domains"]:
+                return CrawlResult([], 0, searches)
+
+            stored = self._stored_pages(key)
+            if fresh or not discover:
+                selected = [_Candidate(url, row["section"], row["lastmod"], 0.0) for url, row in stored.items()]
+            else:
+                print(f"🗺️ Reading site maps for {company}: {', '.join(site['domains'])}")
+                selected = self._select(self._candidates(site["domains"], run))
+                site["checked_at"] = now
+                self._save_site(key, site)
+
+            changed = [candidate for candidate in selected if self._changed(candidate, stored.get(candidate.url), now)]
+            futures = [
+                (candidate, self.scheduler.submit(run, candidate.url, partial(service.scrape_url_bounded, candidate.url, MAX_CHUNK_CHARS)))
+                for candidate in changed
+            ]
+            self.budget.record(run, scrapes=len(changed))
+            fetched: Dict[str, Dict[str, Any]] = {}
+            for candidate, future in futures:
+                try:
+                    content = (future.result() or {}).get("markdown")
+                except Exception as e:
+                    print(f"  ⚠️ Error crawling {candidate.url}: {str(e)[:200]}")
+                    continue
+                if isinstance(content, str) and len(content) >= 50:
+                    fetched[candidate.url] = {"section": candidate.section, "lastmod": candidate.lastmod,
+                                              "excerpt": content[:MAX_CHUNK_CHARS], "fetched_at": now}
+            if changed:
+                print(f"  🗺️ Crawled {len(fetched)}/{len(changed)} changed pages; {len(selected) - len(changed)} unchanged")
+            self._save_pages(key, fetched, [candidate.url for candidate in selected])
+
+            # Pages whose re-fetch failed keep their previous excerpt
+            pages = [self._page(candidate.url, fetched.get(candidate.url) or stored[candidate.url])
+                     for candidate in selected if candidate.url in fetched or candidate.url in stored]
+            return CrawlResult(pages, len(changed), searches)
+
+    def crawl_later(self, company: str, service: Any) -> Future:
+        """
+        Crawl a company in the background, charged to its own budget run.
+
+        Returns:
+            Future of the CrawlResult; the one already running when the company is being crawled
+        """
+        key = company_key(company)
+        with self._locks_lock:
+            pending = self._background.get(key)
+            if pending is None or pending.done():
+                pending = self._executor.submit(self._crawl_in_background, company, service)
+                self._background[key] = pending
+        pending.add_done_callback(partial(self._forget, key))
+        return pending
+
+    def _crawl_in_background(self, company: str, service: Any) -> CrawlResult:
+        run = f"crawl:{company_key(company)}"
+        self.budget.start_run(run)
+        try:
+            return self.crawl(company, service, job=run)
+        except Exception as e:
+            print(f"  ⚠️ Could not crawl the site of {company}: {e}")
+            raise
+        finally:
+            self.budget.finish_run(run)
+
+    def _forget(self, key: str, future: Future) -> None:
+        # Finished crawls are dropped so their results are not kept per company
+        if self._background.get(key) is future:
+            self._background.pop(key, None)
+
+    @staticmethod
+    def _page(url: str, row: Dict[str, Any]) -> CrawledPage:
+        return CrawledPage(
+            url=url,
+            section=row["section"],
+            title=page_title(url),
+            lastmod=row["lastmod"],
+            fetched_at=datetime.fromtimestamp(row["fetched_at"], timezone.utc).isoformat(),
+            excerpt=row["excerpt"],
+        )
+
+    @staticmethod
+    def _changed(candidate: _Candidate, row: Optional[Dict[str, Any]], now: float) -> bool:
+        """Whether a page needs fetching: new, lastmod moved, or (without lastmod) gone stale."""
+        if row is None:
+            return True
+        if candidate.lastmod:
+            return candidate.lastmod != row["lastmod"]
+        return now - row["fetched_at"] > PAGE_MAX_AGE
+
+    def _discover(self, company: str, service: Any) -> Tuple[List[str], int]:
+        """Company domains from the index, else from a search for its careers page (learned)."""
+        domains = self.companies.domains(company)[:MAX_SITES]
+        if domains:
+            return domains, 0
+        name = normalize_company(company).replace(" ", "")
+        for result in service.search_web(f"{company} careers", num_results=5):
+            domain = registrable_domain(domain_of(result.url))
+            label = domain.split(".")[0]
+            if name and len(label) >= 3 and (label in name or name in label):
+                print(f"🗺️ Found the site of {company}: {domain}")
+                self.companies.add(company, domains=[domain])
+                return [domain], 1
+        print(f"🗺️ No company site found for {company}")
+        return [], 1
+
+    def _candidates(self, domains: List[str], job: str) -> List[_Candidate]:
+        """Section URLs from the sites' sitemaps, or from following links when there are none."""
+        candidates: Dict[str, _Candidate] = {}
+        sitemaps_read = 0
+        for domain in domains:
+            robots, sitemaps = self._robots(domain, job)
+            queue = [(url, 0) for url in sitemaps]
+            seen = set()
+            while queue and sitemaps_read < MAX_SITEMAPS and len(candidates) < MAX_CANDIDATES:
+                url, depth = queue.pop(0)
+                if url in seen:
+                    continue
+                seen.add(url)
+                data = self._fetch(url, MAX_SITEMAP_BYTES, job)
+                if data is None:
+                    continue
+                sitemaps_read += 1
+                children, pages = parse_sitemap(data)
+                if depth < SITEMAP_MAX_DEPTH:
+                    # Careers and engineering sitemaps of an index are read before the others
+                    children.sort(key=lambda child: not re.search(r"career|job|engineer|blog", child, re.IGNORECASE))
+                    queue.extend((child, depth + 1) for child in children)
+                for page, lastmod in pages:
+                    section = classify(page)
+                    if section and (robots is None or robots.can_fetch(USER_AGENT, page)):
+                        candidates.setdefault(page, _Candidate(page, section, lastmod, page_score(page, section)))
+            if not sitemaps_read:
+                for page, section in self._follow_links(domain, robots, job):
+                    candidates.setdefault(page, _Candidate(page, section, None, page_score(page, section)))
+        return list(candidates.values())
+
+    def _robots(self, domain: str, job: str) -> Tuple[Optional[RobotFileParser], List[str]]:
+        """robots.txt rules (None if unavailable) and the sitemaps it lists, /sitemap.xml by default."""
+        for host in (domain, f"www.{domain}"):
+            data = self._fetch(f"https://{host}/robots.txt", MAX_LINK_PAGE_BYTES, job)
+            if data is None:
+                continue
+            robots = RobotFileParser()
+            robots.parse(data.decode("utf-8", errors="replace").splitlines())
+            return robots, robots.site_maps() or [f"https://{host}/sitemap.xml"]
+        return None, [f"https://{domain}/sitemap.xml", f"https://www.{domain}/sitemap.xml"]
+
+    def _follow_links(self, domain: str, robots: Optional[RobotFileParser], job: str) -> List[Tuple[str, str]]:
+        """Breadth-first crawl of section links from the seed pages, up to max_depth hops."""
+        queue = [(f"https://{domain}/{path}", 0) for path in SEED_PATHS]
+        queue += [(f"https://{label}.{domain}/", 0) for label in ("careers", "engineering")]
+        seen = set()
+        found: Dict[str, str] = {}
+        while queue and len(seen) < self.max_pages * 8:
+            url, depth = queue.pop(0)
+            if url in seen or (robots is not None and not robots.can_fetch(USER_AGENT, url)):
+                continue
+            seen.add(url)
+            section = classify(url)
+            if depth and depth >= self.max_depth:
+                # Pages at the last hop are only listed; they are fetched if selected
+                if section:
+                    found.setdefault(url, section)
+                continue
+            data = self._fetch(url, MAX_LINK_PAGE_BYTES, job)
+            if data is None:
+                continue
+            if section:
+                found.setdefault(url, section)
+            if depth >= self.max_depth:
+                continue
+            # Seeds such as /blog are followed even when they are not section pages themselves
+            parser = _LinkExtractor(url)
+            parser.feed(data.decode("utf-8", errors="replace"))
+            for link in parser.links:
+                if link not in seen and registrable_domain(domain_of(link)) == domain and classify(link):
+                    queue.append((link, depth + 1))
+        return list(found.items())
+
+    def _select(self, candidates: List[_Candidate]) -> List[_Candidate]:
+        """Best pages by score (newest first on ties), with a share of the cap for each section."""
+        ranked = sorted(candidates, key=lambda c: (c.score, c.lastmod or ""), reverse=True)
+        quota = max(1, self.max_pages // 2)
+        selected: List[_Candidate] = []
+        for section in SECTION_PATHS:
+            selected += [candidate for candidate in ranked if candidate.section == section][:quota]
+        chosen = {candidate.url for candidate in selected}
+        selected += [candidate for candidate in ranked if candidate.url not in chosen][:self.max_pages - len(selected)]
+        return selected[:self.max_pages]
+
+    def _fetch(self, url: str, max_bytes: int, job: str) -> Optional[bytes]:
+        """_get through the scrape scheduler (per-domain limits), charged to the job's run as a scrape."""
+        self.budget.record(job, scrapes=1)
+        return self.scheduler.submit(job, url, partial(self._get, url, max_bytes)).result()
+
+    @staticmethod
+    def _get(url: str, max_bytes: int) -> Optional[bytes]:
+        """Fetch a URL directly (sitemaps, robots.txt, link pages), bounded to max_bytes; None on failure."""
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                data = response.read(max_bytes)
+        except Exception:
+            return None
+        if data[:2] == b"\x1f\x8b":
+            try:
+                with gzip.GzipFile(fileobj=io.BytesIO(data)) as unzipped:
+                    data = unzipped.read(max_bytes)
+            except (OSError, EOFError):
+                return None
+        return data
+
+    # ===== STORAGE =====
+    def _site(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT domains, discovered_at, checked_at FROM crawl_sites WHERE company = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"domains": json.loads(row[0]), "discovered_at": row[1], "checked_at": row[2]}
+
+    def _save_site(self, key: str, site: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO crawl_sites (company, domains, discovered_at, checked_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(site["domains"]), site["discovered_at"], site["checked_at"])
+            )
+
+    def _stored_pages(self, key: str) -> Dict[str, Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url, section, lastmod, excerpt, fetched_at FROM crawl_pages WHERE company = ?", (key,)
+            ).fetchall()
+        return {
+            url: {"section": section, "lastmod": lastmod, "excerpt": excerpt, "fetched_at": fetched_at}
+            for url, section, lastmod, excerpt, fetched_at in rows
+        }
+
+    def _save_pages(self, key: str, fetched: Dict[str, Dict[str, Any]], keep: List[str]) -> None:
+        """Store fetched pages and drop pages no longer selected."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO crawl_pages (company, url, section, lastmod, excerpt, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, url, row["section"], row["lastmod"], row["excerpt"], row["fetched_at"]) for url, row in fetched.items()]
+            )
+            placeholders = ", ".join("?" * len(keep))
+            conn.execute(
+                f"DELETE FROM crawl_pages WHERE company = ? AND url NOT IN ({placeholders})", (key, *keep)
+            )
@@ -0,0 +1,193 @@
+"""
+Per-domain source quality statistics used to decide which search results are worth scraping.
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from .store import DATA_DIR
+
+# A domain whose decayed success rate falls below SKIP_SUCCESS_RATE after MIN_ATTEMPTS is skipped
+MIN_ATTEMPTS = 3
+SKIP_SUCCESS_RATE = 0.2
+TARGET_CHARS = 5000  # Useful characters that count as a full-yield scrape
+HALF_LIFE_DAYS = float(os.getenv("RESEARCH_DOMAIN_HALF_LIFE_DAYS", "14"))
+
+# (url, success, useful_chars, latency_s) for one scrape attempt
+ScrapeObservation = Tuple[str, bool, int, float]
+
+def domain_of(url: str) -> str:
+    """Registrable-looking host of a URL: lowercased, without port or leading www."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+class DomainStats:
+    """
+    Decayed per-domain scrape statistics with a ranking of candidate URLs.
+
+    Counters are exponentially decayed sums (half-life RESEARCH_DOMAIN_HALF_LIFE_DAYS), so a
+    domain that was blocked a month ago gets another chance and recent behaviour dominates.
+    """
+
+    def __init__(self, path: Optional[str] = None, half_life_days: Optional[float] = None):
+        """
+        Args:
+            path: SQLite file path; defaults to RESEARCH_DOMAIN_STATS_PATH or <RESEARCH_DATA_DIR>/domains.db
+            half_life_days: Age at which past observations count half
+        """
+        self.path = path or os.getenv("RESEARCH_DOMAIN_STATS_PATH") or os.path.join(DATA_DIR, "domains.db")
+        self.half_life = (half_life_days or HALF_LIFE_DAYS) * 86400
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS domain_stats (
+                    domain TEXT PRIMARY KEY,
+                    attempts REAL NOT NULL DEFAULT 0,
+                    successes REAL NOT NULL DEFAULT 0,
+                    useful_chars REAL NOT NULL DEFAULT 0,
+                    latency_s REAL NOT NULL DEFAULT 0,
+                    used REAL NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Short-lived connections, as in ResultStore, so prefetch threads can share the instance
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _decay(self, updated_at: float, now: float) -> float:
+        return 0.5 ** (max(0.0, now - updated_at) / self.half_life)
+
+    def _load(self, conn: sqlite3.Connection, domains: Iterable[str], now: float) -> Dict[str, Dict[str, float]]:
+        """Current (decayed) counters for the given domains."""
+        domains = list(set(domains))
+        if not domains:
+            return {}
+        rows = conn.execute(
+            f"SELECT domain, attempts, successes, useful_chars, latency_s, used, updated_at "
+            f"FROM domain_stats WHERE domain IN ({','.join('?' * len(domains))})",
+            domains
+        ).fetchall()
+        stats = {}
+        for domain, attempts, successes, useful_chars, latency_s, used, updated_at in rows:
+            factor = self._decay(updated_at, now)
+            stats[domain] = {
+                "attempts": attempts * factor,
+                "successes": successes * factor,
+                "useful_chars": useful_chars * factor,
+                "latency_s": latency_s * factor,
+                "used": used * factor,
+            }
+        return stats
+
+    def _add(self, deltas: Dict[str, Dict[str, float]]) -> None:
+        """Decay stored counters to now and add the deltas."""
+        now = time.time()
+        with self._connect() as conn:
+            current = self._load(conn, deltas, now)
+            for domain, delta in deltas.items():
+                values = current.get(domain, {})
+                merged = {key: values.get(key, 0.0) + delta.get(key, 0.0)
+                          for key in ("attempts", "successes", "useful_chars", "latency_s", "used")}
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO domain_stats
+                        (domain, attempts, successes, useful_chars, latency_s, used, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (domain, merged["attempts"], merged["successes"], merged["useful_chars"],
+                     merged["latency_s"], merged["used"], now)
+                )
+
+    def record_scrapes(self, observations: List[ScrapeObservation]) -> None:
+        """Record the outcome of a batch of scrape attempts."""
+        deltas: Dict[str, Dict[str, float]] = {}
+        for url, success, useful_chars, latency in observations:
+            delta = deltas.setdefault(domain_of(url), {"attempts": 0, "successes": 0, "useful_chars": 0, "latency_s": 0})
+            delta["attempts"] += 1
+            delta["successes"] += 1 if success else 0
+            delta["useful_chars"] += useful_chars if success else 0
+            delta["latency_s"] += latency
+        if deltas:
+            self._add(deltas)
+
+    def record_used(self, urls: Iterable[str]) -> None:
+        """Record that these sources fed an extraction that validated."""
+        deltas: Dict[str, Dict[str, float]] = {}
+        for url in urls:
+            deltas.setdefault(domain_of(url), {"used": 0})["used"] += 1
+        if deltas:
+            self._add(deltas)
+
+    @staticmethod
+    def score(stats: Optional[Dict[str, float]]) -> float:
+        """
+        Expected usefulness of scraping a domain, between 0 and 1.
+
+        Success rate, yield and use rate are smoothed towards 0.5 so unknown domains land in the
+        middle: ahead of domains that keep failing, behind domains that reliably deliver.
+        """
+        stats = stats or {}
+        attempts = stats.get("attempts", 0.0)
+        successes = stats.get("successes", 0.0)
+        success_rate = (successes + 1) / (attempts + 2)
+        average_chars = stats.get("useful_chars", 0.0) / successes if successes >= 0.5 else TARGET_CHARS / 2
+        yield_rate = min(1.0, average_chars / TARGET_CHARS)
+        use_rate = (stats.get("used", 0.0) + 1) / (successes + 2)
+        average_latency = stats.get("latency_s", 0.0) / attempts if attempts >= 0.5 else 0.0
+        return success_rate * (0.5 + 0.5 * yield_rate) * (0.5 + 0.5 * use_rate) / (1 + average_latency / 10)
+
+    @staticmethod
+    def is_blocked(stats: Optional[Dict[str, float]]) -> bool:
+        """True for domains that keep failing (paywalls, login walls, empty pages)."""
+        if not stats or stats["attempts"] < MIN_ATTEMPTS:
+            return False
+        return (stats["successes"] + 1) / (stats["attempts"] + 2) < SKIP_SUCCESS_RATE
+
+    def rank(self, urls: List[str], keep: int = 0) -> List[str]:
+        """
+        Order candidate URLs by their domain's score, dropping blocked domains.
+
+        Args:
+            urls: Candidate URLs in search order (ties keep this order)
+            keep: Minimum number of URLs to return; blocked ones are appended last to reach it
+
+        Returns:
+            URLs to try, best first
+        """
+        with self._connect() as conn:
+            stats = self._load(conn, (domain_of(url) for url in urls), time.time())
+        allowed, blocked = [], []
+        for position, url in enumerate(urls):
+            domain_stats = stats.get(domain_of(url))
+            (blocked if self.is_blocked(domain_stats) else allowed).append((-self.score(domain_stats), position, url))
+        ranked = [url for _, _, url in sorted(allowed)]
+        if blocked:
+            print(f"  ⏭️ Skipping low-yield domains: {', '.join(sorted({domain_of(url) for _, _, url in blocked}))}")
+            ranked += [url for _, _, url in sorted(blocked)][:max(0, keep - len(ranked))]
+        return ranked
+
+    def report(self, limit: int = 10) -> str:
+        """Best and worst known domains, for diagnostics."""
+        now = time.time()
+        with self._connect() as conn:
+            domains = [row[0] for row in conn.execute("SELECT domain FROM domain_stats").fetchall()]
+            stats = self._load(conn, domains, now)
+        ordered = sorted(stats.items(), key=lambda item: -self.score(item[1]))
+        return "\n".join(
+            f"  • {domain}: score {self.score(s):.2f} | {s['successes']:.1f}/{s['attempts']:.1f} ok"
+            f"{' (skipped)' if self.is_blocked(s) else ''}"
+            for domain, s in ordered[:limit]
+        )
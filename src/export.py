@@ -0,0 +1,175 @@
+"""
+Columnar export of stored research results (Apache Parquet or Arrow IPC) for analytics.
+
+Every ResearchState becomes one row with a flat schema derived from the models in models.py:
+nested model fields are prefixed with their parent ("interview_process_system_design"), lists
+of strings stay list columns, and a few per-result aggregates (source and token counts) are
+added. Requires pyarrow (pip install pyarrow, or the "analytics" extra).
+"""
+import types
+import typing
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from .models import CompanyBackground, InterviewProcess, PreparationGuide, ResearchState
+from .store import ResultStore, research_key
+
+# Nested models flattened into prefixed columns
+NESTED_MODELS = {
+    "background": CompanyBackground,
+    "interview_process": InterviewProcess,
+    "preparation_guide": PreparationGuide,
+}
+IPC_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Columnar export requires the pyarrow package: pip install pyarrow") from e
+    return pyarrow
+
+def _column_type(pa, annotation: Any):
+    """Arrow type for a model field annotation (str, bool, int, float, their lists, Optional)."""
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    origin = typing.get_origin(annotation)
+    if origin in (typing.Union, types.UnionType) and len(args) == 1:
+        return _column_type(pa, args[0])
+    if origin in (list, List):
+        return pa.list_(_column_type(pa, args[0]))
+    scalars = {str: pa.string(), bool: pa.bool_(), int: pa.int64(), float: pa.float64()}
+    if annotation not in scalars:
+        raise TypeError(f"No column type for {annotation!r}")
+    return scalars[annotation]
+
+def result_schema():
+    """Flat Arrow schema for exported results."""
+    pa = _pyarrow()
+    fields = [
+        pa.field("key", pa.string(), nullable=False),
+        pa.field("company", pa.string(), nullable=False),
+        pa.field("role", pa.string(), nullable=False),
+        pa.field("refreshed_at", pa.timestamp("us", tz="UTC")),
+        pa.field("process_reused_from", pa.string()),
+    ]
+    for prefix, model in NESTED_MODELS.items():
+        fields.extend(
+            pa.field(f"{prefix}_{name}", _column_type(pa, info.annotation))
+            for name, info in model.model_fields.items()
+        )
+    fields += [
+        pa.field("source_count", pa.int32()),
+        pa.field("source_urls", pa.list_(pa.string())),
+        pa.field("llm_calls", pa.int32()),
+        pa.field("input_tokens", pa.int64()),
+        pa.field("output_tokens", pa.int64()),
+    ]
+    return pa.schema(fields)
+
+def flatten_result(state: ResearchState, refreshed_at: Optional[str] = None) -> Dict[str, Any]:
+    """One export row for a result; fields of a missing nested model are null."""
+    row: Dict[str, Any] = {
+        "key": research_key(state.company, state.role),
+        "company": state.company,
+        "role": state.role,
+        "refreshed_at": datetime.fromisoformat(refreshed_at) if refreshed_at else None,
+        "process_reused_from": state.process_reused_from,
+    }
+    for prefix, model in NESTED_MODELS.items():
+        value = getattr(state, prefix)
+        for name in model.model_fields:
+            row[f"{prefix}_{name}"] = getattr(value, name) if value is not None else None
+    row.update(
+        source_count=len(state.sources),
+        source_urls=[record.url for record in state.sources],
+        llm_calls=len(state.usage),
+        input_tokens=sum(u.input_tokens for u in state.usage),
+        output_tokens=sum(u.output_tokens for u in state.usage),
+    )
+    return row
+
+class ResultExporter:
+    """
+    Writes results to a Parquet file (or Arrow IPC file for .arrow/.feather/.ipc paths).
+
+    Each write() appends one row group (record batch for IPC), so results can be written as
+    batches finish without holding the whole export in memory. Use as a context manager or
+    call close(); the file is only readable once closed.
+    """
+
+    def __init__(self, path: str, compression: str = "zstd"):
+        """
+        Args:
+            path: Output file; the suffix picks the format
+            compression: Parquet compression codec
+        """
+        self._pa = _pyarrow()
+        self.path = path
+        self.schema = result_schema()
+        self.rows = 0
+        if path.endswith(IPC_SUFFIXES):
+            self._writer = self._pa.ipc.new_file(path, self.schema)
+        else:
+            self._writer = self._pa.parquet.ParquetWriter(path, self.schema, compression=compression)
+
+    def write(self, results: Sequence[Tuple[ResearchState, Optional[str]]]) -> int:
+        """Append (state, refreshed_at) pairs as one row group; returns rows written."""
+        if not results:
+            return 0
+        rows = [flatten_result(state, refreshed_at) for state, refreshed_at in results]
+        columns = {name: [row[name] for row in rows] for name in self.schema.names}
+        batch = self._pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        self._writer.write_batch(batch)
+        self.rows += len(rows)
+        return len(rows)
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self) -> "ResultExporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def export_results(path: str, store: Optional[ResultStore] = None, batch_size: int = 1000,
+                   since: Optional[float] = None) -> int:
+    """
+    Export every stored result to a columnar file, one row group per store batch.
+
+    Args:
+        path: Output file (.parquet, or .arrow/.feather/.ipc for Arrow IPC)
+        store: Results store to read; defaults to the local store
+        batch_size: Results per row group
+        since: Only export results refreshed within this many seconds
+
+    Returns:
+        Number of rows written
+    """
+    store = store or ResultStore()
+    with ResultExporter(path) as exporter:
+        for batch in store.iter_results(batch_size=batch_size, since=since):
+            exporter.write(batch)
+            print(f"  📦 Exported {exporter.rows} results")
+    return exporter.rows
+
+def read_results(path: str, columns: Optional[List[str]] = None, batch_size: int = 10000) -> Iterator[Any]:
+    """
+    Stream an export as Arrow record batches, reading only the requested columns.
+
+    Parquet files are read row group by row group; Arrow IPC files are memory-mapped.
+    """
+    pa = _pyarrow()
+    if path.endswith(IPC_SUFFIXES):
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield batch.select(columns) if columns else batch
+        return
+    yield from pa.parquet.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns)
+
+def iter_rows(path: str, columns: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Stream an export as plain dicts, one per result."""
+    for batch in read_results(path, columns):
+        yield from batch.to_pylist()
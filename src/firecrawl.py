@@ -1,11 +1,163 @@
+import codecs
 import os
+import threading
 import time
-from typing import List, Dict, Any, Optional
-from firecrawl import FirecrawlApp, ScrapeOptions
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+from firecrawl import FirecrawlApp
 from dotenv import load_dotenv
 
 load_dotenv()
 
+STREAM_READ_BYTES = 16 * 1024  # Size of each read from a streamed page
+STREAM_MAX_BYTES = 2 * 1024 * 1024  # Stop streaming a page after this many raw bytes
+
+def _field(item: Any, name: str) -> Any:
+    """Read a field from a Firecrawl result whether it is a dict or a response object."""
+    if isinstance(item, dict):
+        return item.get(name)
+    return getattr(item, name, None)
+
+@dataclass(frozen=True, slots=True)
+class SearchResult:
+    """
+    One web search hit: only the fields the research nodes use.
+
+    Built straight from the Firecrawl response without converting it to a dict, so the
+    strings are shared with the response rather than copied and every other field is dropped.
+    Page content is not requested with the search: sources are scraped (bounded) separately.
+    """
+    url: str
+    title: str = ""
+    snippet: str = ""
+    position: int = 0  # Rank in the search response
+    score: Optional[float] = None  # Relevance score when the search provider reports one
+
+    @classmethod
+    def from_firecrawl(cls, item: Any, position: int = 0) -> Optional["SearchResult"]:
+        """Adapt a Firecrawl search item; returns None for items without a URL."""
+        metadata = _field(item, "metadata") or {}
+        url = _field(item, "url") or _field(metadata, "sourceURL") or _field(metadata, "url")
+        if not url:
+            return None
+        score = _field(item, "score")
+        return cls(
+            url=url,
+            title=_field(item, "title") or _field(metadata, "title") or "",
+            snippet=_field(item, "description") or _field(item, "snippet") or _field(metadata, "description") or "",
+            position=position,
+            score=float(score) if isinstance(score, (int, float)) else None
+        )
+
+class _BoundedText:
+    """
+    Accumulates cleaned text blocks that pass a relevance filter until a character budget is filled.
+
+    The leading content of the page is kept alongside (also bounded) and used instead when too
+    little of the page matches the filter.
+    """
+
+    MIN_RELEVANT_CHARS = 200
+
+    def __init__(self, max_chars: int, keywords: Optional[Iterable[str]] = None):
+        self.max_chars = max_chars
+        self.keywords = [k.lower() for k in keywords or []]
+        self.parts: List[str] = []
+        self.chars = 0
+        self.relevant_chars = 0
+        self.lead: List[str] = []
+        self.lead_chars = 0
+
+    @property
+    def full(self) -> bool:
+        return self.chars >= self.max_chars
+
+    def add(self, block: str) -> bool:
+        """Offer a block of text; returns True once the budget is filled."""
+        block = block.strip() if block.lstrip().startswith("#") else " ".join(block.split())
+        if not block or self.full:
+            return self.full
+        is_heading = block.startswith("#") and len(block) < 120
+        if not is_heading and len(block) < 30:  # Menu items, breadcrumbs, button labels
+            return False
+        if self.keywords and self.lead_chars < self.max_chars:
+            self.lead.append(block[:self.max_chars - self.lead_chars])
+            self.lead_chars += len(self.lead[-1]) + 2
+        if not is_heading and self.keywords and not any(k in block.lower() for k in self.keywords):
+            return False
+        block = block[:self.max_chars - self.chars]
+        self.parts.append(block)
+        self.chars += len(block) + 2
+        if not is_heading:
+            self.relevant_chars += len(block)
+        return self.full
+
+    def text(self) -> str:
+        if self.keywords and self.relevant_chars < self.MIN_RELEVANT_CHARS:
+            return "\n\n".join(self.lead)
+        return "\n\n".join(self.parts)
+
+def clean_markdown(markdown: str, max_chars: int, keywords: Optional[Iterable[str]] = None) -> str:
+    """Clean and relevance-filter markdown paragraph by paragraph, stopping once max_chars are collected."""
+    sink = _BoundedText(max_chars, keywords)
+    paragraph: List[str] = []
+    for line in markdown.splitlines():
+        if line.strip():
+            paragraph.append(line)
+            continue
+        if paragraph and sink.add("\n".join(paragraph)):
+            return sink.text()
+        paragraph = []
+    if paragraph:
+        sink.add("\n".join(paragraph))
+    return sink.text()
+
+class _TextExtractor(HTMLParser):
+    """Incremental HTML-to-text converter that drops scripts, navigation and other page chrome"""
+
+    SKIP_TAGS = {"script", "style", "noscript", "svg", "nav", "footer", "header", "form", "iframe", "template", "aside"}
+    BLOCK_TAGS = {"p", "div", "li", "tr", "section", "article", "main", "blockquote", "pre", "br", "ul", "ol", "table",
+                  "h1", "h2", "h3", "h4", "h5", "h6"}
+
+    def __init__(self, sink: _BoundedText):
+        super().__init__(convert_charrefs=True)
+        self.sink = sink
+        self._skip_depth = 0
+        self._heading = 0
+        self._buffer: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+            if tag[0] == "h" and tag[1:].isdigit():
+                self._heading = int(tag[1:])
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._buffer.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        text = " ".join("".join(self._buffer).split())
+        self._buffer.clear()
+        if text:
+            self.sink.add(f"{'#' * self._heading} {text}" if self._heading else text)
+        self._heading = 0
+
 class WebResearchService:
     def __init__(self):
         """Initialize the WebResearchService with Firecrawl API key."""
@@ -15,16 +167,18 @@ class WebResearchService:
         self.app = FirecrawlApp(api_key=api_key)
         self.last_request_time = 0
         self.min_request_interval = 2.0  # Minimum seconds between requests
+        self._rate_lock = threading.Lock()
 
     def _rate_limit(self):
-        """Enforce rate limiting between requests."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
-        self.last_request_time = time.time()
-
-    def search_web(self, query: str, num_results: int = 5) -> List[Dict[str, Any]]:
+        """Enforce rate limiting between requests (safe to call from several threads)."""
+        with self._rate_lock:
+            current_time = time.time()
+            time_since_last = current_time - self.last_request_time
+            if time_since_last < self.min_request_interval:
+                time.sleep(self.min_request_interval - time_since_last)
+            self.last_request_time = time.time()
+
+    def search_web(self, query: str, num_results: int = 5) -> List[SearchResult]:
         """
         Search the web using Firecrawl.
         
@@ -33,28 +187,26 @@ class WebResearchService:
             num_results: Maximum number of results to return
             
         Returns:
-            List of search results with metadata
+            List of search results, in rank order
         """
         self._rate_limit()
         
         try:
             result = self.app.search(
                 query=query,
-                limit=num_results,
-                scrape_options=ScrapeOptions(
-                    formats=["markdown"]
-                )
+                limit=num_results
             )
             
-            # Convert result to a list of dictionaries if it's not already
+            # Unwrap the response object to its list of hits
             if hasattr(result, 'data'):
                 result = result.data
+            elif isinstance(result, dict) and isinstance(result.get('data'), list):
+                result = result['data']
             
-            if isinstance(result, list):
-                return [self._clean_result(r) for r in result]
-            elif isinstance(result, dict):
-                return [self._clean_result(result)]
-            return []
+            if not isinstance(result, list):
+                result = [result] if result else []
+            results = (SearchResult.from_firecrawl(item, position) for position, item in enumerate(result))
+            return [r for r in results if r is not None]
             
         except Exception as e:
             print(f"🔴 Firecrawl search error: {str(e)[:500]}")
@@ -90,22 +242,118 @@ class WebResearchService:
             print(f"🔴 Error scraping {url}: {error_msg}")
             return {"markdown": "", "url": url, "error": error_msg}
     
-    def _clean_result(self, result: Any) -> Dict[str, Any]:
-        """Convert a result object to a clean dictionary."""
-        if isinstance(result, dict):
-            return result
-        elif hasattr(result, 'dict'):
-            return result.dict()
-        elif hasattr(result, '__dict__'):
-            return vars(result)
-        return {"content": str(result)}
-
-    def get_content_from_results(self, results: List[Dict[str, Any]], max_chars: int = 2500, max_urls: int = 5) -> str:
+    def scrape_url_bounded(self, url: str, max_chars: int = 5000,
+                           keywords: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Scrape a page while holding at most a bounded amount of it in memory.
+
+        The page is streamed directly from the source and cleaned and relevance-filtered as it
+        arrives; reading stops as soon as max_chars of useful text are collected. Pages that
+        cannot be streamed (blocked, JavaScript-rendered, non-text) fall back to Firecrawl, whose
+        response is run through the same filter and released immediately.
+
+        Args:
+            url: The URL to scrape
+            max_chars: Character budget for the returned content
+            keywords: Keep only text blocks mentioning one of these (headings are always kept)
+
+        Returns:
+            Dictionary containing the bounded content as "markdown", the url, whether it was streamed
+            and, for streamed pages, the response's "etag" and "last_modified" validators
+        """
+        streamed = self._stream_page(url, max_chars, keywords)
+        if streamed is not None and len(streamed[0]) >= 50:
+            content, validators = streamed
+            return {"markdown": content, "url": url, "streamed": True, **validators}
+        
+        scraped = self.scrape_url(url)
+        markdown = scraped.pop("markdown", "") or ""
+        content = clean_markdown(markdown, max_chars, keywords)
+        return {**scraped, "markdown": content, "url": url, "streamed": False}
+
+    def _stream_page(self, url: str, max_chars: int,
+                     keywords: Optional[Iterable[str]]) -> Optional[Tuple[str, Dict[str, Optional[str]]]]:
+        """
+        Stream a page directly; returns its bounded text and the response's ETag/Last-Modified
+        validators (so no separate probe is needed), or None if it cannot be streamed.
+        """
+        request = urllib.request.Request(url, headers={"User-Agent": "company-research-agent"})
+        sink = _BoundedText(max_chars, keywords)
+        try:
+            with urllib.request.urlopen(request, timeout=15) as response:
+                validators = {"etag": response.headers.get("ETag"),
+                              "last_modified": response.headers.get("Last-Modified")}
+                content_type = response.headers.get_content_type()
+                if content_type in ("text/html", "application/xhtml+xml"):
+                    parser = _TextExtractor(sink)
+                elif content_type.startswith("text/"):
+                    parser = None
+                else:
+                    return None
+                decoder = codecs.getincrementaldecoder(response.headers.get_content_charset() or "utf-8")(errors="replace")
+                pending = ""
+                read_bytes = 0
+                while not sink.full and read_bytes < STREAM_MAX_BYTES:
+                    data = response.read(STREAM_READ_BYTES)
+                    if not data:
+                        break
+                    read_bytes += len(data)
+                    text = decoder.decode(data)
+                    if parser:
+                        parser.feed(text)
+                    else:
+                        # Plain text / markdown: split into paragraphs, carrying the unfinished tail
+                        *blocks, pending = (pending + text).split("\n\n")
+                        for block in blocks:
+                            if sink.add(block):
+                                break
+                if parser:
+                    parser.close()
+                elif pending and not sink.full:
+                    sink.add(pending)
+        except Exception as e:
+            print(f"  ↪️ Streaming {url} failed, falling back to Firecrawl: {str(e)[:200]}")
+            return None
+        return sink.text(), validators
+
+    def probe_url(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Issue a conditional HEAD request directly to the source (no Firecrawl credits).
+
+        Args:
+            url: The URL to check
+            etag: Previously seen ETag, sent as If-None-Match
+            last_modified: Previously seen Last-Modified, sent as If-Modified-Since
+
+        Returns:
+            Dictionary with "status" (None if the probe failed), "etag" and "last_modified"
+        """
+        headers = {"User-Agent": "company-research-agent"}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        request = urllib.request.Request(url, method="HEAD", headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return {
+                    "status": response.status,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified")
+                }
+        except urllib.error.HTTPError as e:
+            # 304 Not Modified is reported as an HTTPError by urllib
+            return {"status": e.code, "etag": etag, "last_modified": last_modified}
+        except Exception as e:
+            print(f"⚠️ Could not probe {url}: {str(e)[:200]}")
+            return {"status": None, "etag": None, "last_modified": None}
+
+    def get_content_from_results(self, results: List[SearchResult], max_chars: int = 2500, max_urls: int = 5) -> str:
         """
         Extract and combine content from search results with rate limiting.
         
         Args:
-            results: List of search result dictionaries
+            results: Search results from search_web
             max_chars: Maximum number of characters to return
             max_urls: Maximum number of URLs to process
             
@@ -121,10 +369,10 @@ class WebResearchService:
             if total_chars >= max_chars or processed_urls >= max_urls:
                 break
                 
-            if not result or not isinstance(result, dict):
+            if not result:
                 continue
                 
-            url = result.get("url", "").strip()
+            url = result.url.strip()
             if not url or len(url) > 500:  # Skip invalid or suspiciously long URLs
                 continue
                 
@@ -0,0 +1,473 @@
+"""
+Durable research job queue and workers.
+
+Jobs are (company, role) pairs. A worker claims a job under a visibility timeout (a lease),
+runs Workflow.run and stores the resulting ResearchState. If a worker dies, its lease expires
+and the job becomes visible to other workers again. Failed jobs (an exception, or a result
+whose errors list steps that fell back to placeholders) are retried with backoff and
+dead-lettered after max_attempts. Jobs turned away by admission control (backpressure) are
+released for a later try without counting the attempt. The default backend is a local SQLite file shared by all
+worker processes on a machine; set RESEARCH_QUEUE_URL=redis://... to share one queue across
+machines (requires the redis package).
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from pydantic import BaseModel
+from .admission import AdmissionRejected
+from .models import ResearchState
+from .store import DATA_DIR
+
+VISIBILITY_TIMEOUT = float(os.getenv("RESEARCH_JOB_VISIBILITY_TIMEOUT", "600"))  # Seconds a claim stays valid
+MAX_ATTEMPTS = int(os.getenv("RESEARCH_JOB_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF = 30.0  # Seconds before the first retry; doubles per attempt
+RELEASE_DELAY = float(os.getenv("RESEARCH_JOB_RELEASE_DELAY", "15"))  # Seconds before a job turned away by admission control is offered again
+
+class ResearchJob(BaseModel):
+    """A queued (company, role) research request and its progress"""
+    id: str
+    company: str
+    role: str
+    status: str = "queued"  # queued | running | done | dead
+    attempts: int = 0
+    max_attempts: int = MAX_ATTEMPTS
+    available_at: float = 0.0  # Epoch seconds before which the job is not handed out
+    lease_owner: Optional[str] = None
+    lease_expires: float = 0.0
+    error: Optional[str] = None
+    result: Optional[ResearchState] = None
+    created_at: float = 0.0
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff before the next attempt."""
+    return RETRY_BACKOFF * 2 ** max(0, attempts - 1)
+
+class JobQueue(ABC):
+    """Backend interface: every method must be safe to call from several processes at once."""
+
+    @abstractmethod
+    def enqueue(self, company: str, role: str, max_attempts: int = MAX_ATTEMPTS) -> str:
+        """Add a job and return its id."""
+
+    @abstractmethod
+    def claim(self, worker: str, visibility_timeout: float = VISIBILITY_TIMEOUT) -> Optional[ResearchJob]:
+        """Lease the next available job to a worker, or return None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker: str, visibility_timeout: float = VISIBILITY_TIMEOUT) -> bool:
+        """Extend a lease; False if the worker no longer holds it."""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker: str, result: ResearchState) -> None:
+        """Mark a leased job done and store its result."""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker: str, error: str) -> str:
+        """Record a failed attempt; returns the new status (queued for retry, or dead)."""
+
+    @abstractmethod
+    def release(self, job_id: str, worker: str, delay: float = RELEASE_DELAY) -> str:
+        """Give a leased job back without counting the attempt; returns queued (or lost)."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        """Load a job by id."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Job counts by status."""
+
+class SQLiteJobQueue(JobQueue):
+    """Queue in a local SQLite file; claims are atomic across processes via BEGIN IMMEDIATE"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: SQLite file path; defaults to RESEARCH_QUEUE_PATH or <RESEARCH_DATA_DIR>/jobs.db
+        """
+        self.path = path or os.getenv("RESEARCH_QUEUE_PATH") or os.path.join(DATA_DIR, "jobs.db")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS research_jobs (
+                    id TEXT PRIMARY KEY,
+                    company TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    result JSON,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS research_jobs_ready ON research_jobs (status, available_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit mode so each method controls its own (immediate) transaction
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")  # Take the write lock up front: no two claims interleave
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, company: str, role: str, max_attempts: int = MAX_ATTEMPTS) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO research_jobs (id, company, role, status, max_attempts, available_at, created_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, company, role, max_attempts, now, now)
+            )
+        return job_id
+
+    def claim(self, worker: str, visibility_timeout: float = VISIBILITY_TIMEOUT) -> Optional[ResearchJob]:
+        now = time.time()
+        with self._transaction() as conn:
+            # Leases that ran out belong to crashed or stuck workers: requeue or dead-letter them
+            conn.execute(
+                "UPDATE research_jobs SET status = 'dead', lease_owner = NULL, "
+                "error = COALESCE(error, 'visibility timeout expired') "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now,)
+            )
+            conn.execute(
+                "UPDATE research_jobs SET status = 'queued', lease_owner = NULL "
+                "WHERE status = 'running' AND lease_expires < ?",
+                (now,)
+            )
+            row = conn.execute(
+                "SELECT id FROM research_jobs WHERE status = 'queued' AND available_at <= ? "
+                "ORDER BY available_at, created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE research_jobs SET status = 'running', attempts = attempts + 1, "
+                "lease_owner = ?, lease_expires = ? WHERE id = ?",
+                (worker, now + visibility_timeout, row[0])
+            )
+            return self._load(conn, row[0])
+
+    def heartbeat(self, job_id: str, worker: str, visibility_timeout: float = VISIBILITY_TIMEOUT) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE research_jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + visibility_timeout, job_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker: str, result: ResearchState) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE research_jobs SET status = 'done', lease_owner = NULL, error = NULL, result = ? "
+                "WHERE id = ? AND lease_owner = ?",
+                (result.model_dump_json(), job_id, worker)
+            )
+
+    def fail(self, job_id: str, worker: str, error: str) -> str:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM research_jobs WHERE id = ? AND lease_owner = ?",
+                (job_id, worker)
+            ).fetchone()
+            if row is None:
+                return "lost"  # Lease expired and the job was handed to another worker
+            attempts, max_attempts = row
+            status = "dead" if attempts >= max_attempts else "queued"
+            conn.execute(
+                "UPDATE research_jobs SET status = ?, lease_owner = NULL, error = ?, available_at = ? WHERE id = ?",
+                (status, error[:2000], time.time() + retry_delay(attempts), job_id)
+            )
+            return status
+
+    def release(self, job_id: str, worker: str, delay: float = RELEASE_DELAY) -> str:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE research_jobs SET status = 'queued', attempts = MAX(0, attempts - 1), lease_owner = NULL, "
+                "available_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + delay, job_id, worker)
+            )
+            return "queued" if cursor.rowcount == 1 else "lost"
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        with self._connect() as conn:
+            return self._load(conn, job_id)
+
+    @staticmethod
+    def _load(conn: sqlite3.Connection, job_id: str) -> Optional[ResearchJob]:
+        row = conn.execute(
+            "SELECT id, company, role, status, attempts, max_attempts, available_at, lease_owner, "
+            "lease_expires, error, result, created_at FROM research_jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "company", "role", "status", "attempts", "max_attempts", "available_at",
+                "lease_owner", "lease_expires", "error", "result", "created_at")
+        values = dict(zip(keys, row))
+        values["result"] = ResearchState.model_validate_json(values["result"]) if values["result"] else None
+        return ResearchJob(**values)
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM research_jobs GROUP BY status").fetchall())
+
+class RedisJobQueue(JobQueue):
+    """
+    Queue on a Redis-compatible server, for workers on several machines.
+
+    Keys (under a prefix): a hash per job, a list of ready job ids, a sorted set of delayed
+    retries by due time and a sorted set of leases by expiry. Lease checks and state changes
+    run as Lua scripts so they are atomic on the server. Every key a script touches is passed
+    in KEYS except the job hashes the claim script reaches by id, which it only learns from
+    the ready list: use a single Redis server (replicas are fine), not Redis Cluster.
+    """
+
+    # KEYS: leases, delayed, ready, dead; ARGV: now, timeout, worker, job key prefix
+    _CLAIM = """
+    local now, timeout, worker, jobs = tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[3], ARGV[4]
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)) do
+        redis.call('ZREM', KEYS[1], id)
+        local job = jobs .. id
+        if tonumber(redis.call('HGET', job, 'attempts')) >= tonumber(redis.call('HGET', job, 'max_attempts')) then
+            redis.call('HSET', job, 'status', 'dead', 'lease_owner', '', 'error', 'visibility timeout expired')
+            redis.call('RPUSH', KEYS[4], id)
+        else
+            redis.call('HSET', job, 'status', 'queued', 'lease_owner', '')
+            redis.call('RPUSH', KEYS[3], id)
+        end
+    end
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+        redis.call('ZREM', KEYS[2], id)
+        redis.call('RPUSH', KEYS[3], id)
+    end
+    local id = redis.call('LPOP', KEYS[3])
+    if not id then return false end
+    local job = jobs .. id
+    redis.call('HINCRBY', job, 'attempts', 1)
+    redis.call('HSET', job, 'status', 'running', 'lease_owner', worker, 'lease_expires', now + timeout)
+    redis.call('ZADD', KEYS[1], now + timeout, id)
+    return id
+    """
+
+    # The scripts below take the job hash as KEYS[1] and the worker as ARGV[1]
+    _OWNED = "redis.call('HGET', KEYS[1], 'lease_owner') == ARGV[1]"
+
+    # KEYS: job, leases; ARGV: worker, id, lease expiry
+    _HEARTBEAT = f"""
+    if not ({_OWNED}) then return 0 end
+    redis.call('HSET', KEYS[1], 'lease_expires', ARGV[3])
+    redis.call('ZADD', KEYS[2], ARGV[3], ARGV[2])
+    return 1
+    """
+
+    # KEYS: job, leases, delayed, dead; ARGV: worker, id, status (done or retry), field, available_at, value
+    _FINISH = f"""
+    if not ({_OWNED}) then return 'lost' end
+    local id = ARGV[2]
+    redis.call('ZREM', KEYS[2], id)
+    local status = ARGV[3]
+    if status == 'retry' then
+        if tonumber(redis.call('HGET', KEYS[1], 'attempts')) >= tonumber(redis.call('HGET', KEYS[1], 'max_attempts')) then
+            status = 'dead'
+            redis.call('RPUSH', KEYS[4], id)
+        else
+            status = 'queued'
+            redis.call('HSET', KEYS[1], 'available_at', ARGV[5])
+            redis.call('ZADD', KEYS[3], ARGV[5], id)
+        end
+    end
+    redis.call('HSET', KEYS[1], 'status', status, 'lease_owner', '', ARGV[4], ARGV[6])
+    return status
+    """
+
+    # KEYS: job, leases, delayed; ARGV: worker, id, available_at
+    _RELEASE = f"""
+    if not ({_OWNED}) then return 'lost' end
+    redis.call('ZREM', KEYS[2], ARGV[2])
+    local attempts = tonumber(redis.call('HGET', KEYS[1], 'attempts'))
+    redis.call('HSET', KEYS[1], 'status', 'queued', 'lease_owner', '', 'attempts', math.max(0, attempts - 1),
+               'available_at', ARGV[3])
+    redis.call('ZADD', KEYS[3], ARGV[3], ARGV[2])
+    return 'queued'
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "research:jobs", client: Any = None):
+        """
+        Args:
+            url: Redis URL; defaults to RESEARCH_QUEUE_URL
+            prefix: Key prefix, so several queues can share a server
+            client: Existing redis.Redis client (with decode_responses=True) to use instead of url
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("RedisJobQueue requires the redis package: pip install redis") from e
+            client = redis.Redis.from_url(url or os.environ["RESEARCH_QUEUE_URL"], decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self._claim = self.client.register_script(self._CLAIM)
+        self._heartbeat = self.client.register_script(self._HEARTBEAT)
+        self._finish = self.client.register_script(self._FINISH)
+        self._release = self.client.register_script(self._RELEASE)
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def enqueue(self, company: str, role: str, max_attempts: int = MAX_ATTEMPTS) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.hset(self._job_key(job_id), mapping={
+            "id": job_id, "company": company, "role": role, "status": "queued", "attempts": 0,
+            "max_attempts": max_attempts, "available_at": now, "lease_owner": "", "lease_expires": 0,
+            "created_at": now,
+        })
+        pipe.rpush(f"{self.prefix}:ready", job_id)
+        pipe.execute()
+        return job_id
+
+    def claim(self, worker: str, visibility_timeout: float = VISIBILITY_TIMEOUT) -> Optional[ResearchJob]:
+        keys = [f"{self.prefix}:{name}" for name in ("leases", "delayed", "ready", "dead")]
+        job_id = self._claim(keys=keys, args=[time.time(), visibility_timeout, worker, self._job_key("")])
+        return self.get(job_id) if job_id else None
+
+    def heartbeat(self, job_id: str, worker: str, visibility_timeout: float = VISIBILITY_TIMEOUT) -> bool:
+        return bool(self._heartbeat(keys=[self._job_key(job_id), f"{self.prefix}:leases"],
+                                    args=[worker, job_id, time.time() + visibility_timeout]))
+
+    def _finish_keys(self, job_id: str) -> List[str]:
+        return [self._job_key(job_id), f"{self.prefix}:leases", f"{self.prefix}:delayed", f"{self.prefix}:dead"]
+
+    def complete(self, job_id: str, worker: str, result: ResearchState) -> None:
+        self._finish(keys=self._finish_keys(job_id), args=[worker, job_id, "done", "result", 0, result.model_dump_json()])
+
+    def fail(self, job_id: str, worker: str, error: str) -> str:
+        job = self.get(job_id)
+        delay = retry_delay(job.attempts if job else 1)
+        return self._finish(keys=self._finish_keys(job_id),
+                            args=[worker, job_id, "retry", "error", time.time() + delay, error[:2000]])
+
+    def release(self, job_id: str, worker: str, delay: float = RELEASE_DELAY) -> str:
+        return self._release(keys=self._finish_keys(job_id)[:3], args=[worker, job_id, time.time() + delay])
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        values: Dict[str, Any] = self.client.hgetall(self._job_key(job_id))
+        if not values:
+            return None
+        values["lease_owner"] = values.get("lease_owner") or None
+        values["result"] = ResearchState.model_validate_json(values["result"]) if values.get("result") else None
+        return ResearchJob(**values)
+
+    def stats(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for key in self.client.scan_iter(f"{self.prefix}:job:*"):
+            status = self.client.hget(key, "status")
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+def open_queue(url: Optional[str] = None) -> JobQueue:
+    """Queue backend for a URL: redis:// or rediss:// for Redis, otherwise a SQLite file path."""
+    url = url or os.getenv("RESEARCH_QUEUE_URL", "")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobQueue(url)
+    return SQLiteJobQueue(url.removeprefix("sqlite:///") or None)
+
+class ResearchWorker:
+    """Pulls jobs from a queue, runs the workflow and reports results until stopped"""
+
+    def __init__(self, queue: JobQueue, workflow: Any,
+                 visibility_timeout: float = VISIBILITY_TIMEOUT, poll_interval: float = 2.0):
+        """
+        Args:
+            queue: Job queue backend
+            workflow: Object with run(company, role) -> ResearchState (a Workflow)
+            visibility_timeout: Lease length; renewed in the background while a job runs
+            poll_interval: Seconds to sleep when the queue is empty
+        """
+        self.queue = queue
+        self.workflow = workflow
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> Optional[ResearchJob]:
+        """Claim and process one job; returns it, or None if the queue had nothing ready."""
+        job = self.queue.claim(self.worker_id, self.visibility_timeout)
+        if job is None:
+            return None
+        print(f"🛠️ [{self.worker_id}] Job {job.id[:8]}: {job.role} at {job.company} (attempt {job.attempts}/{job.max_attempts})")
+
+        done = threading.Event()
+        def keep_leased():
+            # Renew the lease well before it expires so long runs are not handed to another worker
+            while not done.wait(self.visibility_timeout / 3):
+                if not self.queue.heartbeat(job.id, self.worker_id, self.visibility_timeout):
+                    print(f"⚠️ [{self.worker_id}] Lost the lease on job {job.id[:8]}")
+                    return
+        heartbeat = threading.Thread(target=keep_leased, daemon=True)
+        heartbeat.start()
+        try:
+            result = self.workflow.run(job.company, job.role, priority="batch")
+            if result.errors:
+                error = "; ".join(result.errors)
+                status = self.queue.fail(job.id, self.worker_id, f"Incomplete research: {error}")
+                print(f"❌ [{self.worker_id}] Job {job.id[:8]} incomplete ({error[:200]}); {status}")
+            else:
+                self.queue.complete(job.id, self.worker_id, result)
+                print(f"✅ [{self.worker_id}] Job {job.id[:8]} done")
+        except AdmissionRejected as e:
+            # Backpressure, not a failure: offer the job again later without using up an attempt
+            status = self.queue.release(job.id, self.worker_id, RELEASE_DELAY)
+            print(f"🚦 [{self.worker_id}] Job {job.id[:8]} not admitted ({e.status}); {status} again in {RELEASE_DELAY:g}s")
+        except Exception as e:
+            status = self.queue.fail(job.id, self.worker_id, f"{type(e).__name__}: {e}")
+            print(f"❌ [{self.worker_id}] Job {job.id[:8]} failed ({str(e)[:200]}); {status}")
+        finally:
+            done.set()
+            heartbeat.join()
+        return self.queue.get(job.id)
+
+    def run_forever(self, max_jobs: Optional[int] = None) -> int:
+        """Process jobs until stopped (or max_jobs processed); returns the number processed."""
+        processed = 0
+        while not self._stop.is_set() and (max_jobs is None or processed < max_jobs):
+            if self.run_once() is None:
+                self._stop.wait(self.poll_interval)
+            else:
+                processed += 1
+        return processed
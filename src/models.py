@@ -1,19 +1,22 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+import operator
+from typing import Annotated, List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+
+# Field descriptions double as the LLM output schema (see schemas.py)
 
 class CompanyBackground(BaseModel):
     """Company background information relevant to interview preparation"""
-    company_size: str  # e.g., "500-1000 employees"
-    industry: str
-    company_culture: str
-    values: List[str] = []
-    recent_news: List[str] = []
+    company_size: str = Field(description="Estimated number of employees (e.g., '1-10', '11-50', '51-200', '201-500', '501-1000', '1001-5000', '5001-10000', '10001+')")
+    industry: str = Field(description="Primary industry or industries the company operates in")
+    company_culture: str = Field(description="A brief description of the company culture (1-2 sentences)")
+    values: List[str] = Field(default=[], description="core values")
+    recent_news: List[str] = Field(default=[], description="recent news or developments")
 
 class InterviewProcess(BaseModel):
     """Structured information about a company's interview process"""
-    typical_stages: List[str] = []  # e.g., ["Phone Screen", "Technical Interview", "System Design", "Behavioral"]
-    duration: str  # e.g., "2-4 weeks"
-    common_questions: List[str] = []
+    typical_stages: List[str] = Field(default=[], description="interview stages in order, e.g. 'Phone Screen'")
+    duration: str = Field(description="Estimated duration from first contact to offer (e.g., '2-4 weeks')")
+    common_questions: List[str] = Field(default=[], description="commonly asked questions")
     technical_assessment: bool = False
     system_design: bool = False
     behavioral_focus: bool = False
@@ -22,11 +25,79 @@ class InterviewProcess(BaseModel):
 
 class PreparationGuide(BaseModel):
     """Actionable preparation guide for candidates"""
-    technical_topics: List[str] = []
-    behavioral_topics: List[str] = []
-    resources: List[str] = []  # URLs to study resources
-    strategy: str = ""  # Preparation strategy summary
-    common_pitfalls: List[str] = []
+    technical_topics: List[str] = Field(default=[], description="technical topics to study, most important first")
+    behavioral_topics: List[str] = Field(default=[], description="behavioral areas and stories to prepare")
+    resources: List[str] = Field(default=[], description="study resources: books, courses, practice platforms or URLs")
+    strategy: str = Field(default="", description="Preparation strategy summary with a short timeline")
+    common_pitfalls: List[str] = Field(default=[], description="mistakes candidates commonly make in this process")
+
+class ResearchBundle(BaseModel):
+    """Background, interview process and guide produced together by a single fused LLM call"""
+    background: CompanyBackground
+    interview_process: InterviewProcess
+    preparation_guide: PreparationGuide
+
+class SourceRecord(BaseModel):
+    """Provenance of a scraped source consumed by a research node"""
+    url: str
+    node: str  # Graph node that used the source, e.g. "research_company"
+    title: str = ""
+    content_hash: str = ""  # sha256 of the content excerpt passed to the LLM
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: str = ""  # ISO timestamp
+    max_chars: Optional[int] = None  # Excerpt limit the source was scraped with; refresh re-scrapes with the same
+    site: bool = False  # Crawled company-site page: refreshed through the crawler, not re-scraped
+
+def merge_sources(left: List[SourceRecord], right: List[SourceRecord]) -> List[SourceRecord]:
+    """Reducer: each node reports its full source set, replacing its previous records"""
+    nodes = {record.node for record in right}
+    return [record for record in left if record.node not in nodes] + list(right)
+
+class NodeUsage(BaseModel):
+    """Model, latency and token usage of one LLM call made by a graph node"""
+    node: str
+    model: str
+    latency_s: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    escalated: bool = False  # True when retried on the strong model after failed validation
+
+class NodeProfile(BaseModel):
+    """Time, memory and hottest functions of one profiled node"""
+    node: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    allocated_kb: float = 0.0  # Net memory allocated while the node ran (tracemalloc)
+    peak_kb: float = 0.0
+    top_functions: List[str] = []  # "file:line(function) cumulative seconds", hottest first
+
+class RunProfile(BaseModel):
+    """Summary of a profiled run; the full reports are written to the listed files"""
+    wall_s: float = 0.0
+    nodes: List[NodeProfile] = []
+    files: Dict[str, str] = {}  # Report kind -> path, e.g. "collapsed" -> flamegraph input
+
+MAX_CONTENT_REFS = 6  # Upper bound on evidence chunks carried per content field
+
+class ContentRef(BaseModel):
+    """Compact reference to a deduplicated source excerpt held in the chunk store"""
+    chunk_id: str  # content hash of the excerpt, same as SourceRecord.content_hash
+    node: str  # Graph node that produced the reference
+    url: str = ""
+    chars: int = 0
+
+def merge_content(left: List[ContentRef], right: List[ContentRef]) -> List[ContentRef]:
+    """Reducer: replace the updating node's references, drop duplicate chunks and keep the newest MAX_CONTENT_REFS"""
+    nodes = {ref.node for ref in right}
+    merged = []
+    seen = set()
+    for ref in [ref for ref in left if ref.node not in nodes] + list(right):
+        if ref.chunk_id in seen:
+            continue
+        seen.add(ref.chunk_id)
+        merged.append(ref)
+    return merged[-MAX_CONTENT_REFS:]
 
 class ResearchState(BaseModel):
     """State container for interview research workflow"""
@@ -35,4 +106,18 @@ class ResearchState(BaseModel):
     background: Optional[CompanyBackground] = None
     interview_process: Optional[InterviewProcess] = None
     preparation_guide: Optional[PreparationGuide] = None
-    search_results: List[Dict[str, Any]] = []  # Raw search data
\ No newline at end of file
+    search_results: List[Dict[str, Any]] = []  # Raw search data
+    sources: Annotated[List[SourceRecord], merge_sources] = []
+    # Scraped evidence for the guide, as references into the chunk store rather than full text
+    research_content: Annotated[List[ContentRef], merge_content] = []
+    interview_research_content: Annotated[List[ContentRef], merge_content] = []
+    usage: Annotated[List[NodeUsage], operator.add] = []  # LLM calls made during the run
+    process_reused_from: Optional[str] = None  # Role whose stored interview process was reused, if any
+    # Steps that fell back to placeholder output ("research_company: no sources found"); results with errors are not stored
+    errors: Annotated[List[str], operator.add] = []
+    profile: Optional[RunProfile] = None  # Set by run(..., profile=True); not persisted
+    force: bool = Field(default=False, exclude=True)  # Set by run(..., force=True): research from scratch; not persisted
+
+    def source_urls(self, node: str) -> List[str]:
+        """URLs of the sources a given node used"""
+        return [record.url for record in self.sources if record.node == node]
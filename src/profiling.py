@@ -0,0 +1,219 @@
+"""
+Per-node profiling for research runs: cProfile stats, sampled stacks and tracemalloc snapshots.
+
+A profiled run writes, under RESEARCH_PROFILE_DIR (default <RESEARCH_DATA_DIR>/profiles):
+
+    <name>.prof         cProfile stats of every node (open with pstats or snakeviz)
+    <name>.txt          hottest functions per node by cumulative time
+    <name>.collapsed    sampled wall-clock stacks, one "frame;frame;... count" line each
+                        (flamegraph.pl, speedscope and inferno read this format)
+    <name>.alloc.txt    top allocation sites per node
+
+Stacks are sampled from every thread, so time spent in scrape workers, rate-limit sleeps and
+waits on the LLM shows up under the node that was running.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import NodeProfile, RunProfile
+from .store import DATA_DIR
+
+PROFILE_DIR = os.getenv("RESEARCH_PROFILE_DIR") or os.path.join(DATA_DIR, "profiles")
+SAMPLE_INTERVAL = float(os.getenv("RESEARCH_PROFILE_INTERVAL_MS", "5")) / 1000
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 15
+# Leaf frames of pool threads parked waiting for work; samples ending there are idle, not node time
+IDLE_FRAMES = {("threading.py", "wait"), ("queue.py", "get"), ("thread.py", "_worker")}
+
+# tracemalloc is process-wide: started by the first profiled run, stopped when the last one ends
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_tracing_started = False  # False when the application was already tracing; it is then left running
+
+def _start_tracing() -> None:
+    global _tracing_runs, _tracing_started
+    with _tracing_lock:
+        if _tracing_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_runs += 1
+
+def _stop_tracing() -> None:
+    global _tracing_runs, _tracing_started
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class RunProfiler:
+    """Profiles one run; use as a context manager and wrap each node in node()"""
+
+    def __init__(self, name: str, directory: Optional[str] = None, interval: float = SAMPLE_INTERVAL):
+        """
+        Args:
+            name: Report file name stem, e.g. the research key of the run
+            directory: Output directory (RESEARCH_PROFILE_DIR)
+            interval: Seconds between stack samples
+        """
+        stem = re.sub(r"[^\w\-]+", "_", name).strip("_") or "run"
+        self.directory = directory or PROFILE_DIR
+        self.stem = f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}"
+        self.interval = interval
+        self.nodes: List[NodeProfile] = []
+        self._stats: Dict[str, cProfile.Profile] = {}
+        self._snapshots: Dict[str, Tuple[tracemalloc.Snapshot, tracemalloc.Snapshot]] = {}  # Compared in write()
+        self._stacks: Dict[str, int] = {}
+        self._active: Dict[int, str] = {}  # Thread id -> node it is running
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.wall_s = 0.0
+
+    def __enter__(self) -> "RunProfiler":
+        self._started = time.perf_counter()
+        _start_tracing()
+        self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.wall_s = time.perf_counter() - self._started
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        _stop_tracing()
+
+    def _sample(self) -> None:
+        """Record the stack of every busy thread, attributed to the node currently running."""
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = dict(self._active)
+            current = next(reversed(active.values()), "run") if active else "run"
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in active and (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                root = active.get(ident, current)
+                key = ";".join([root, names.get(ident, str(ident)), *reversed(stack)])
+                self._stacks[key] = self._stacks.get(key, 0) + 1
+
+    @contextmanager
+    def node(self, name: str) -> Iterator[None]:
+        """Profile a node: CPU profile, wall and CPU time, and the memory it allocated."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._active[ident] = name
+        # Snapshot first so the profiler's own work stays out of the node's CPU profile and peak
+        before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        tracemalloc.reset_peak()
+        start_size = tracemalloc.get_traced_memory()[0]
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Only one cProfile can run at a time; nested or concurrent nodes get timings only
+            profile = None
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            if profile is not None:
+                profile.disable()
+            size, peak = tracemalloc.get_traced_memory()
+            with self._lock:
+                self._active.pop(ident, None)
+            if before is not None:
+                self._snapshots[name] = (before, tracemalloc.take_snapshot())
+            top_functions: List[str] = []
+            if profile is not None:
+                self._stats[name] = profile
+                top_functions = self._top_functions(profile, 5)
+            self.nodes.append(NodeProfile(
+                node=name,
+                wall_s=round(wall, 4),
+                cpu_s=round(cpu, 4),
+                allocated_kb=round((size - start_size) / 1024, 1),
+                peak_kb=round((peak - start_size) / 1024, 1),
+                top_functions=top_functions,
+            ))
+
+    @staticmethod
+    def _top_functions(profile: cProfile.Profile, limit: int) -> List[str]:
+        """Hottest functions by cumulative time, excluding the profiler's own frames."""
+        stats = pstats.Stats(profile).stats
+        ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+        top = []
+        for (filename, line, function), (_, _, _, cumulative, _) in ranked:
+            if filename == __file__ or function.startswith("<method 'disable'"):
+                continue
+            top.append(f"{os.path.basename(filename)}:{line}({function}) {cumulative:.3f}s")
+            if len(top) == limit:
+                break
+        return top
+
+    def write(self) -> RunProfile:
+        """Write the reports and return the run summary."""
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, self.stem)
+        files = {}
+
+        if self._stats:
+            combined = pstats.Stats(*self._stats.values())
+            combined.dump_stats(f"{base}.prof")
+            files["pstats"] = f"{base}.prof"
+            with open(f"{base}.txt", "w", encoding="utf-8") as f:
+                for name, profile in self._stats.items():
+                    stream = io.StringIO()
+                    pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+                    f.write(f"===== {name} =====\n{stream.getvalue()}\n")
+            files["functions"] = f"{base}.txt"
+
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{stack} {count}\n")
+        files["collapsed"] = f"{base}.collapsed"
+
+        # The profiler's own snapshots are excluded from the allocation diffs
+        own = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        with open(f"{base}.alloc.txt", "w", encoding="utf-8") as f:
+            for name, (before, after) in self._snapshots.items():
+                diffs = after.filter_traces(own).compare_to(before.filter_traces(own), "lineno")
+                f.write(f"===== {name} =====\n")
+                for diff in diffs[:TOP_ALLOCATIONS]:
+                    f.write(f"{diff}\n")
+                f.write("\n")
+        files["allocations"] = f"{base}.alloc.txt"
+
+        return RunProfile(wall_s=round(self.wall_s, 4), nodes=self.nodes, files=files)
+
+def format_profile(profile: RunProfile) -> str:
+    """Per-node time and memory table plus report locations, for printing after a run."""
+    lines = [f"  {'node':<18} {'wall s':>8} {'cpu s':>8} {'alloc KB':>10} {'peak KB':>10}"]
+    for node in profile.nodes:
+        lines.append(f"  {node.node:<18} {node.wall_s:>8.2f} {node.cpu_s:>8.2f} {node.allocated_kb:>10.1f} {node.peak_kb:>10.1f}")
+        lines.extend(f"      {function}" for function in node.top_functions[:3])
+    lines.append(f"  total wall time: {profile.wall_s:.2f}s")
+    lines.extend(f"  {kind}: {path}" for kind, path in profile.files.items())
+    return "\n".join(lines)
@@ -1,195 +1,336 @@
-from typing import Dict, Any, List, Optional, Union
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from string import Formatter
 import json
+import textwrap
+import threading
+from .models import CompanyBackground, InterviewProcess, PreparationGuide, ResearchBundle
+from .schemas import prompt_schema
+
+def minify(text: str) -> str:
+    """Dedent a prompt, strip trailing whitespace and collapse runs of blank lines."""
+    lines = [line.rstrip() for line in textwrap.dedent(text).strip().splitlines()]
+    compact: List[str] = []
+    for line in lines:
+        if line or (compact and compact[-1]):
+            compact.append(line)
+    return "\n".join(compact)
+
+def compact_json(data: Any) -> str:
+    """JSON without indentation or spaces after separators (fewer input tokens)."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) for statistics on the request path."""
+    return (len(text) + 3) // 4
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when its encoding is available, else estimate ~4 chars per token."""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            try:
+                import tiktoken
+                _encoder = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                _encoder = False  # Offline or not installed; don't retry on every call
+    if _encoder:
+        return len(_encoder.encode(text))
+    return estimate_tokens(text)
+
+class PromptTemplate:
+    """
+    A prompt split into a static system message and a variable user message.
+
+    Everything that is the same on every call (role, instructions, output schema) lives in the
+    system message so the prompt prefix is identical across runs and hits the provider's prompt
+    cache; the user message holds only per-call values. Both parts are minified, and the user
+    template is parsed once at construction instead of on every render.
+    """
+
+    def __init__(self, name: str, system: str, user: str):
+        self.name = name
+        self.system = minify(system)
+        self._segments: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(minify(user))
+        ]
+        self.fields = [field for _, field in self._segments if field]
+        self._static_tokens: Optional[int] = None
+        self._lock = threading.Lock()  # Templates are rendered concurrently (guide sections)
+        self.renders = 0
+        self._last_user_tokens = 0
+
+    @property
+    def static_tokens(self) -> int:
+        """Tokens in the static, cacheable part (counted on first use, not at import)."""
+        if self._static_tokens is None:
+            self._static_tokens = count_tokens(self.system)
+        return self._static_tokens
+
+    @property
+    def last_tokens(self) -> int:
+        """Tokens of the last render: the counted static part plus the estimated user part."""
+        return self.static_tokens + self._last_user_tokens if self.renders else 0
+
+    def render_user(self, **values: Any) -> str:
+        """Fill the user template; values are inserted verbatim (no format specs)."""
+        missing = [field for field in self.fields if field not in values]
+        if missing:
+            raise KeyError(f"Missing values for prompt '{self.name}': {', '.join(missing)}")
+        user = "".join(literal + (str(values[field]) if field else "") for literal, field in self._segments)
+        # Estimated, not tokenized: the user part is large and this runs on every request
+        user_tokens = estimate_tokens(user)
+        with self._lock:
+            self.renders += 1
+            self._last_user_tokens = user_tokens
+        return user
+
+class PromptRegistry:
+    """Named, precompiled prompt templates with per-template token statistics"""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, name: str, system: str, user: str) -> PromptTemplate:
+        template = PromptTemplate(name, system, user)
+        self._templates[name] = template
+        return template
+
+    def __getitem__(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def __iter__(self):
+        return iter(self._templates.values())
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Static (cacheable) tokens, last rendered total tokens and render count per template."""
+        return {
+            t.name: {"static_tokens": t.static_tokens, "last_rendered_tokens": t.last_tokens, "renders": t.renders}
+            for t in self
+        }
+
+    def report(self) -> str:
+        return "\n".join(
+            f"  • {name}: {s['last_rendered_tokens']} tokens last render "
+            f"({s['static_tokens']} static) | {s['renders']} renders"
+            for name, s in self.stats().items()
+        )
+
+
+# ===== TEMPLATES =====
+# Compiled once at import; static instructions and schemas first, variable content last.
+registry = PromptRegistry()
+
+# Guide-writing rules shared by the full guide, guide section and fused prompts
+GUIDE_INSTRUCTIONS = """
+        1. Prioritize technical topics based on the company's interview stages and assessments
+        2. Cover behavioral preparation if behavioral interviews are part of the process
+        3. Suggest concrete resources (e.g., books, online courses, practice platforms)
+        4. Summarize the overall strategy, including a short preparation timeline
+        5. Call out pitfalls specific to this company's process"""
+
+# Shared by the full guide and the sectioned guide prompts
+GUIDE_CONTEXT = """
+        Create a detailed preparation guide for a {role} position at {company}.
+
+        ===== COMPANY BACKGROUND =====
+        {background}
+
+        ===== INTERVIEW PROCESS =====
+        {process}
+
+        ===== RESEARCH CONTENT =====
+        {company_research}
+
+        ===== INTERVIEW RESEARCH =====
+        {interview_research}
+    """
+
+registry.register(
+    "company_research",
+    system=f"""
+        You are an expert researcher specializing in company research for job candidates.
+        Extract and structure key information about the company from the provided research content.
+        Be precise and only include information that can be clearly inferred from the content.
+        If information is not available, use 'Unknown' rather than making assumptions.
+
+        Respond only with a valid JSON object with these exact field names:
+        {prompt_schema(CompanyBackground)}
+    """,
+    user="""
+        Company: {company}
+
+        ===== RESEARCH CONTENT =====
+        {research_content}
+        ===== END OF CONTENT =====
+    """,
+)
+
+registry.register(
+    "interview_process",
+    system=f"""
+        You are an expert in analyzing technical interview processes.
+        Extract and structure key information about the interview process from the provided research content.
+        Be precise and only include information that can be clearly inferred from the content.
+        If information is not available, use null rather than making assumptions.
+
+        Respond only with a valid JSON object with these exact field names (null if a field cannot be determined):
+        {prompt_schema(InterviewProcess)}
+    """,
+    user="""
+        Company: {company}
+        Role: {role}
+
+        ===== RESEARCH CONTENT =====
+        {research_content}
+        ===== END OF CONTENT =====
+    """,
+)
+
+registry.register(
+    "prep_guide",
+    system=f"""
+        You are an expert career coach and technical interviewer.
+        Create a comprehensive, actionable preparation guide for a candidate based on the provided
+        company and interview process information. Provide specific, practical advice that would
+        help a candidate succeed in their interview process.
+
+        INSTRUCTIONS:{GUIDE_INSTRUCTIONS}
+
+        Respond only with a valid JSON object with these exact field names:
+        {prompt_schema(PreparationGuide)}
+    """,
+    user=GUIDE_CONTEXT,
+)
+
+registry.register(
+    "guide_section",
+    system=f"""
+        You are an expert career coach and technical interviewer.
+        You are writing one section of a preparation guide for a candidate based on the provided
+        company and interview process information. Provide specific, practical advice that would
+        help a candidate succeed in their interview process.
+
+        INSTRUCTIONS:{GUIDE_INSTRUCTIONS}
+
+        Write only the section you are asked for and respond only with a valid JSON object
+        containing exactly the requested field names.
+    """,
+    # Same context as the full guide; the requested section follows as a separate message
+    user=GUIDE_CONTEXT,
+)
+
+registry.register(
+    "fused_research",
+    system=f"""
+        You are an expert company researcher, technical interviewer and career coach.
+        From the provided research content, extract the company background and the interview
+        process, then write an actionable preparation guide for the candidate based on both.
+        Only include background and process details that can be clearly inferred from the content;
+        use 'Unknown' for text and false for flags that cannot be determined.
+
+        GUIDE INSTRUCTIONS:{GUIDE_INSTRUCTIONS}
+
+        Respond only with a valid JSON object with these exact field names:
+        {prompt_schema(ResearchBundle)}
+    """,
+    user="""
+        Company: {company}
+        Role: {role}
+
+        ===== COMPANY RESEARCH =====
+        {company_research}
+
+        ===== INTERVIEW RESEARCH =====
+        {interview_research}
+    """,
+)
+
 
 class InterviewResearchPrompts:
     """Collection of prompts for researching company interview processes"""
 
+    registry = registry
+
     # ===== COMPANY RESEARCH PROMPTS =====
     @staticmethod
     def get_company_research_system_prompt() -> str:
-        return """You are an expert researcher specializing in company research for job candidates. 
-        Extract and structure key information about the company from the provided research content.
-        Be precise and only include information that can be clearly inferred from the content.
-        If information is not available, use 'Unknown' rather than making assumptions."""
+        return registry["company_research"].system
 
     @staticmethod
     def get_company_research_user_prompt(company: str, research_content: str) -> str:
-        return f"""Analyze the following research content about {company} and extract the requested information:
-        
-        ===== RESEARCH CONTENT =====
-        {research_content}
-        ===== END OF CONTENT =====
-        
-        Extract the following information as a JSON object with these exact field names:
-        {{
-            "company_size": "Estimated number of employees (e.g., '1-10', '11-50', '51-200', '201-500', '501-1000', '1001-5000', '5001-10000', '10001+')",
-            "industry": "Primary industry or industries the company operates in",
-            "company_culture": "A brief description of the company culture (1-2 sentences)",
-            "values": ["List", "of", "core", "values"],
-            "recent_news": ["List", "of", "recent", "news", "or", "developments"]
-        }}
-        
-        Only respond with the JSON object, nothing else. Ensure the response is valid JSON."""
+        return registry["company_research"].render_user(company=company, research_content=research_content)
 
     # ===== INTERVIEW PROCESS PROMPTS =====
     @staticmethod
     def get_interview_process_system_prompt() -> str:
-        return """You are an expert in analyzing technical interview processes. 
-        Extract and structure key information about the interview process from the provided research content.
-        Be precise and only include information that can be clearly inferred from the content.
-        If information is not available, use null rather than making assumptions."""
+        return registry["interview_process"].system
 
     @staticmethod
     def get_interview_process_user_prompt(company: str, role: str, research_content: str) -> str:
-        return f"""Analyze the following research content about the interview process for {role} at {company} and extract the requested information:
-        
-        ===== RESEARCH CONTENT =====
-        {research_content}
-        ===== END OF CONTENT =====
-        
-        Extract the following information as a JSON object with these exact field names:
-        {{
-            "typical_stages": ["List", "of", "typical", "interview", "stages"],
-            "duration": "Estimated duration from first contact to offer (e.g., '2-4 weeks')",
-            "common_questions": ["List", "of", "commonly", "asked", "questions"],
-            "technical_assessment": true/false,
-            "system_design": true/false,
-            "behavioral_focus": true/false,
-            "coding_challenges": true/false,
-            "take_home_projects": true/false,
-            "difficulty_level": "Easy/Moderate/Difficult"
-        }}
-        
-        Only respond with the JSON object, nothing else. Ensure the response is valid JSON.
-        If a field cannot be determined, use null for that field."""
+        return registry["interview_process"].render_user(company=company, role=role, research_content=research_content)
 
     # ===== PREPARATION GUIDE PROMPTS =====
     @staticmethod
     def get_prep_guide_system_prompt() -> str:
-        return """You are an expert career coach and technical interviewer. 
-        Create a comprehensive, actionable preparation guide for a candidate based on the provided 
-        company and interview process information. Provide specific, practical advice that would 
-        help a candidate succeed in their interview process."""
+        return registry["prep_guide"].system
 
     @staticmethod
-    def get_prep_guide_user_prompt(company: str, role: str, background: Dict[str, Any], process: Dict[str, Any]) -> str:
-        background_str = json.dumps(background, indent=2, ensure_ascii=False)
-        process_str = json.dumps(process, indent=2, ensure_ascii=False)
-        
-        return f"""Create a detailed preparation guide for a {role} position at {company}.
-        
-        COMPANY BACKGROUND:
-        {background_str}
-        
-        INTERVIEW PROCESS:
-        {process_str}
-        
-        INSTRUCTIONS:
-        1. Create a structured guide with clear sections and actionable steps
-        2. Include specific preparation strategies based on the company's interview process
-        3. Provide technical study recommendations if technical assessments are mentioned
-        4. Include behavioral preparation tips if behavioral interviews are part of the process
-        5. Suggest resources for further study (e.g., books, online courses, practice platforms)
-        6. Include general interview tips and best practices
-        
-        FORMAT YOUR RESPONSE AS A JSON OBJECT with these fields:
-        {{
-            "overview": "Brief overview of the preparation strategy",
-            "timeline": {{
-                "1_week_before": ["List", "of", "actions"],
-                "3_days_before": ["List", "of", "actions"],
-                "day_before": ["List", "of", "actions"],
-                "interview_day": ["List", "of", "actions"]
-            }},
-            "technical_preparation": {{
-                "topics_to_study": ["List", "of", "topics"],
-                "practice_resources": ["List", "of", "resources"],
-                "project_ideas": ["List", "of", "project", "ideas"]
-            }},
-            "behavioral_preparation": {{
-                "common_questions": ["List", "of", "questions"],
-                "star_method_tips": "Tips for using the STAR method",
-                "company_specific_tips": "Specific advice for this company"
-            }},
-            "additional_tips": ["List", "of", "additional", "tips"]
-        }}
-        
-        Only respond with the JSON object, nothing else. Ensure the response is valid JSON."""
-
-    # ===== LEGACY PROMPTS (for backward compatibility) =====
-    # These will be gradually phased out
-    BACKGROUND_SYSTEM = property(get_company_research_system_prompt)
-    PROCESS_SYSTEM = property(get_interview_process_system_prompt)
-    PREP_SYSTEM = property(get_prep_guide_system_prompt)
-    
+    def get_prep_guide_user_prompt(company: str, role: str, background: Dict[str, Any],
+                                   process: Dict[str, Any], company_research: str = "",
+                                   interview_research: str = "") -> str:
+        """Generate a user prompt for creating a preparation guide."""
+        return registry["prep_guide"].render_user(
+            company=company,
+            role=role,
+            background=compact_json(background),
+            process=compact_json(process),
+            company_research=company_research or "No company research available.",
+            interview_research=interview_research or "No interview research available."
+        )
+
+    # ===== SECTIONED GUIDE PROMPTS =====
     @staticmethod
-    def background_user(company: str) -> str:
-        return InterviewResearchPrompts.get_company_research_user_prompt(company, "")
-    
-    # ===== PREPARATION GUIDE PROMPTS =====
+    def get_guide_section_system_prompt() -> str:
+        return registry["guide_section"].system
+
     @staticmethod
-    def get_prep_guide_system_prompt() -> str:
-        return """You are an expert career coach and technical interviewer. 
-        Create a comprehensive, actionable preparation guide for a candidate based on the provided 
-        company and interview process information. Provide specific, practical advice that would 
-        help a candidate succeed in their interview process."""
+    def get_guide_context_prompt(company: str, role: str, background: Dict[str, Any],
+                                 process: Dict[str, Any], company_research: str = "",
+                                 interview_research: str = "") -> str:
+        """Shared context message sent with every guide section request."""
+        return registry["guide_section"].render_user(
+            company=company,
+            role=role,
+            background=compact_json(background),
+            process=compact_json(process),
+            company_research=company_research or "No company research available.",
+            interview_research=interview_research or "No interview research available."
+        )
 
     @staticmethod
-    def get_prep_guide_user_prompt(company: str, role: str, background: Dict[str, Any], 
-                                 process: Dict[str, Any], company_research: str, 
-                                 interview_research: str) -> str:
-        """Generate a user prompt for creating a preparation guide."""
-        return f"""Create a detailed preparation guide for a {role} position at {company}.
-        
-        ===== COMPANY BACKGROUND =====
-        {json.dumps(background, indent=2, ensure_ascii=False)}
-        
-        ===== INTERVIEW PROCESS =====
-        {json.dumps(process, indent=2, ensure_ascii=False)}
-        
-        ===== RESEARCH CONTENT =====
-        {company_research}
-        
-        ===== INTERVIEW RESEARCH =====
-        {interview_research}
-        
-        INSTRUCTIONS:
-        1. Create a structured guide with clear sections and actionable steps
-        2. Include specific preparation strategies based on the company's interview process
-        3. Provide technical study recommendations if technical assessments are mentioned
-        4. Include behavioral preparation tips if behavioral interviews are part of the process
-        5. Suggest resources for further study (e.g., books, online courses, practice platforms)
-        6. Include general interview tips and best practices
-        
-        FORMAT YOUR RESPONSE AS A JSON OBJECT with these fields:
-        {{
-            "overview": "Brief overview of the preparation strategy",
-            "timeline": {{
-                "1_week_before": ["Task 1", "Task 2"],
-                "3_days_before": ["Task 1", "Task 2"],
-                "day_before": ["Task 1", "Task 2"]
-            }},
-            "technical_preparation": {{
-                "topics_to_study": ["List", "of", "topics"],
-                "practice_resources": ["List", "of", "resources"],
-                "project_ideas": ["List", "of", "project", "ideas"]
-            }},
-            "behavioral_preparation": {{
-                "common_questions": ["List", "of", "questions"],
-                "star_method_tips": "Tips for using the STAR method",
-                "company_specific_tips": "Specific advice for this company"
-            }},
-            "additional_tips": ["List", "of", "additional", "tips"]
-        }}
-        
-        Only respond with the JSON object, nothing else. Ensure the response is valid JSON."""
-
-    # Helper methods for backward compatibility
+    def get_guide_section_prompt(fields: Tuple[str, ...]) -> str:
+        """Section request naming the guide fields to write, with their schema."""
+        return (
+            f"Write only these guide fields: {', '.join(fields)}.\n"
+            f"Respond only with a valid JSON object with these exact field names:\n"
+            f"{prompt_schema(PreparationGuide, fields)}"
+        )
+
+    # ===== FUSED RESEARCH PROMPTS =====
     @staticmethod
-    def process_user(company: str, role: str) -> str:
-        return InterviewResearchPrompts.get_interview_process_user_prompt(company, role, "")
-    
+    def get_fused_research_system_prompt() -> str:
+        return registry["fused_research"].system
+
     @staticmethod
-    def prep_user(company: str, role: str, background: Dict[str, Any], process: Dict[str, Any]) -> str:
-        return InterviewResearchPrompts.get_prep_guide_user_prompt(company, role, background, process)
\ No newline at end of file
+    def get_fused_research_user_prompt(company: str, role: str, company_research: str,
+                                       interview_research: str) -> str:
+        """Generate a user prompt for one-call background, process and guide extraction."""
+        return registry["fused_research"].render_user(
+            company=company,
+            role=role,
+            company_research=company_research or "No company research available.",
+            interview_research=interview_research or "No interview research available."
+        )
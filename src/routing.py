@@ -0,0 +1,127 @@
+"""
+Per-node model routing: cheap models for field extraction, a strong model for the guide,
+with automatic escalation when a cheap model's output fails validation.
+"""
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_openai import ChatOpenAI
+from pydantic import ValidationError
+from .models import NodeUsage
+
+T = TypeVar("T")
+
+# Output that fails these checks is re-requested from the strong model
+VALIDATION_ERRORS = (json.JSONDecodeError, ValidationError, ValueError, KeyError, TypeError)
+
+def default_routes() -> Dict[str, str]:
+    """Node -> model mapping, overridable through environment variables"""
+    extraction_model = os.getenv("RESEARCH_EXTRACTION_MODEL", "gpt-4o-mini")
+    return {
+        "research_company": extraction_model,
+        "research_process": extraction_model,
+        "generate_guide": os.getenv("RESEARCH_GUIDE_MODEL", "gpt-4o"),
+        # Fused mode writes the guide too, so it gets the guide model
+        "research_fused": os.getenv("RESEARCH_GUIDE_MODEL", "gpt-4o"),
+    }
+
+class ModelRouter:
+    """Chooses the chat model for each graph node and records per-call usage"""
+
+    def __init__(self,
+                 routes: Optional[Dict[str, str]] = None,
+                 strong_model: Optional[str] = None,
+                 model_factory: Optional[Callable[[str], Any]] = None):
+        """
+        Args:
+            routes: Node name -> model name; nodes not listed use the strong model
+            strong_model: Model used for escalation; defaults to RESEARCH_STRONG_MODEL or gpt-4o
+            model_factory: Builds a chat model from a model name (defaults to ChatOpenAI)
+        """
+        self.routes = routes or default_routes()
+        self.strong_model = strong_model or os.getenv("RESEARCH_STRONG_MODEL", "gpt-4o")
+        # Used for every node when the budget governor asks for the cheapest option
+        self.economy_model = os.getenv("RESEARCH_ECONOMY_MODEL", "gpt-4o-mini")
+        self.model_factory = model_factory or (lambda name: ChatOpenAI(model=name, temperature=0.1))
+        self._models: Dict[str, Any] = {}
+
+    def model_name(self, node: str) -> str:
+        return self.routes.get(node, self.strong_model)
+
+    def get_model(self, name: str) -> Any:
+        """Return a cached chat model instance for a model name."""
+        if name not in self._models:
+            self._models[name] = self.model_factory(name)
+        return self._models[name]
+
+    def invoke(self,
+               node: str,
+               messages: List[BaseMessage],
+               parse: Callable[[str], T],
+               config: Optional[RunnableConfig] = None,
+               max_tokens: Optional[int] = None,
+               economy: bool = False) -> Tuple[T, List[NodeUsage]]:
+        """
+        Call the node's model and validate its output, escalating once to the strong model.
+
+        Args:
+            node: Graph node making the call
+            messages: Prompt messages
+            parse: Turns the response text into the node's result; raises on invalid output
+            config: Runnable config for tracing
+            max_tokens: Cap on completion tokens for each call
+            economy: Use the economy model only, without escalation
+
+        Returns:
+            The parsed result and the usage of every call made
+
+        Raises:
+            The last validation error if the strong model's output is invalid too
+        """
+        usage: List[NodeUsage] = []
+        model_names = [self.economy_model if economy else self.model_name(node)]
+        if model_names[0] != self.strong_model and not economy:
+            model_names.append(self.strong_model)
+
+        for attempt, model_name in enumerate(model_names):
+            started = time.perf_counter()
+            model = self.get_model(model_name)
+            if max_tokens:
+                model = model.bind(max_tokens=max_tokens)
+            response = model.invoke(messages, config=config)
+            usage.append(self._usage(node, model_name, response, time.perf_counter() - started, escalated=attempt > 0))
+            try:
+                return parse(response.content), usage
+            except VALIDATION_ERRORS as e:
+                if attempt == len(model_names) - 1:
+                    e.usage = usage  # Keep the spend visible to callers that handle the failure
+                    raise
+                print(f"  ⬆️ {model_name} output for {node} failed validation ({str(e)[:100]}); escalating to {self.strong_model}")
+
+    @staticmethod
+    def _usage(node: str, model_name: str, response: Any, latency: float, escalated: bool) -> NodeUsage:
+        metadata = getattr(response, "usage_metadata", None) or {}
+        return NodeUsage(
+            node=node,
+            model=model_name,
+            latency_s=round(latency, 3),
+            input_tokens=metadata.get("input_tokens", 0),
+            output_tokens=metadata.get("output_tokens", 0),
+            escalated=escalated
+        )
+
+def format_usage(usage: List[NodeUsage]) -> str:
+    """One line per LLM call plus a total, for CLI output."""
+    lines = [
+        f"  • {u.node}: {u.model}{' (escalated)' if u.escalated else ''} | "
+        f"{u.latency_s:.1f}s | {u.input_tokens} in / {u.output_tokens} out tokens"
+        for u in usage
+    ]
+    lines.append(
+        f"  Total: {sum(u.latency_s for u in usage):.1f}s LLM time | "
+        f"{sum(u.input_tokens for u in usage)} in / {sum(u.output_tokens for u in usage)} out tokens"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,164 @@
+"""
+Polite, fair scheduling of page scrapes across concurrent research jobs.
+
+The per-domain state (in-flight requests, last request start) lives in this process only.
+When several worker processes or hosts scrape at once, set RESEARCH_PROCESSES to their total:
+each process then takes its share of the per-domain limits (concurrency divided, spacing
+multiplied), so together they stay within the limits the table below is meant to enforce.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from .domains import domain_of
+
+PROCESSES = max(1, int(os.getenv("RESEARCH_PROCESSES", "1")))  # Processes scraping concurrently, across hosts
+EVICT_EVERY = 60.0  # Seconds between sweeps that forget idle domains
+
+# Stricter limits for sites that block aggressive clients; everything else uses the defaults
+DOMAIN_LIMITS: Dict[str, Tuple[int, float]] = {
+    "glassdoor.com": (1, 5.0),
+    "linkedin.com": (1, 5.0),
+    "levels.fyi": (1, 3.0),
+    "indeed.com": (1, 3.0),
+}
+
+class _Task:
+    __slots__ = ("domain", "fn", "future")
+
+    def __init__(self, domain: str, fn: Callable[[], Any]):
+        self.domain = domain
+        self.fn = fn
+        self.future: Future = Future()
+
+class ScrapeScheduler:
+    """
+    Runs scrape calls on a small worker pool with per-domain politeness and fair queuing.
+
+    - At most `concurrency` requests are in flight per domain, and consecutive requests to a
+      domain start at least `spacing` seconds apart (DOMAIN_LIMITS overrides both per domain).
+    - Each research job has its own queue and workers serve jobs round-robin, so a large batch
+      cannot starve an interactive query queued behind it.
+    - A job's tasks for a throttled domain don't hold up its tasks for other domains.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 concurrency: Optional[int] = None,
+                 spacing: Optional[float] = None,
+                 limits: Optional[Dict[str, Tuple[int, float]]] = None,
+                 processes: Optional[int] = None):
+        """
+        Args:
+            max_workers: Scrapes running at once overall (RESEARCH_SCRAPE_WORKERS, default 4)
+            concurrency: Default in-flight cap per domain (RESEARCH_DOMAIN_CONCURRENCY, default 2)
+            spacing: Default seconds between request starts per domain (RESEARCH_DOMAIN_SPACING, default 1)
+            limits: Per-domain (concurrency, spacing) overrides; defaults to DOMAIN_LIMITS
+            processes: Processes sharing the limits (RESEARCH_PROCESSES); this one takes its share
+        """
+        self.max_workers = max_workers or int(os.getenv("RESEARCH_SCRAPE_WORKERS", "4"))
+        self.concurrency = concurrency or int(os.getenv("RESEARCH_DOMAIN_CONCURRENCY", "2"))
+        self.spacing = float(os.getenv("RESEARCH_DOMAIN_SPACING", "1.0")) if spacing is None else spacing
+        self.limits = DOMAIN_LIMITS if limits is None else limits
+        self.processes = max(1, processes or PROCESSES)
+        self._jobs: "OrderedDict[str, Deque[_Task]]" = OrderedDict()  # Rotation order = service order
+        self._in_flight: Dict[str, int] = {}
+        self._last_start: Dict[str, float] = {}
+        self._evicted_at = time.monotonic()
+        self._condition = threading.Condition()
+        self._workers = []
+
+    def _limits(self, domain: str) -> Tuple[int, float]:
+        """This process's (concurrency, spacing) for a domain."""
+        concurrency, spacing = self.concurrency, self.spacing
+        for suffix, limit in self.limits.items():
+            if domain == suffix or domain.endswith("." + suffix):
+                concurrency, spacing = limit
+                break
+        return max(1, concurrency // self.processes), spacing * self.processes
+
+    def _evict_idle(self, now: float) -> None:
+        """Forget domains with nothing in flight whose spacing has passed (caller holds the lock)."""
+        self._evicted_at = now
+        for domain, started in list(self._last_start.items()):
+            if not self._in_flight.get(domain) and now - started >= self._limits(domain)[1]:
+                del self._last_start[domain]
+                self._in_flight.pop(domain, None)
+
+    def submit(self, job: str, url: str, fn: Callable[[], Any]) -> Future:
+        """
+        Queue a scrape of a URL for a job.
+
+        Args:
+            job: Research job the request belongs to (used for fair queuing)
+            url: URL being fetched (its domain decides the politeness limits)
+            fn: Callable doing the actual request
+
+        Returns:
+            Future with fn's result or exception
+        """
+        task = _Task(domain_of(url), fn)
+        with self._condition:
+            self._jobs.setdefault(job, deque()).append(task)
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"scrape-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify()
+        return task.future
+
+    def _next_task(self, now: float) -> Tuple[Optional[_Task], Optional[float]]:
+        """Pick the next runnable task round-robin across jobs, or how long until one may run."""
+        wait = None
+        for job in list(self._jobs):
+            queue = self._jobs[job]
+            for task in queue:
+                concurrency, spacing = self._limits(task.domain)
+                if self._in_flight.get(task.domain, 0) >= concurrency:
+                    continue
+                ready_at = self._last_start.get(task.domain, 0.0) + spacing
+                if ready_at > now:
+                    wait = ready_at - now if wait is None else min(wait, ready_at - now)
+                    continue
+                queue.remove(task)
+                # Served jobs go to the back of the rotation
+                self._jobs.move_to_end(job)
+                if not queue:
+                    del self._jobs[job]
+                return task, None
+        return None, wait
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    task, wait = self._next_task(time.monotonic())
+                    if task is not None:
+                        break
+                    self._condition.wait(timeout=wait)
+                self._in_flight[task.domain] = self._in_flight.get(task.domain, 0) + 1
+                self._last_start[task.domain] = time.monotonic()
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        task.future.set_result(task.fn())
+                    except BaseException as e:
+                        task.future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._in_flight[task.domain] -= 1
+                    now = time.monotonic()
+                    if now - self._evicted_at >= EVICT_EVERY:
+                        self._evict_idle(now)
+                    self._condition.notify_all()
+
+    def pending(self) -> int:
+        """Queued tasks that have not started yet."""
+        with self._condition:
+            return sum(len(queue) for queue in self._jobs.values())
+
+
+# Shared across workflows so limits hold for every job in the process
+scrape_scheduler = ScrapeScheduler()
@@ -0,0 +1,103 @@
+"""
+Prompt schemas and response parsers derived from the Pydantic models in models.py.
+
+Prompts describe exactly the fields the models declare, and responses are validated straight
+into those models, so the JSON the LLM is asked for is always JSON the workflow can use.
+"""
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+def _placeholder(annotation: Any, description: Optional[str]) -> str:
+    """Compact example value for a field: descriptions for strings, true/false for flags."""
+    origin = get_origin(annotation)
+    if origin is Union:
+        # Optional[X] -> X
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+        return _placeholder(annotation, description)
+    if origin in (list, List):
+        (item,) = get_args(annotation) or (str,)
+        return f"[{_placeholder(item, description)}]"
+    if annotation is bool:
+        return "true/false"
+    if annotation in (int, float):
+        return "number"
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return prompt_schema(annotation)
+    return json.dumps(description or "string", ensure_ascii=False)
+
+@lru_cache(maxsize=None)
+def prompt_schema(model: Type[BaseModel], fields: Optional[Tuple[str, ...]] = None) -> str:
+    """
+    Render a model as a one-line JSON-like schema for prompts.
+
+    Args:
+        model: Model to describe
+        fields: Only describe these fields, in this order (default: all fields)
+
+    Example:
+        {"industry":"Primary industry ...","values":["core values"],"system_design":true/false}
+    """
+    names = fields or tuple(model.model_fields)
+    fields = ",".join(
+        f'"{name}":{_placeholder(model.model_fields[name].annotation, model.model_fields[name].description)}'
+        for name in names
+    )
+    return "{" + fields + "}"
+
+def extract_json(text: str) -> Any:
+    """
+    Parse the JSON object in an LLM response, tolerating ```json fences and surrounding prose.
+
+    Raises:
+        json.JSONDecodeError: with the original response as .doc when no valid JSON is found
+    """
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        try:
+            return json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            raise e from None
+
+def parse_model(model: Type[M], text: str, defaults: Optional[Dict[str, Any]] = None) -> M:
+    """
+    Parse an LLM response into a model instance.
+
+    Unknown keys and nulls are dropped so field defaults apply; required string fields that are
+    missing become "Unknown".
+
+    Args:
+        model: Target Pydantic model
+        text: Raw LLM response content
+        defaults: Values used for fields the response leaves out
+
+    Raises:
+        json.JSONDecodeError: response contains no JSON object
+        pydantic.ValidationError: JSON does not fit the model
+    """
+    return validate_model(model, extract_json(text), defaults)
+
+def validate_model(model: Type[M], data: Any, defaults: Optional[Dict[str, Any]] = None) -> M:
+    """
+    Validate already-decoded JSON into a model with the same leniency as parse_model.
+
+    Raises:
+        ValueError: data is not a JSON object
+        pydantic.ValidationError: data does not fit the model
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object for {model.__name__}, got {type(data).__name__}")
+    values = dict(defaults or {})
+    values.update({key: value for key, value in data.items() if value is not None and key in model.model_fields})
+    for name, field in model.model_fields.items():
+        if name not in values and field.is_required() and field.annotation is str:
+            values[name] = "Unknown"
+    return model.model_validate(values)
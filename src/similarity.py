@@ -0,0 +1,116 @@
+"""
+Offline role similarity: character n-gram TF-IDF vectors compared by cosine similarity.
+
+Used to recognise role variants ("SWE II", "Software Developer", "Backend Engineer") at the same
+company so a stored interview process can be reused. NumPy is used when installed; a pure
+Python path gives the same scores without it.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: pip install numpy (or the "similarity" extra)
+    np = None
+
+# Word-level rewrites that fold abbreviations and synonyms into one role family
+ROLE_SYNONYMS: Dict[str, str] = {
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "sdet": "software engineer in test",
+    "programmer": "software engineer",
+    "developer": "engineer",
+    "dev": "engineer",
+    "eng": "engineer",
+    "engr": "engineer",
+    "backend": "software",
+    "back-end": "software",
+    "frontend": "software",
+    "front-end": "software",
+    "fullstack": "software",
+    "full-stack": "software",
+    "sr": "senior",
+    "snr": "senior",
+    "jr": "junior",
+    "ml": "machine learning",
+    "mle": "machine learning engineer",
+    "ai": "machine learning",
+    "sre": "site reliability engineer",
+    "pm": "product manager",
+    "tpm": "technical program manager",
+    "em": "engineering manager",
+    "ds": "data scientist",
+}
+# Numeric levels don't change the interview loop much; seniority words (senior, staff) are kept
+LEVEL_PATTERN = re.compile(r"^(i{1,3}|iv|v|l?\d+|e\d+|ic\d+)$")
+NGRAM_SIZES = (3, 4)
+
+def normalize_role(role: str) -> str:
+    """Lowercase, expand abbreviations and synonyms, and drop level suffixes: "Sr. SWE II" -> "senior software engineer"."""
+    words = []
+    for word in re.sub(r"[^\w\s\-]", " ", role.lower()).split():
+        if LEVEL_PATTERN.match(word):
+            continue
+        words.extend(ROLE_SYNONYMS.get(word, word).split())
+    # "software software engineer" after folding "backend software engineer"
+    deduped = [word for i, word in enumerate(words) if i == 0 or word != words[i - 1]]
+    return " ".join(deduped)
+
+def char_ngrams(text: str) -> Counter:
+    """Character n-gram counts of a text, with word boundaries marked."""
+    counts: Counter = Counter()
+    for word in text.split():
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            counts.update(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+    return counts
+
+def _tfidf(documents: Sequence[Counter]) -> Tuple[List[str], List[Dict[str, float]]]:
+    """Sublinear TF-IDF weights (smoothed IDF) for n-gram count documents."""
+    df: Counter = Counter()
+    for counts in documents:
+        df.update(counts.keys())
+    total = len(documents)
+    idf = {gram: math.log((1 + total) / (1 + freq)) + 1 for gram, freq in df.items()}
+    weights = [{gram: (1 + math.log(count)) * idf[gram] for gram, count in counts.items()} for counts in documents]
+    return sorted(idf), weights
+
+def similarities(query: str, candidates: Sequence[str]) -> List[float]:
+    """
+    Cosine similarity between a role and each candidate role, after normalize_role.
+
+    IDF is computed over the query and candidates, so n-grams every role shares (e.g. "engineer"
+    at an engineering-heavy company) count for less than the distinguishing ones.
+    """
+    if not candidates:
+        return []
+    documents = [char_ngrams(normalize_role(text)) for text in [query, *candidates]]
+    vocabulary, weights = _tfidf(documents)
+    if np is not None:
+        column = {gram: i for i, gram in enumerate(vocabulary)}
+        matrix = np.zeros((len(weights), len(vocabulary)))
+        for row, document in enumerate(weights):
+            for gram, weight in document.items():
+                matrix[row, column[gram]] = weight
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        matrix /= norms[:, None]
+        return (matrix[1:] @ matrix[0]).tolist()
+    query_weights = weights[0]
+    query_norm = math.sqrt(sum(w * w for w in query_weights.values())) or 1.0
+    scores = []
+    for document in weights[1:]:
+        norm = math.sqrt(sum(w * w for w in document.values())) or 1.0
+        dot = sum(weight * query_weights.get(gram, 0.0) for gram, weight in document.items())
+        scores.append(dot / (norm * query_norm))
+    return scores
+
+def most_similar(query: str, candidates: Sequence[str]) -> Optional[Tuple[int, float]]:
+    """Index and similarity of the closest candidate role, or None without candidates."""
+    scores = similarities(query, candidates)
+    if not scores:
+        return None
+    best = max(range(len(scores)), key=scores.__getitem__)
+    return best, scores[best]
@@ -0,0 +1,242 @@
+"""
+Local SQLite store for persisted research results and the source excerpts they were built from.
+"""
+import hashlib
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import ResearchState, SourceRecord
+
+DATA_DIR = os.getenv("RESEARCH_DATA_DIR", ".research_data")
+
+# (record, content excerpt) pairs as gathered by a research node
+SourceDocument = Tuple[SourceRecord, str]
+
+def content_hash(content: str) -> str:
+    """Stable hash of a content excerpt, used to detect changed sources."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def company_key(company: str) -> str:
+    """Normalize a company name for lookups."""
+    return " ".join(company.lower().split())
+
+def research_key(company: str, role: str) -> str:
+    """Normalize a (company, role) pair into a lookup key."""
+    return f"{company_key(company)}|{' '.join(role.lower().split())}"
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+class ResultStore:
+    """Persists every ResearchState with its sources so repeat queries are served locally"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open (and create if needed) the results database.
+
+        Args:
+            path: SQLite file path; defaults to RESEARCH_STORE_PATH or <RESEARCH_DATA_DIR>/results.db
+        """
+        self.path = path or os.getenv("RESEARCH_STORE_PATH") or os.path.join(DATA_DIR, "results.db")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS research_results (
+                    key TEXT PRIMARY KEY,
+                    company TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    state JSON NOT NULL,
+                    created_at TEXT NOT NULL,
+                    refreshed_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS research_sources (
+                    key TEXT NOT NULL,
+                    node TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    record JSON NOT NULL,
+                    content TEXT NOT NULL,
+                    PRIMARY KEY (key, node, url)
+                );
+                CREATE TABLE IF NOT EXISTS query_log (
+                    company TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    queried_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS query_log_time ON query_log (queried_at);
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation keeps the store safe to share across threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, company: str, role: str, max_age: Optional[float] = None) -> Optional[ResearchState]:
+        """
+        Load a stored result.
+
+        Args:
+            company: Company name
+            role: Job role
+            max_age: Only return results refreshed within this many seconds
+
+        Returns:
+            The stored ResearchState, or None if missing or too old
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state, refreshed_at FROM research_results WHERE key = ?",
+                (research_key(company, role),)
+            ).fetchone()
+        if not row:
+            return None
+        if max_age is not None and self.age(row[1]) > max_age:
+            return None
+        return ResearchState.model_validate_json(row[0])
+
+    def roles(self, company: str, max_age: Optional[float] = None) -> List[Tuple[str, ResearchState]]:
+        """
+        Stored results for every role researched at a company.
+
+        Args:
+            company: Company name
+            max_age: Only include results refreshed within this many seconds
+        """
+        prefix = f"{company_key(company)}|"
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT role, state, refreshed_at FROM research_results WHERE substr(key, 1, ?) = ?",
+                (len(prefix), prefix)
+            ).fetchall()
+        return [
+            (role, ResearchState.model_validate_json(state))
+            for role, state, refreshed_at in rows
+            if max_age is None or self.age(refreshed_at) <= max_age
+        ]
+
+    def iter_results(self, batch_size: int = 1000,
+                     since: Optional[float] = None) -> Iterator[List[Tuple[ResearchState, str]]]:
+        """
+        Stream every stored result in batches, ordered by key.
+
+        Args:
+            batch_size: Results per batch (one short query each, so writers can interleave)
+            since: Only include results refreshed within this many seconds
+
+        Yields:
+            Lists of (state, refreshed_at) pairs
+        """
+        last_key = ""
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT key, state, refreshed_at FROM research_results WHERE key > ? ORDER BY key LIMIT ?",
+                    (last_key, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_key = rows[-1][0]
+            batch = [
+                (ResearchState.model_validate_json(state), refreshed_at)
+                for _, state, refreshed_at in rows
+                if since is None or self.age(refreshed_at) <= since
+            ]
+            if batch:
+                yield batch
+
+    def refreshed_at(self, company: str, role: str) -> Optional[str]:
+        """Timestamp of the last full run or refresh for a (company, role) pair."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT refreshed_at FROM research_results WHERE key = ?",
+                (research_key(company, role),)
+            ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def age(timestamp: str) -> float:
+        """Seconds elapsed since an ISO timestamp."""
+        return (datetime.now(timezone.utc) - datetime.fromisoformat(timestamp)).total_seconds()
+
+    def save(self, state: ResearchState) -> None:
+        """Insert or replace the result for the state's (company, role) pair."""
+        now = utc_now()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO research_results (key, company, role, state, created_at, refreshed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET state = excluded.state, refreshed_at = excluded.refreshed_at
+                """,
+                (research_key(state.company, state.role), state.company, state.role,
+                 state.model_dump_json(), now, now)
+            )
+
+    def save_documents(self, company: str, role: str, node: str, documents: List[SourceDocument]) -> None:
+        """Replace the source excerpts a node used for a (company, role) pair."""
+        key = research_key(company, role)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM research_sources WHERE key = ? AND node = ?", (key, node))
+            conn.executemany(
+                "INSERT OR REPLACE INTO research_sources (key, node, url, record, content) VALUES (?, ?, ?, ?, ?)",
+                [(key, node, record.url, record.model_dump_json(), content) for record, content in documents]
+            )
+
+    def get_documents(self, company: str, role: str) -> Dict[str, List[SourceDocument]]:
+        """Load stored source excerpts grouped by node."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT node, record, content FROM research_sources WHERE key = ? ORDER BY rowid",
+                (research_key(company, role),)
+            ).fetchall()
+        documents: Dict[str, List[SourceDocument]] = {}
+        for node, record, content in rows:
+            documents.setdefault(node, []).append((SourceRecord.model_validate_json(record), content))
+        return documents
+
+    def log_query(self, company: str, role: str) -> None:
+        """Record an interactive query; the cache warmer ranks companies and roles by these."""
+        with self._connect() as conn:
+            conn.execute("INSERT INTO query_log (company, role, queried_at) VALUES (?, ?, ?)",
+                         (company, role, utc_now()))
+
+    def popular(self, since: float, limit: Optional[int] = None) -> List[Tuple[str, str, int]]:
+        """
+        Most queried (company, role) pairs.
+
+        Args:
+            since: Only count queries from the last this many seconds (older ones are pruned)
+            limit: Maximum number of pairs to return
+
+        Returns:
+            (company, role, query count) tuples, most queried first
+        """
+        cutoff = datetime.fromtimestamp(datetime.now(timezone.utc).timestamp() - since, timezone.utc).isoformat()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM query_log WHERE queried_at < ?", (cutoff,))
+            return conn.execute(
+                """
+                SELECT MIN(company), MIN(role), COUNT(*) AS queries FROM query_log
+                GROUP BY lower(company), lower(role)
+                ORDER BY queries DESC, MAX(queried_at) DESC
+                LIMIT ?
+                """,
+                (-1 if limit is None else limit,)
+            ).fetchall()
+
+    def delete(self, company: str, role: str) -> None:
+        """Remove a stored result and its sources."""
+        key = research_key(company, role)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM research_results WHERE key = ?", (key,))
+            conn.execute("DELETE FROM research_sources WHERE key = ?", (key,))
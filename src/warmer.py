@@ -0,0 +1,179 @@
+"""
+Background cache warmer: keeps stored research for high-demand companies and roles fresh.
+
+Targets come from a ranked list or are learned from the query log. Each target is refreshed at
+a fixed, per-target fraction of the result TTL, so stored results expire spread out over time
+instead of all at once, and interactive queries for them are served from the store.
+"""
+import hashlib
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .store import research_key
+
+WARM_LIST = os.getenv("RESEARCH_WARM_LIST", "")  # Ranked list file; empty = learn from the query log
+WARM_TOP = int(os.getenv("RESEARCH_WARM_TOP", "200"))  # (company, role) targets kept warm
+WARM_ROLES_PER_COMPANY = int(os.getenv("RESEARCH_WARM_ROLES_PER_COMPANY", "3"))
+WARM_DEFAULT_ROLES = [role.strip() for role in os.getenv("RESEARCH_WARM_DEFAULT_ROLES", "Software Engineer").split(",") if role.strip()]
+WARM_LOOKBACK = float(os.getenv("RESEARCH_WARM_LOOKBACK_DAYS", "14")) * 86400  # Query log window
+WARM_MAX_REQUESTS = int(os.getenv("RESEARCH_WARM_MAX_REQUESTS", "100"))  # Firecrawl requests per cycle
+WARM_HOURS = os.getenv("RESEARCH_WARM_HOURS", "1-6")  # Off-peak local hours, "start-end" (end exclusive)
+WARM_INTERVAL = float(os.getenv("RESEARCH_WARM_INTERVAL", "900"))  # Seconds between cycles
+# Targets are refreshed once they reach this fraction of the TTL, spread by a hash of the key
+STAGGER_RANGE = (0.5, 0.9)
+
+class WarmTarget(NamedTuple):
+    company: str
+    role: str
+    demand: int  # Queries in the lookback window (0 for list entries never queried)
+
+def parse_hours(hours: str) -> Tuple[int, int]:
+    """Parse an off-peak window such as "1-6" or "22-5" (wrapping past midnight)."""
+    start, _, end = hours.partition("-")
+    return int(start) % 24, int(end or start) % 24
+
+def in_window(hour: int, window: Tuple[int, int]) -> bool:
+    """Whether a local hour falls in a start-end window; equal bounds mean all day."""
+    start, end = window
+    if start == end:
+        return True
+    return start <= hour < end if start < end else hour >= start or hour < end
+
+def read_ranked_list(path: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Read a ranked target list: one "Company" or "Company, Role" per line, most important first.
+
+    Blank lines and lines starting with # are ignored.
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            company, _, role = line.partition(",")
+            entries.append((company.strip(), role.strip() or None))
+    return entries
+
+class CacheWarmer:
+    """Refreshes stored research for popular targets within a per-cycle request budget"""
+
+    def __init__(self, workflow, ranked_list: Optional[str] = None, max_requests: Optional[int] = None,
+                 hours: Optional[str] = None, top: Optional[int] = None):
+        """
+        Args:
+            workflow: Workflow whose store, budget and research nodes are used
+            ranked_list: Ranked list file (RESEARCH_WARM_LIST); learned from the query log when empty
+            max_requests: Firecrawl searches plus scrapes allowed per cycle (RESEARCH_WARM_MAX_REQUESTS)
+            hours: Off-peak local hours to run in (RESEARCH_WARM_HOURS, e.g. "1-6")
+            top: Number of (company, role) targets to keep warm (RESEARCH_WARM_TOP)
+        """
+        self.workflow = workflow
+        self.ranked_list = WARM_LIST if ranked_list is None else ranked_list
+        self.max_requests = WARM_MAX_REQUESTS if max_requests is None else max_requests
+        self.window = parse_hours(WARM_HOURS if hours is None else hours)
+        self.top = WARM_TOP if top is None else top
+
+    def targets(self) -> List[WarmTarget]:
+        """Ranked (company, role) targets, from the list file or the query log."""
+        store = self.workflow.store
+        popular = store.popular(WARM_LOOKBACK)
+        if not self.ranked_list:
+            roles: Dict[str, int] = {}
+            targets = []
+            for company, role, demand in popular:
+                company = self.workflow.companies.resolve(company)
+                if roles.get(company.lower(), 0) >= WARM_ROLES_PER_COMPANY:
+                    continue
+                roles[company.lower()] = roles.get(company.lower(), 0) + 1
+                targets.append(WarmTarget(company, role, demand))
+            return self._unique(targets)
+
+        demand = {research_key(company, role): count for company, role, count in popular}
+        targets = []
+        for company, role in read_ranked_list(self.ranked_list):
+            company = self.workflow.companies.resolve(company)
+            if role:
+                targets.append(WarmTarget(company, role, demand.get(research_key(company, role), 0)))
+                continue
+            # Company-only entries: its most queried roles, else roles stored before, else the defaults
+            roles = [r for c, r, _ in popular if c.lower() == company.lower()]
+            roles = roles or [r for r, _ in store.roles(company)] or WARM_DEFAULT_ROLES
+            targets.extend(
+                WarmTarget(company, r, demand.get(research_key(company, r), 0))
+                for r in roles[:WARM_ROLES_PER_COMPANY]
+            )
+        return self._unique(targets)
+
+    def _unique(self, targets: List[WarmTarget]) -> List[WarmTarget]:
+        seen = set()
+        unique = []
+        for target in targets:
+            key = research_key(target.company, target.role)
+            if key not in seen:
+                seen.add(key)
+                unique.append(target)
+        return unique[:self.top]
+
+    def refresh_after(self, target: WarmTarget) -> float:
+        """
+        Age in seconds at which a target is refreshed.
+
+        A stable hash of the key places every target at its own point in STAGGER_RANGE of the
+        TTL, so results that were warmed together still come due at different times.
+        """
+        digest = hashlib.sha256(research_key(target.company, target.role).encode("utf-8")).digest()
+        low, high = STAGGER_RANGE
+        return self.workflow.max_age * (low + (high - low) * int.from_bytes(digest[:8], "big") / 2 ** 64)
+
+    def due(self, target: WarmTarget) -> bool:
+        """Whether a target has no stored result or has reached its staggered refresh age."""
+        refreshed_at = self.workflow.store.refreshed_at(target.company, target.role)
+        return refreshed_at is None or self.workflow.store.age(refreshed_at) >= self.refresh_after(target)
+
+    def _requests(self) -> float:
+        totals = self.workflow.budget.totals()
+        return totals["searches"] + totals["scrapes"]
+
+    def run_once(self) -> Dict[str, int]:
+        """
+        Refresh due targets, most demanded first, until the request budget is used up.
+
+        Returns:
+            Counts of targets warmed, skipped as still fresh, failed, and deferred to the next cycle
+        """
+        summary = {"warmed": 0, "fresh": 0, "failed": 0, "deferred": 0}
+        start = self._requests()
+        targets = self.targets()
+        print(f"🔥 Warming up to {len(targets)} targets within {self.max_requests} requests")
+        for target in targets:
+            if not self.due(target):
+                summary["fresh"] += 1
+                continue
+            if self._requests() - start >= self.max_requests:
+                summary["deferred"] += 1
+                continue
+            print(f"🔥 Warming {target.role} at {target.company} ({target.demand} recent queries)")
+            try:
+                # refresh() re-checks stored sources, or runs the full workflow when nothing is stored
+                with self.workflow.admission.slot("batch"):
+                    result = self.workflow.refresh(target.company, target.role)
+                if result.errors:
+                    print(f"⚠️ Warming incomplete for {target.role} at {target.company}: {'; '.join(result.errors)[:200]}")
+                    summary["failed"] += 1
+                else:
+                    summary["warmed"] += 1
+            except Exception as e:
+                print(f"⚠️ Warming failed for {target.role} at {target.company}: {str(e)[:200]}")
+                summary["failed"] += 1
+        print(f"🔥 Warm cycle done ({self._requests() - start:.0f} requests): "
+              + ", ".join(f"{name} {count}" for name, count in summary.items()))
+        return summary
+
+    def run_forever(self, interval: float = WARM_INTERVAL, off_peak_only: bool = True) -> None:
+        """Run a warm cycle every interval seconds, only during the off-peak window unless told otherwise."""
+        while True:
+            if not off_peak_only or in_window(datetime.now().hour, self.window):
+                self.run_once()
+            time.sleep(interval)
@@ -1,326 +1,638 @@
-from typing import Dict, Any, Optional
-from datetime import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+import openai
+from langgraph.checkpoint.sqlite import SqliteSaver
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
+from langgraph.types import RetryPolicy
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
-from .models import ResearchState, CompanyBackground, InterviewProcess, PreparationGuide
-from .firecrawl import WebResearchService
-from .prompts import InterviewResearchPrompts
+from .admission import AdmissionController, admission_controller
+from .models import ResearchState, ResearchBundle, CompanyBackground, InterviewProcess, PreparationGuide, SourceRecord, ContentRef, NodeUsage
+from .budget import BudgetGovernor
+from .chunks import ChunkStore, chunk_store
+from .companies import CompanyIndex
+from .coverage import estimate_coverage
+from .crawler import CRAWL_ENABLED, CrawledPage, SiteCrawler
+from .domains import DomainStats, ScrapeObservation
+from .profiling import RunProfiler, format_profile
+from .scheduler import ScrapeScheduler, scrape_scheduler
+from .similarity import most_similar
+from .routing import ModelRouter, VALIDATION_ERRORS, format_usage
+from .schemas import extract_json, parse_model, validate_model
+from .firecrawl import SearchResult, WebResearchService
+from .prompts import InterviewResearchPrompts, count_tokens
+from .store import DATA_DIR, ResultStore, SourceDocument, company_key, research_key, utc_now
 import json
 
+MAX_SOURCES = 3  # Sources scraped per research node when coverage cannot be estimated
+# Adaptive gathering: stop once the gathered text covers the node's target fields, else keep going up to the cap
+MIN_SOURCES = int(os.getenv("RESEARCH_MIN_SOURCES", "2"))  # Size of the first scrape wave
+SOURCE_CAP = int(os.getenv("RESEARCH_SOURCE_CAP", "5"))
+COVERAGE_TARGET = float(os.getenv("RESEARCH_COVERAGE_TARGET", "0.8"))
+MAX_SOURCE_CHARS = 5000  # Characters kept from each scraped page
+# Fused mode: one LLM call for background, process and guide when the evidence fits this budget
+FUSED_MODE = os.getenv("RESEARCH_FUSED_MODE", "0") == "1"
+FUSED_MAX_TOKENS = int(os.getenv("RESEARCH_FUSED_MAX_TOKENS", "8000"))
+# Sectioned guide: guide fields written by concurrent LLM calls, with a completion-token cap each
+SECTIONED_GUIDE = os.getenv("RESEARCH_SECTIONED_GUIDE", "0") == "1"
+GUIDE_SECTIONS: Dict[str, Tuple[Tuple[str, ...], int]] = {
+    "technical": (("technical_topics", "resources"), 700),
+    "behavioral": (("behavioral_topics",), 400),
+    "strategy": (("strategy", "common_pitfalls"), 600),
+}
+# Reuse a stored interview process from a role variant at the same company above this similarity
+ROLE_SIMILARITY_THRESHOLD = float(os.getenv("RESEARCH_ROLE_SIMILARITY", "0.8"))
+PREFETCH_TTL = float(os.getenv("RESEARCH_PREFETCH_TTL", "900"))  # Seconds a finished prefetch stays reusable
+# Stream pages directly with on-the-fly filtering (falls back to Firecrawl per page)
+STREAMING_SCRAPE = os.getenv("RESEARCH_STREAMING_SCRAPE", "1") != "0"
+SITE_SOURCES = int(os.getenv("RESEARCH_SITE_SOURCES", "2"))  # Crawled company-site pages used per research node
+
+# Profiler of the run(..., profile=True) in progress, per context so concurrent runs each get their own.
+# LangGraph runs nodes in a copy of the caller's context, so nodes see the profiler of their run.
+_run_profiler: ContextVar[Optional[RunProfiler]] = ContextVar("run_profiler", default=None)
+
+# Relevance keywords used to filter page text while it is being scraped
+NODE_KEYWORDS = {
+    "research_company": [
+        "culture", "values", "mission", "employees", "headquarter", "founded", "industry",
+        "revenue", "funding", "acquisition", "announce", "launch", "leadership", "ceo", "tech stack"
+    ],
+    "research_process": [
+        "interview", "recruiter", "screen", "onsite", "on-site", "round", "stage", "question",
+        "coding", "leetcode", "system design", "behavioral", "take-home", "assessment", "offer"
+    ],
+}
+
+TRANSIENT_ERRORS = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    ConnectionError,
+    TimeoutError,
+)
+
+def is_transient_error(error: Exception) -> bool:
+    """Errors worth retrying: network failures, timeouts, rate limits and 5xx responses."""
+    return isinstance(error, TRANSIENT_ERRORS)
+
 class Workflow:
-    def __init__(self):
+    def __init__(self, store: Optional[ResultStore] = None, checkpoint_path: Optional[str] = None,
+                 chunks: Optional[ChunkStore] = None, router: Optional[ModelRouter] = None,
+                 fused: Optional[bool] = None, sectioned_guide: Optional[bool] = None,
+                 domains: Optional[DomainStats] = None, scheduler: Optional[ScrapeScheduler] = None,
+                 companies: Optional[CompanyIndex] = None, budget: Optional[BudgetGovernor] = None,
+                 admission: Optional[AdmissionController] = None, crawler: Optional[SiteCrawler] = None):
         self.firecrawl = WebResearchService()
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0.1)
+        self.router = router or ModelRouter()
         self.prompts = InterviewResearchPrompts()
+        self.store = store or ResultStore()
+        self.chunks = chunks or chunk_store
+        self.domains = domains or DomainStats()
+        self.scheduler = scheduler or scrape_scheduler
+        # Company input is resolved to a canonical name before any cache or research lookup
+        self.companies = companies or CompanyIndex()
+        self.budget = budget or BudgetGovernor()
+        # Careers and engineering pages of the company's own site, crawled incrementally
+        self.crawler = crawler or (SiteCrawler(companies=self.companies, scheduler=self.scheduler, budget=self.budget)
+                                   if CRAWL_ENABLED else None)
+        # Runs that need upstream work take a slot; upstream latency and 429s adapt the slot count
+        self.admission = admission or admission_controller
+        # Stored results older than this are refreshed incrementally instead of served as-is
+        self.max_age = float(os.getenv("RESEARCH_MAX_AGE_HOURS", "24")) * 3600
+        self.fused = FUSED_MODE if fused is None else fused
+        self.sectioned_guide = SECTIONED_GUIDE if sectioned_guide is None else sectioned_guide
+        self.checkpointer = self._create_checkpointer(checkpoint_path)
         self.workflow = self._build_workflow()
+        # Speculative company research: company key -> (future, started_at)
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+        self._prefetch: Dict[str, Tuple[Future, float]] = {}
+        self._prefetch_lock = threading.Lock()
+
+    @staticmethod
+    def _create_checkpointer(path: Optional[str] = None) -> SqliteSaver:
+        """Local SQLite checkpointer so interrupted runs resume from the last completed node"""
+        path = path or os.getenv("RESEARCH_CHECKPOINT_PATH") or os.path.join(DATA_DIR, "checkpoints.db")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
 
     def _build_workflow(self):
+        # Retry transient LLM/network failures inside a node before giving up on the run
+        retry = RetryPolicy(max_attempts=int(os.getenv("RESEARCH_NODE_MAX_ATTEMPTS", "3")), retry_on=is_transient_error)
         graph = StateGraph(ResearchState)
-        graph.add_node("research_company", self._research_company)
-        graph.add_node("research_process", self._research_process)
-        graph.add_node("generate_guide", self._generate_guide)
+        if self.fused:
+            return self._build_fused_workflow(graph, retry)
+        graph.add_node("research_company", self._profiled("research_company", self._research_company), retry_policy=retry)
+        graph.add_node("research_process", self._profiled("research_process", self._research_process), retry_policy=retry)
+        graph.add_node("generate_guide", self._profiled("generate_guide", self._generate_guide), retry_policy=retry)
         graph.set_entry_point("research_company")
         graph.add_edge("research_company", "research_process")
         graph.add_edge("research_process", "generate_guide")
         graph.add_edge("generate_guide", END)
-        return graph.compile()
+        return graph.compile(checkpointer=self.checkpointer)
 
-    def _research_company(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
-        """Research company background information"""
-        print(f"🔍 Researching company background: {state.company}")
+    def _build_fused_workflow(self, graph: StateGraph, retry: RetryPolicy):
+        """
+        Gather all sources first, then answer with one LLM call when the evidence is small.
+
+        Large contexts, and fused responses that fail validation, take the regular
+        extract company -> extract process -> guide path over the same gathered sources.
+        """
+        graph.add_node("gather_sources", self._profiled("gather_sources", self._gather_all), retry_policy=retry)
+        graph.add_node("research_fused", self._profiled("research_fused", self._research_fused), retry_policy=retry)
+        graph.add_node("extract_company", self._profiled("extract_company", self._extract_company_node), retry_policy=retry)
+        graph.add_node("extract_process", self._profiled("extract_process", self._extract_process_node), retry_policy=retry)
+        graph.add_node("generate_guide", self._profiled("generate_guide", self._generate_guide), retry_policy=retry)
+        graph.set_entry_point("gather_sources")
+        graph.add_conditional_edges("gather_sources", self._route_gathered, ["research_fused", "extract_company"])
+        graph.add_conditional_edges(
+            "research_fused",
+            lambda state: END if state.preparation_guide else "extract_company",
+            ["extract_company", END]
+        )
+        graph.add_edge("extract_company", "extract_process")
+        graph.add_edge("extract_process", "generate_guide")
+        graph.add_edge("generate_guide", END)
+        return graph.compile(checkpointer=self.checkpointer)
+
+    def _profiled(self, name: str, node: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+        """Wrap a graph node so it is profiled when the run asked for it (keeps the node's signature)"""
+        @wraps(node)
+        def profiled(*args, **kwargs):
+            with self._profile_node(name):
+                return node(*args, **kwargs)
+        return profiled
+
+    @contextmanager
+    def _profile_node(self, name: str) -> Iterator[None]:
+        profiler = _run_profiler.get()
+        if profiler is None:
+            yield
+            return
+        with profiler.node(name):
+            yield
+
+    @staticmethod
+    def thread_id(company: str, role: str) -> str:
+        """Checkpoint thread id derived from the normalized (company, role) pair"""
+        return "research-" + hashlib.sha256(research_key(company, role).encode("utf-8")).hexdigest()[:16]
+
+    def _gather_sources(self, query: str, node: str, label: str, job: Optional[str] = None,
+                        company: Optional[str] = None) -> List[SourceDocument]:
+        """
+        Search the web and scrape the top results into (record, excerpt) pairs.
+
+        Candidates are scraped concurrently through the scrape scheduler, best domain first, in
+        waves. After each wave the excerpts are checked against the node's target fields (see
+        coverage.py): gathering stops once COVERAGE_TARGET is reached, and otherwise continues
+        one source at a time up to SOURCE_CAP. Nodes without coverage signals fill MAX_SOURCES.
+        `job` names the research job for fair scheduling and budget accounting.
+
+        With a company, its crawled careers and engineering pages come first, and the web
+        search is skipped when they already reach COVERAGE_TARGET.
+        """
+        run = job or node  # Also the budget run the spend is charged to
+        max_sources, max_chars = self._source_limits(run)
+        # Under budget pressure, sources are never added beyond the (reduced) default
+        cap = max(max_sources, SOURCE_CAP) if max_sources == MAX_SOURCES else max_sources
+        
+        documents = self._site_sources(company, node, run, max_chars) if company else []
+        if documents:
+            coverage = estimate_coverage(node, [excerpt for _, excerpt in documents])
+            if coverage is not None and coverage.score >= COVERAGE_TARGET:
+                print(f"  📐 Coverage {coverage.score:.0%} from the company site; skipping web search")
+                return documents
+        
+        # Search for candidate sources
+        search_results = self.firecrawl.search_web(
+            query,
+            num_results=5  # Get more results for better coverage
+        )
+        self.budget.record(run, searches=1)
+        
+        # Limit to top 5 results to avoid too many API calls
+        crawled = {record.url for record, _ in documents}
+        by_url = {result.url: result for result in search_results[:5] if result.url not in crawled}
+        # Best-yielding domains first; domains that keep failing are skipped
+        ranked = self.domains.rank(list(by_url), keep=cap - len(documents))
+        
+        observations = []  # (url, success, useful chars, latency) for the domain statistics
+        position = 0
+        wave_size = max(1, min(MIN_SOURCES, max_sources) - len(documents))
+        while position < len(ranked):
+            wave = ranked[position:position + wave_size]
+            position += len(wave)
+            futures = [
+                self.scheduler.submit(run, url, partial(self._fetch_source, url, by_url[url], node, label, max_chars))
+                for url in wave
+            ]
+            for future in futures:
+                document, observation = future.result()
+                observations.append(observation)
+                if document is not None:
+                    documents.append(document)
+            self.budget.record(run, scrapes=len(wave))
+            
+            coverage = estimate_coverage(node, [excerpt for _, excerpt in documents])
+            if coverage is None:
+                if len(documents) >= max_sources:
+                    break
+                wave_size = max_sources - len(documents)
+                continue
+            if documents and coverage.score >= COVERAGE_TARGET:
+                if len(documents) < max_sources:
+                    print(f"  📐 Coverage {coverage.score:.0%} after {len(documents)} sources; stopping early")
+                break
+            if len(documents) >= cap:
+                break
+            if len(documents) >= max_sources and position < len(ranked):
+                missing = f" (missing: {', '.join(coverage.missing)})" if coverage.missing else ""
+                print(f"  📐 Coverage {coverage.score:.0%} after {len(documents)} sources{missing}; trying another")
+            # Fill the default count in one wave, then extend one source at a time
+            wave_size = max(1, max_sources - len(documents))
+        
+        try:
+            self.domains.record_scrapes(observations)
+        except sqlite3.Error as e:
+            print(f"  ⚠️ Could not update domain statistics: {e}")
+        return documents
+
+    def _site_sources(self, company: str, node: str, run: str,
+                      max_chars: int = MAX_SOURCE_CHARS) -> List[SourceDocument]:
+        """Up to SITE_SOURCES crawled company-site pages for a node, best field coverage first, cut to max_chars"""
+        scored = []
+        for page in self._crawl_site(company, run):
+            coverage = estimate_coverage(node, [page.excerpt])
+            if coverage is None or coverage.score > 0:
+                scored.append((coverage.score if coverage else 0.0, page))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        documents = []
+        for _, page in scored[:SITE_SOURCES]:
+            print(f"  🗺️ From the company site: {page.url}")
+            chunk_id, excerpt = self.chunks.intern(page.excerpt[:max_chars])
+            record = SourceRecord(url=page.url, node=node, title=page.title, content_hash=chunk_id,
+                                  fetched_at=page.fetched_at, max_chars=max_chars, site=True)
+            documents.append((record, excerpt))
+        return documents
+
+    def _crawl_site(self, company: str, run: str) -> List[CrawledPage]:
+        """
+        Current crawled company-site pages; [] without a crawler.
+
+        Only new or changed pages are fetched here, charged to the run. Finding the site and
+        reading its sitemaps are left to the crawler's background crawl, so a company seen for
+        the first time has no site pages until that finishes.
+        """
+        if self.crawler is None:
+            return []
+        try:
+            return self.crawler.crawl(company, self.firecrawl, job=run, discover=False).pages
+        except (sqlite3.Error, OSError) as e:
+            print(f"  ⚠️ Could not crawl the company site: {e}")
+            return []
+
+    def _fetch_source(self, url: str, result: SearchResult, node: str, label: str,
+                      max_chars: int = MAX_SOURCE_CHARS) -> Tuple[Optional[SourceDocument], ScrapeObservation]:
+        """Scrape one search result; returns the document (None if unusable) and the scrape outcome"""
+        print(f"  🔗 {label}: {url}")
+        started = time.perf_counter()
+        try:
+            scraped = self._scrape(url, node, max_chars)
+        except Exception as e:
+            print(f"  ⚠️ Error processing {url}: {str(e)[:200]}")
+            return None, (url, False, 0, time.perf_counter() - started)
+        latency = time.perf_counter() - started
+        error = str(scraped.get("error", "")) if scraped else ""
+        self.admission.observe(latency, throttled="429" in error or "rate limit" in error.lower(), kind="scrape")
         
-        # Build a comprehensive search query
-        search_query = (
-            f"{state.company} company profile, culture, values, size, industry, "
+        content = scraped.get('markdown') if scraped else None
+        if not isinstance(content, str) or len(content) < 50:  # Skip very short or invalid content
+            return None, (url, False, 0, latency)
+        
+        # Intern the excerpt right away: the full page can be freed and every later
+        # holder (store, state refs, prompts) shares the one canonical string
+        chunk_id, excerpt = self.chunks.intern(content[:max_chars])
+        # Validators of the streamed response let the next refresh check the page with a
+        # conditional request instead of re-scraping
+        etag, last_modified = scraped.get("etag"), scraped.get("last_modified")
+        del content, scraped
+        record = SourceRecord(
+            url=url,
+            node=node,
+            title=result.title,
+            content_hash=chunk_id,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=utc_now(),
+            max_chars=max_chars
+        )
+        return (record, excerpt), (url, True, len(excerpt), latency)
+
+    # ===== BUDGET =====
+    @staticmethod
+    def _run_key(state: ResearchState) -> str:
+        """Budget run for a state; company research (shared across roles) is its own run"""
+        return research_key(state.company, state.role) if state.role else company_key(state.company)
+
+    def _source_limits(self, run: str) -> Tuple[int, int]:
+        """Sources per step and characters per source, reduced at budget stages 1 and 2"""
+        stage = self.budget.stage(run)
+        max_sources = MAX_SOURCES - 1 if stage >= 1 else MAX_SOURCES
+        max_chars = MAX_SOURCE_CHARS // 2 if stage >= 2 else MAX_SOURCE_CHARS
+        return max_sources, max_chars
+
+    def _invoke(self, state: ResearchState, node: str, messages: List[Any], parse: Any,
+                config: Optional[RunnableConfig] = None, **kwargs: Any) -> Tuple[Any, List[NodeUsage]]:
+        """Route an LLM call, charging its tokens to the run and using the economy model from budget stage 3"""
+        run = self._run_key(state)
+        # Count this call's prompt (~4 characters per token) so the stage reflects where it will land
+        upcoming = {"tokens": sum(len(message.content) for message in messages) / 4}
+        started = time.perf_counter()
+        try:
+            result, usage = self.router.invoke(node, messages, parse, config=config,
+                                               economy=self.budget.stage(run, upcoming) >= 3, **kwargs)
+        except Exception as e:
+            self.budget.record_usage(run, getattr(e, "usage", []))
+            self.admission.observe(time.perf_counter() - started, throttled=isinstance(e, openai.RateLimitError),
+                                   kind=self.router.model_name(node))
+            raise
+        self.budget.record_usage(run, usage)
+        for call in usage:
+            self.admission.observe(call.latency_s, kind=call.model)
+        return result, usage
+
+    @staticmethod
+    def _company_query(company: str) -> str:
+        """Comprehensive search query for company background"""
+        return (
+            f"{company} company profile, culture, values, size, industry, "
             f"recent news, funding, leadership, and tech stack"
         )
+
+    @staticmethod
+    def _process_query(company: str, role: str) -> str:
+        """Comprehensive search query for the role's interview process"""
+        return (
+            f"{company} {role} interview process stages questions "
+            f"technical assessment coding challenge system design behavioral"
+        )
+
+    def _scrape(self, url: str, node: str, max_chars: int = MAX_SOURCE_CHARS) -> Dict[str, Any]:
+        """Scrape a source for a node, bounded to max_chars of relevant text when streaming"""
+        if STREAMING_SCRAPE:
+            return self.firecrawl.scrape_url_bounded(url, max_chars, NODE_KEYWORDS.get(node))
+        return self.firecrawl.scrape_url(url)
+
+    @staticmethod
+    def _format_source(url: str, title: str, content: str) -> str:
+        """Wrap a source excerpt with an attribution header for the LLM prompt"""
+        source = f"Source: {url}"
+        if title:
+            source = f"{title} | {source}"
+        return f"\n{'='*80}\n{source}\n{'='*80}\n{content}\n"
+
+    def _format_documents(self, documents: List[SourceDocument]) -> str:
+        """Join source excerpts with attribution headers"""
+        return "\n".join(self._format_source(record.url, record.title, content) for record, content in documents)
+
+    def _store_chunks(self, documents: List[SourceDocument], node: str) -> List[ContentRef]:
+        """Intern source excerpts in the chunk store and return references for the graph state"""
+        # Excerpts gathered in this run are already interned; this covers ones loaded from the store
+        return [
+            ContentRef(chunk_id=self.chunks.put(content), node=node, url=record.url, chars=len(content))
+            for record, content in documents
+        ]
+
+    def _resolve_content(self, refs: List[ContentRef]) -> str:
+        """Assemble prompt context from chunk references in a single join, skipping unknown chunks"""
+        urls = {ref.chunk_id: ref.url for ref in refs}
+        return "\n".join(
+            self._format_source(urls[chunk_id], "", content)
+            for chunk_id, content in self.chunks.iter_text(list(urls))
+        )
+
+    def _record_used(self, records: List[SourceRecord]) -> None:
+        """Credit the domains whose content fed a validated extraction"""
+        try:
+            self.domains.record_used(record.url for record in records)
+        except sqlite3.Error as e:
+            print(f"  ⚠️ Could not update domain statistics: {e}")
+
+    @staticmethod
+    def _print_sources(documents: List[SourceDocument]) -> None:
+        sources = [record.url for record, _ in documents]
+        if sources:
+            print(f"   Sources used: {', '.join(sources[:3])}{'...' if len(sources) > 3 else ''}")
+
+    def _research_company(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """Research company background information"""
+        prefetched = None if state.force else self._prefetched(state.company)
+        if prefetched is not None:
+            update, documents = prefetched
+        else:
+            update, documents = self._company_research(state.company, config, force=state.force)
+        if not update.get("errors"):
+            # Later roles at the same company reuse this result; their usage was already reported here
+            self._remember_prefetch(state.company, {**update, "usage": []}, documents, renew=prefetched is None)
         
+        self.store.save_documents(state.company, state.role, "research_company", documents)
+        return update
+
+    def _prefetched(self, company: str) -> Optional[Tuple[Dict[str, Any], List[SourceDocument]]]:
+        """Wait for and return prefetched company research, or None if there is none or it failed"""
+        future = self._take_prefetch(company)
+        if future is None:
+            return None
+        try:
+            if not future.done():
+                print(f"⏳ Waiting for in-flight company research: {company}")
+            result = future.result()
+        except Exception as e:
+            print(f"⚠️ Prefetched company research failed ({str(e)[:200]}); researching again")
+            return None
+        if result[0].get("errors"):
+            print(f"⚠️ Prefetched company research failed ({'; '.join(result[0]['errors'])}); researching again")
+            return None
+        print(f"⚡ Using prefetched company research for {company}")
+        return result
+
+    def _company_research(self, company: str, config: Optional[RunnableConfig] = None,
+                          force: bool = False) -> Tuple[Dict[str, Any], List[SourceDocument]]:
+        """Role-independent company research: returns the node update and the gathered documents"""
+        stored = None if force else self._stored_company_research(company)
+        if stored is not None:
+            return stored
+        
+        print(f"🔍 Researching company background: {company}")
+        run = company_key(company)
+        self.budget.start_run(run)
         try:
-            # Search for company information
-            search_results = self.firecrawl.search_web(
-                search_query, 
-                num_results=5  # Get more results for better coverage
-            )
-            
-            all_content = []
-            processed_urls = set()
-            
-            for result in search_results[:5]:  # Limit to top 5 results to avoid too many API calls
-                try:
-                    url = result.get('url') or (result.get('url') if isinstance(result, dict) else None)
-                    if not url or url in processed_urls:
-                        continue
-                        
-                    print(f"  🔗 Scraping: {url}")
-                    scraped = self.firecrawl.scrape_url(url)
-                    
-                    if not scraped or not scraped.get('markdown'):
-                        continue
-                        
-                    content = scraped['markdown']
-                    if not isinstance(content, str) or len(content) < 50:  # Skip very short or invalid content
-                        continue
-                        
-                    # Add source information
-                    source = f"Source: {url}"
-                    title = result.get('title') or (result.get('title') if isinstance(result, dict) else None)
-                    if title:
-                        source = f"{title} | {source}"
-                        
-                    all_content.append(f"\n{'='*80}\n{source}\n{'='*80}\n{content[:5000]}\n")
-                    processed_urls.add(url)
-                    
-                    # Stop if we have enough content
-                    if len(all_content) >= 3:  # Limit to top 3 sources
-                        break
-                        
-                except Exception as e:
-                    print(f"  ⚠️ Error processing {url}: {str(e)[:200]}")
-            
-            # Join all content with separators
-            research_content = "\n".join(all_content) if all_content else "No relevant content found."
-            print(f"  ✅ Gathered {len(processed_urls)} sources with relevant content")
-            
-            if not research_content or research_content == "No relevant content found.":
-                print("⚠️ No content found during company research")
-                return {"background": CompanyBackground()}
-            
-            # Use the new prompt structure from prompts.py
             try:
-                system_prompt = self.prompts.get_company_research_system_prompt()
-                user_prompt = self.prompts.get_company_research_user_prompt(state.company, research_content)
-                
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=user_prompt)
-                ]
-                
-                # Get the LLM response
-                response = self.llm.invoke(messages, config=config)
-                
-                # Clean and parse the response
-                content = response.content.strip()
-                if '```json' in content:
-                    content = content[content.find('```json') + 7:]
-                    content = content[:content.rfind('```')].strip()
-                
-                # Parse the JSON response
-                company_data = json.loads(content)
-                
-                # Create the CompanyBackground object with default values for missing fields
-                background = CompanyBackground(
-                    company_size=company_data.get('company_size', 'Unknown'),
-                    industry=company_data.get('industry', 'Unknown'),
-                    company_culture=company_data.get('company_culture', 'Unknown'),
-                    values=company_data.get('values', []),
-                    recent_news=company_data.get('recent_news', [])
+                documents = self._gather_sources(
+                    self._company_query(company), "research_company", "Scraping", job=run, company=company
                 )
-                
-                print(f"✅ Successfully extracted company information for {state.company}")
-                if processed_urls:
-                    sources = list(processed_urls)
-                    print(f"   Sources used: {', '.join(sources[:3])}{'...' if len(sources) > 3 else ''}")
-                    
-                return {"background": background, "research_content": research_content, "sources": sources}
-                
-            except json.JSONDecodeError as e:
-                print(f"❌ Failed to parse JSON response: {e}")
-                if 'response' in locals():
-                    print(f"Response content (first 500 chars): {response.content[:500]}...")
-                return {"background": CompanyBackground(), "research_content": research_content, "sources": list(processed_urls)}
-                
+                print(f"  ✅ Gathered {len(documents)} sources with relevant content")
             except Exception as e:
-                print(f"❌ Company research analysis failed: {str(e)}")
-                return {"background": CompanyBackground(), "research_content": research_content, "sources": list(processed_urls)}
+                print(f"🔴 Error during company research: {str(e)}")
+                return {
+                    "background": CompanyBackground(
+                        company_size="Unknown",
+                        industry="Unknown",
+                        company_culture="Unknown"
+                    ),
+                    "sources": [],
+                    "errors": [f"research_company: {str(e)[:200]}"]
+                }, []
             
-        except Exception as e:
-            print(f"🔴 Error during company research: {str(e)}")
+            return self._extract_company(ResearchState(company=company, role=""), documents, config), documents
+        finally:
+            self.budget.finish_run(run)
+
+    def _stored_company_research(self, company: str) -> Optional[Tuple[Dict[str, Any], List[SourceDocument]]]:
+        """Company background stored with any fresh result at the company (e.g. kept warm by the cache warmer)"""
+        for role, stored in self.store.roles(company, max_age=self.max_age):
+            documents = self.store.get_documents(company, role).get("research_company", [])
+            if stored.background is None or stored.background.industry == "Unknown" or not documents:
+                continue
+            print(f"♻️ Reusing company research stored with {role} at {company}")
             return {
-                "background": CompanyBackground(
-                    company_size="Unknown",
-                    industry="Unknown",
-                    company_culture="Unknown"
-                ),
-                "research_content": f"Error: {str(e)[:300]}",
-                "sources": []
-            }
+                "background": stored.background,
+                "research_content": self._store_chunks(documents, "research_company"),
+                "sources": [record for record, _ in documents]
+            }, documents
+        return None
 
-    def _research_process(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
-        """Research interview process for specific role"""
-        print(f"🔍 Researching interview process: {state.role} at {state.company}")
+    def prefetch_company(self, company: str, config: Optional[RunnableConfig] = None) -> Future:
+        """
+        Start company research in the background before the role is known.
+
+        The research node of a later run for the same company picks up the in-flight (or
+        finished) result instead of researching again. Finished results are kept for
+        PREFETCH_TTL seconds, so several roles at one company share a single company research.
+
+        The prefetch holds an admission slot while it runs but never waits for one: when the
+        server is busy it fails with AdmissionRejected and the later run researches itself.
+        """
+        company = self.companies.resolve(company)
+        key = company_key(company)
+        with self._prefetch_lock:
+            entry = self._prefetch.get(key)
+            if entry and time.monotonic() - entry[1] < PREFETCH_TTL and not (
+                    entry[0].done() and (entry[0].exception() is not None or entry[0].result()[0].get("errors"))):
+                return entry[0]
+            future = self._executor.submit(self._prefetch_research, company, config)
+            self._prefetch[key] = (future, time.monotonic())
+            return future
+
+    def _prefetch_research(self, company: str, config: Optional[RunnableConfig] = None
+                           ) -> Tuple[Dict[str, Any], List[SourceDocument]]:
+        """Company research for prefetch_company, admitted like a run"""
+        # Speculative work: lowest priority, so it sheds nobody, and no wait, so a run that
+        # was admitted first never blocks on a prefetch queued behind it
+        with self.admission.slot("batch", timeout=0):
+            return self._company_research(company, config)
+
+    def _take_prefetch(self, company: str) -> Optional[Future]:
+        """Return a usable prefetched company research for a company, if any."""
+        with self._prefetch_lock:
+            entry = self._prefetch.get(company_key(company))
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] >= PREFETCH_TTL:
+                del self._prefetch[company_key(company)]
+                return None
+            return entry[0]
+
+    def _remember_prefetch(self, company: str, update: Dict[str, Any], documents: List[SourceDocument],
+                           renew: bool = True) -> None:
+        """
+        Keep a finished company research so follow-up roles at the same company reuse it.
+
+        With renew=False the entry keeps the time it was created, so reusing a prefetch does
+        not extend its lifetime past PREFETCH_TTL.
+        """
+        future: Future = Future()
+        future.set_result((update, documents))
+        key = company_key(company)
+        with self._prefetch_lock:
+            entry = self._prefetch.get(key)
+            if renew:
+                self._prefetch[key] = (future, time.monotonic())
+            elif entry is not None:
+                self._prefetch[key] = (future, entry[1])
+
+    def _extract_company(self, state: ResearchState, documents: List[SourceDocument],
+                         config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """Extract structured company background from gathered source excerpts"""
+        records = [record for record, _ in documents]
+        unknown = CompanyBackground(company_size="Unknown", industry="Unknown", company_culture="Unknown")
         
-        # Build a comprehensive search query
-        search_query = (
-            f"{state.company} {state.role} interview process stages questions "
-            f"technical assessment coding challenge system design behavioral"
-        )
+        if not documents:
+            print("⚠️ No content found during company research")
+            return {"background": unknown, "sources": records, "errors": ["research_company: no sources found"]}
+        
+        research_content = self._format_documents(documents)
+        refs = self._store_chunks(documents, "research_company")
         
         try:
-            # Search for interview process information
-            search_results = self.firecrawl.search_web(
-                search_query,
-                num_results=5  # Get more results for better coverage
-            )
-            
-            all_content = []
-            processed_urls = set()
+            system_prompt = self.prompts.get_company_research_system_prompt()
+            user_prompt = self.prompts.get_company_research_user_prompt(state.company, research_content)
             
-            for result in search_results[:5]:  # Limit to top 5 results
-                try:
-                    url = result.get('url') or (result.get('url') if isinstance(result, dict) else None)
-                    if not url or url in processed_urls:
-                        continue
-                        
-                    print(f"  🔗 Scraping interview info from: {url}")
-                    scraped = self.firecrawl.scrape_url(url)
-                    
-                    if not scraped or not scraped.get('markdown'):
-                        continue
-                        
-                    content = scraped['markdown']
-                    if not isinstance(content, str) or len(content) < 50:  # Skip very short or invalid content
-                        continue
-                        
-                    # Add source information
-                    title = result.get('title') or (result.get('title') if isinstance(result, dict) else None)
-                    source = f"Source: {url}"
-                    if title:
-                        source = f"{title} | {source}"
-                        
-                    all_content.append(f"\n{'='*80}\n{source}\n{'='*80}\n{content[:5000]}\n")
-                    processed_urls.add(url)
-                    
-                    # Stop if we have enough content
-                    if len(all_content) >= 3:  # Limit to top 3 sources
-                        break
-                        
-                except Exception as e:
-                    print(f"  ⚠️ Error processing {url}: {str(e)[:200]}")
-                    
-            # Join all content with separators
-            research_content = "\n".join(all_content) if all_content else "No relevant content found."
-            print(f"  ✅ Gathered {len(processed_urls)} sources with interview information")
+            messages = [
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=user_prompt)
+            ]
             
-            if not research_content or research_content == "No relevant content found.":
-                print("⚠️ No interview process information found")
-                # Return default InterviewProcess with required fields
-                return {
-                    "interview_process": InterviewProcess(
-                        typical_stages=["Unknown"],
-                        duration="Unknown",
-                        common_questions=[]
-                    ),
-                    "interview_research_content": research_content,
-                    "sources": list(processed_urls)
-                }
+            # Small model first; escalates to the strong model if the output does not validate
+            background, usage = self._invoke(state, "research_company", messages, self._parse_company, config=config)
             
-            # Join all content with separators
-            research_content = "\n".join(all_content) if all_content else "No relevant interview information found."
-            print(f"  ✅ Gathered {len(processed_urls)} sources with interview information")
+            print(f"✅ Successfully extracted company information for {state.company}")
+            self._record_used(records)
+            self._print_sources(documents)
+            return {"background": background, "research_content": refs, "sources": records, "usage": usage}
             
-            if not research_content or research_content == "No relevant interview information found.":
-                print("⚠️ No interview process information found")
-                return {
-                    "interview_process": InterviewProcess(
-                        typical_stages=["Unknown"],
-                        duration="Unknown",
-                        common_questions=[]
-                    ),
-                    "interview_research_content": research_content,
-                    "interview_sources": list(processed_urls)
-                }
-            
-            # Use the new prompt structure from prompts.py
-            try:
-                system_prompt = self.prompts.get_interview_process_system_prompt()
-                user_prompt = self.prompts.get_interview_process_user_prompt(
-                    state.company, 
-                    state.role,
-                    research_content
-                )
-                
-                messages = [
-                    SystemMessage(content=system_prompt),
-                    HumanMessage(content=user_prompt)
-                ]
-                
-                # Get the LLM response
-                response = self.llm.invoke(messages, config=config)
-                
-                # Clean and parse the response
-                content = response.content.strip()
-                if '```json' in content:
-                    content = content[content.find('```json') + 7:]
-                    content = content[:content.rfind('```')].strip()
-                
-                # Parse the JSON response
-                process_data = json.loads(content)
-                
-                # Ensure required fields have values and proper types
-                typical_stages = ["Initial Screening", "Technical Interview", "Final Round"]
-                if isinstance(process_data.get('typical_stages'), list):
-                    typical_stages = process_data['typical_stages']
-                
-                duration = str(process_data.get('duration', '3-6 weeks'))
-                
-                # Ensure list fields are always lists
-                common_questions = process_data.get('common_questions')
-                if not isinstance(common_questions, list):
-                    common_questions = []
-                
-                # Create the InterviewProcess object with all required fields
-                interview_process = InterviewProcess(
-                    typical_stages=typical_stages,
-                    duration=duration,
-                    common_questions=common_questions,
-                    technical_assessment=bool(process_data.get('technical_assessment', False)),
-                    system_design=bool(process_data.get('system_design', False)),
-                    behavioral_focus=bool(process_data.get('behavioral_focus', False)),
-                    coding_challenges=bool(process_data.get('coding_challenges', False)),
-                    take_home_projects=bool(process_data.get('take_home_projects', False))
-                )
-                
-                print(f"✅ Successfully extracted interview process for {state.role} at {state.company}")
-                if processed_urls:
-                    sources = list(processed_urls)
-                    print(f"   Sources used: {', '.join(sources[:3])}{'...' if len(sources) > 3 else ''}")
-                else:
-                    sources = []
-                
-                return {
-                    "interview_process": interview_process,
-                    "interview_research_content": research_content,
-                    "sources": sources
-                }
-                
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"❌ Failed to parse JSON response: {e}")
-                if 'response' in locals():
-                    print(f"Response content (first 500 chars): {response.content[:500]}...")
-                return {
-                    "interview_process": InterviewProcess(
-                        typical_stages=["Unknown"],
-                        duration="Unknown",
-                        common_questions=[]
-                    ),
-                    "interview_research_content": research_content,
-                    "sources": list(processed_urls)
-                }
-                
-            except Exception as e:
-                print(f"❌ Interview process analysis failed: {str(e)}")
-                return {
-                    "interview_process": InterviewProcess(
-                        typical_stages=["Unknown"],
-                        duration="Unknown",
-                        common_questions=[]
-                    ),
-                    "interview_research_content": research_content,
-                    "sources": list(processed_urls)
-                }
+        except VALIDATION_ERRORS as e:
+            print(f"❌ Failed to parse company research response: {str(e)[:500]}")
+            return {"background": unknown, "research_content": refs, "sources": records, "usage": getattr(e, "usage", []),
+                    "errors": [f"research_company: invalid model output ({str(e)[:200]})"]}
             
+        except Exception as e:
+            if is_transient_error(e):
+                raise  # Let the node retry policy / checkpoint resume handle it
+            print(f"❌ Company research analysis failed: {str(e)}")
+            return {"background": unknown, "research_content": refs, "sources": records,
+                    "errors": [f"research_company: {str(e)[:200]}"]}
+
+    @staticmethod
+    def _parse_company(content: str) -> CompanyBackground:
+        """Parse and validate the company extraction response"""
+        return parse_model(CompanyBackground, content)
+
+    def _research_process(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """Research interview process for specific role"""
+        reused = self._reuse_similar_process(state)
+        if reused is not None:
+            return reused
+        
+        print(f"🔍 Researching interview process: {state.role} at {state.company}")
+        
+        try:
+            documents = self._gather_sources(
+                self._process_query(state.company, state.role), "research_process", "Scraping interview info from",
+                job=research_key(state.company, state.role), company=state.company
+            )
+            print(f"  ✅ Gathered {len(documents)} sources with interview information")
+            self.store.save_documents(state.company, state.role, "research_process", documents)
         except Exception as e:
             print(f"🔴 Error during interview process research: {str(e)}")
             return {
@@ -328,116 +640,235 @@ class Workflow:
                     typical_stages=["Unknown"],
                     duration="Unknown"
                 ),
-                "interview_research_content": f"Error: {str(e)[:300]}",
-                "sources": []
+                "sources": [],
+                "errors": [f"research_process: {str(e)[:200]}"]
             }
         
-        # Get structured interview process info from the research content
-        research_data = state.get('interview_research_content', {})
-        research_content = research_data.get('interview_research_content', 'No interview content found')
-        sources = research_data.get('interview_sources', [])
+        return self._extract_process(state, documents, config)
+
+    def _reuse_similar_process(self, state: ResearchState) -> Optional[Dict[str, Any]]:
+        """
+        Reuse the interview process of the most similar role already researched at the company.
+
+        Roles are compared with offline character n-gram TF-IDF vectors after folding
+        abbreviations and synonyms ("SWE II", "Software Developer"); the stored process and its
+        sources are reused when the similarity reaches ROLE_SIMILARITY_THRESHOLD.
+        """
+        candidates = [
+            (role, stored) for role, stored in self.store.roles(state.company, max_age=self.max_age)
+            if stored.interview_process is not None and stored.process_reused_from is None
+            and research_key(state.company, role) != research_key(state.company, state.role)
+        ]
+        match = most_similar(state.role, [role for role, _ in candidates])
+        if match is None or match[1] < ROLE_SIMILARITY_THRESHOLD:
+            return None
+        role, stored = candidates[match[0]]
+        documents = self.store.get_documents(state.company, role).get("research_process", [])
+        print(f"♻️ Reusing interview process researched for {role} at {state.company} (similarity {match[1]:.2f})")
+        self.store.save_documents(state.company, state.role, "research_process", documents)
+        return {
+            "interview_process": stored.interview_process,
+            "interview_research_content": self._store_chunks(documents, "research_process"),
+            "sources": [record for record, _ in documents],
+            "process_reused_from": role
+        }
+
+    def _extract_process(self, state: ResearchState, documents: List[SourceDocument],
+                         config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """Extract the structured interview process from gathered source excerpts"""
+        records = [record for record, _ in documents]
+        unknown = InterviewProcess(
+            typical_stages=["Unknown"],
+            duration="Unknown",
+            common_questions=[]
+        )
+        
+        if not documents:
+            print("⚠️ No interview process information found")
+            return {"interview_process": unknown, "sources": records, "errors": ["research_process: no sources found"]}
+        
+        research_content = self._format_documents(documents)
+        refs = self._store_chunks(documents, "research_process")
         
         try:
-            # Prepare the prompt with clear instructions and context
-            system_prompt = """You are an expert in analyzing technical interview processes. 
-            Extract and structure key information about the interview process from the provided research content.
-            Be precise and only include information that can be clearly inferred from the content.
-            If information is not available, use 'Unknown' rather than making assumptions."""
-            
-            user_prompt = f"""Analyze the following research content about the interview process for {state.role} at {state.company} and extract the requested information:
-            
-            ===== RESEARCH CONTENT =====
-            {research_content}
-            ===== END OF CONTENT =====
-            
-            Extract the following information as a JSON object with these exact field names:
-            {{
-                "typical_stages": ["List", "of", "typical", "interview", "stages"],
-                "duration": "Estimated duration from first contact to offer (e.g., '2-4 weeks')",
-                "common_questions": ["List", "of", "commonly", "asked", "questions"],
-                "technical_assessment": true/false,
-                "system_design": true/false,
-                "behavioral_focus": true/false,
-                "coding_challenges": true/false,
-                "take_home_projects": true/false,
-                "difficulty_level": "Easy/Moderate/Difficult"
-            }}
-            
-            Only respond with the JSON object, nothing else. Ensure the response is valid JSON.
-            If a field cannot be determined, use null for that field."""
+            system_prompt = self.prompts.get_interview_process_system_prompt()
+            user_prompt = self.prompts.get_interview_process_user_prompt(
+                state.company, 
+                state.role,
+                research_content
+            )
             
             messages = [
                 SystemMessage(content=system_prompt),
                 HumanMessage(content=user_prompt)
             ]
             
-            # Get the LLM response
-            response = self.llm.invoke(messages, config=config)
-            
-            # Clean and parse the response
-            content = response.content.strip()
-            if '```json' in content:
-                content = content[content.find('```json') + 7:]
-                content = content[:content.rfind('```')].strip()
-            
-            # Parse the JSON response
-            process_data = json.loads(content)
-            
-            # Create the InterviewProcess object with default values for missing fields
-            interview_process = InterviewProcess(
-                typical_stages=process_data.get('typical_stages', ["Unknown"]),
-                duration=process_data.get('duration', 'Unknown'),
-                common_questions=process_data.get('common_questions', []),
-                technical_assessment=process_data.get('technical_assessment', False),
-                system_design=process_data.get('system_design', False),
-                behavioral_focus=process_data.get('behavioral_focus', False),
-                coding_challenges=process_data.get('coding_challenges', False),
-                take_home_projects=process_data.get('take_home_projects', False),
-                difficulty_level=process_data.get('difficulty_level', 'Moderate')
-            )
+            # Small model first; escalates to the strong model if the output does not validate
+            interview_process, usage = self._invoke(state, "research_process", messages, self._parse_process, config=config)
             
             print(f"✅ Successfully extracted interview process for {state.role} at {state.company}")
-            if sources:
-                print(f"   Sources used: {', '.join(sources[:3])}{'...' if len(sources) > 3 else ''}")
-                
-            return {"interview_process": interview_process}
+            self._record_used(records)
+            self._print_sources(documents)
+            return {
+                "interview_process": interview_process,
+                "interview_research_content": refs,
+                "sources": records,
+                "usage": usage,
+                "process_reused_from": None
+            }
             
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse JSON response: {e}")
-            if 'response' in locals():
-                print(f"Response content (first 500 chars): {response.content[:500]}...")
-            return {"interview_process": InterviewProcess(
-                typical_stages=["Unknown"],
-                duration="Unknown",
-                common_questions=[]
-            )}
+        except VALIDATION_ERRORS as e:
+            print(f"❌ Failed to parse interview process response: {str(e)[:500]}")
+            return {
+                "interview_process": unknown,
+                "interview_research_content": refs,
+                "sources": records,
+                "usage": getattr(e, "usage", []),
+                "errors": [f"research_process: invalid model output ({str(e)[:200]})"]
+            }
             
         except Exception as e:
-            print(f"❌ Interview process research failed: {str(e)}")
-            return {"interview_process": InterviewProcess(
-                typical_stages=["Unknown"],
-                duration="Unknown",
-                common_questions=[]
-            )}
+            if is_transient_error(e):
+                raise  # Let the node retry policy / checkpoint resume handle it
+            print(f"❌ Interview process analysis failed: {str(e)}")
+            return {"interview_process": unknown, "interview_research_content": refs, "sources": records,
+                    "errors": [f"research_process: {str(e)[:200]}"]}
+
+    @staticmethod
+    def _parse_process(content: str) -> InterviewProcess:
+        """Parse and validate the interview process extraction response"""
+        return parse_model(InterviewProcess, content, defaults={
+            "typical_stages": ["Initial Screening", "Technical Interview", "Final Round"],
+            "duration": "3-6 weeks"
+        })
+
+    @staticmethod
+    def _parse_guide(content: str) -> PreparationGuide:
+        """Parse and validate the preparation guide response"""
+        return parse_model(PreparationGuide, content)
+
+    # ===== FUSED MODE =====
+    def _gather_all(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """Gather company and interview sources without extracting anything yet"""
+        print(f"🔍 Gathering sources for {state.role} at {state.company}")
+        gathered = {}
+        prefetched = None if state.force else self._prefetched(state.company)
+        for node, query, label in (
+            ("research_company", self._company_query(state.company), "Scraping"),
+            ("research_process", self._process_query(state.company, state.role), "Scraping interview info from"),
+        ):
+            if node == "research_company" and prefetched is not None:
+                gathered[node] = prefetched[1]
+            else:
+                try:
+                    gathered[node] = self._gather_sources(query, node, label, job=research_key(state.company, state.role),
+                                                          company=state.company)
+                except Exception as e:
+                    print(f"🔴 Error gathering sources for {node}: {str(e)}")
+                    gathered[node] = []
+            self.store.save_documents(state.company, state.role, node, gathered[node])
+        print(f"  ✅ Gathered {sum(len(docs) for docs in gathered.values())} sources")
+        return {
+            "research_content": self._store_chunks(gathered["research_company"], "research_company"),
+            "interview_research_content": self._store_chunks(gathered["research_process"], "research_process"),
+            "sources": [record for docs in gathered.values() for record, _ in docs]
+        }
+
+    def _route_gathered(self, state: ResearchState) -> str:
+        """Use the fused call when the gathered evidence fits FUSED_MAX_TOKENS"""
+        tokens = count_tokens(self._resolve_content(state.research_content + state.interview_research_content))
+        if tokens <= FUSED_MAX_TOKENS:
+            print(f"  ⚡ {tokens} evidence tokens fit the fused budget ({FUSED_MAX_TOKENS}); using one LLM call")
+            return "research_fused"
+        print(f"  📚 {tokens} evidence tokens exceed the fused budget ({FUSED_MAX_TOKENS}); using separate calls")
+        return "extract_company"
+
+    def _research_fused(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """Extract background and process and write the guide in one structured LLM call"""
+        print(f"🧩 Researching and writing guide in one call for {state.role} at {state.company}")
+        try:
+            messages = [
+                SystemMessage(content=self.prompts.get_fused_research_system_prompt()),
+                HumanMessage(content=self.prompts.get_fused_research_user_prompt(
+                    state.company,
+                    state.role,
+                    self._resolve_content(state.research_content),
+                    self._resolve_content(state.interview_research_content)
+                ))
+            ]
+            bundle, usage = self._invoke(state, "research_fused", messages, self._parse_fused, config=config)
+            print(f"✅ Successfully generated research and guide for {state.role} at {state.company}")
+            self._record_used(state.sources)
+            return {
+                "background": bundle.background,
+                "interview_process": bundle.interview_process,
+                "preparation_guide": bundle.preparation_guide,
+                "usage": usage
+            }
+        except Exception as e:
+            if is_transient_error(e):
+                raise  # Let the node retry policy / checkpoint resume handle it
+            # No guide in the state routes the run to the separate-call path
+            print(f"⚠️ Fused research failed ({str(e)[:200]}); falling back to separate calls")
+            return {"usage": getattr(e, "usage", [])}
+
+    @staticmethod
+    def _parse_fused(content: str) -> ResearchBundle:
+        """Parse and validate the fused response section by section"""
+        data = extract_json(content)
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected a JSON object for ResearchBundle, got {type(data).__name__}")
+        return ResearchBundle(
+            background=validate_model(CompanyBackground, data.get("background") or {}),
+            interview_process=validate_model(InterviewProcess, data.get("interview_process") or {}, defaults={
+                "typical_stages": ["Initial Screening", "Technical Interview", "Final Round"],
+                "duration": "3-6 weeks"
+            }),
+            preparation_guide=validate_model(PreparationGuide, data.get("preparation_guide") or {})
+        )
+
+    def _node_documents(self, state: ResearchState, node: str) -> List[SourceDocument]:
+        """Rebuild a node's (record, excerpt) pairs from its source records and the chunk store"""
+        documents = []
+        for record in state.sources:
+            if record.node == node:
+                content = self.chunks.get(record.content_hash)
+                if content is not None:
+                    documents.append((record, content))
+        return documents
+
+    def _extract_company_node(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        return self._extract_company(state, self._node_documents(state, "research_company"), config)
+
+    def _extract_process_node(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        return self._extract_process(state, self._node_documents(state, "research_process"), config)
 
     def _generate_guide(self, state: ResearchState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
         """Generate a comprehensive preparation guide based on research"""
+        evidence_chars = sum(ref.chars for ref in state.research_content + state.interview_research_content)
+        if self.budget.stage(self._run_key(state), {"tokens": evidence_chars / 4}) >= 4:
+            print(f"💸 Skipping the preparation guide for {state.role} at {state.company} to stay within budget")
+            # A placeholder like the other fallbacks: reported in errors, so it is not stored
+            return {"preparation_guide": PreparationGuide(
+                strategy="Preparation guide skipped to stay within the research budget; "
+                         "use the company background and interview process above, or run again later."
+            ), "errors": ["generate_guide: skipped for budget"]}
+        if self.sectioned_guide:
+            update = self._generate_guide_sections(state, config)
+            if update is not None:
+                return update
+        
         print(f"📝 Generating preparation guide for {state.role} at {state.company}")
         
         # Prepare context data with proper error handling
-        background = state.background.dict() if state.background else {}
-        interview_process = state.interview_process.dict() if state.interview_process else {}
-        
-        # Get research content and sources for context
-        company_research = getattr(state, 'research_content', "No company research available.")
-        interview_research = getattr(state, 'interview_research_content', "No interview research available.")
+        background = state.background.model_dump() if state.background else {}
+        interview_process = state.interview_process.model_dump() if state.interview_process else {}
         
-        # Get sources for attribution
-        company_sources = getattr(state, 'sources', [])
-        interview_sources = getattr(state, 'interview_sources', [])
+        # Resolve the research evidence from the chunk store at the last moment
+        company_research = self._resolve_content(state.research_content) or "No company research available."
+        interview_research = self._resolve_content(state.interview_research_content) or "No interview research available."
         
         try:
-            # Use the new prompt structure from prompts.py
             system_prompt = self.prompts.get_prep_guide_system_prompt()
             user_prompt = self.prompts.get_prep_guide_user_prompt(
                 company=state.company,
@@ -453,81 +884,317 @@ class Workflow:
                 HumanMessage(content=user_prompt)
             ]
             
-            # Get the LLM response
-            response = self.llm.invoke(messages, config=config)
-            
-            # Clean and parse the response
-            content = response.content.strip()
-            
-            # Extract JSON if present in markdown code block
-            if '```json' in content:
-                content = content[content.find('```json') + 7:]
-                content = content[:content.rfind('```')].strip()
-            
             try:
-                # Try to parse as JSON first
-                guide_data = json.loads(content)
-                
-                # Create the guide object with structured data
-                preparation_guide = PreparationGuide(
-                    overview=guide_data.get('overview', ''),
-                    preparation_timeline=guide_data.get('timeline', {}).get('1_week_before', []) +
-                                        guide_data.get('timeline', {}).get('3_days_before', []) +
-                                        guide_data.get('timeline', {}).get('day_before', []),
-                    technical_preparation=guide_data.get('technical_preparation', {}).get('topics_to_study', []),
-                    behavioral_preparation=guide_data.get('behavioral_preparation', {}).get('common_questions', []),
-                    company_specific_prep=[guide_data.get('behavioral_preparation', {}).get('company_specific_tips', '')],
-                    interview_day_tips=[],
-                    follow_up=[],
-                    additional_resources=guide_data.get('technical_preparation', {}).get('practice_resources', []) +
-                                      guide_data.get('additional_tips', []),
-                    last_updated=datetime.now().isoformat(),
-                    sources={
-                        'company_research': company_sources[:5],  # Limit to top 5 sources
-                        'interview_research': interview_sources[:5]
-                    }
-                )
-                
+                preparation_guide, usage = self._invoke(state, "generate_guide", messages, self._parse_guide, config=config)
                 print(f"✅ Successfully generated structured preparation guide for {state.role} at {state.company}")
-                return {"preparation_guide": preparation_guide}
+                return {"preparation_guide": preparation_guide, "usage": usage}
                 
             except json.JSONDecodeError as e:
                 print(f"⚠️ Could not parse guide as JSON, falling back to markdown. Error: {e}")
-                # Fall back to using the raw content as markdown
-                preparation_guide = PreparationGuide(
-                    overview=content,
-                    preparation_timeline=[],
-                    technical_preparation=[],
-                    behavioral_preparation=[],
-                    company_specific_prep=[],
-                    interview_day_tips=[],
-                    follow_up=[],
-                    additional_resources=[],
-                    last_updated=datetime.now().isoformat(),
-                    sources={
-                        'company_research': company_sources[:5],
-                        'interview_research': interview_sources[:5]
-                    }
-                )
-                
-                print(f"⚠️ Generated guide from markdown content (JSON parsing failed) for {state.role} at {state.company}")
-                return {"preparation_guide": preparation_guide}
+                # Fall back to using the raw content as the strategy text
+                return {"preparation_guide": PreparationGuide(strategy=e.doc), "usage": getattr(e, "usage", [])}
                 
         except Exception as e:
+            if is_transient_error(e):
+                raise  # Let the node retry policy / checkpoint resume handle it
             error_msg = f"❌ Guide generation failed: {str(e)}"
             print(error_msg)
             
             # Create a minimal guide with error information
             return {
                 "preparation_guide": PreparationGuide(
-                    overview=f"# Error Generating Guide\n\n{error_msg}\n\nPlease try again or check the logs for more details.",
-                    last_updated=datetime.now().isoformat(),
-                    sources={}
-                )
+                    strategy=f"Error generating guide: {error_msg}. Please try again or check the logs for more details."
+                ),
+                "usage": getattr(e, "usage", []),
+                "errors": [f"generate_guide: {str(e)[:200]}"]
+            }
+
+    def _generate_guide_sections(self, state: ResearchState,
+                                 config: Optional[RunnableConfig] = None) -> Optional[Dict[str, Any]]:
+        """
+        Write the guide as concurrent per-section calls over one shared context.
+
+        Output tokens dominate guide latency, so the sections in GUIDE_SECTIONS are requested in
+        parallel with their own completion caps and merged into one PreparationGuide; wall time is
+        the slowest section rather than the whole guide. Sections that fail validation are left
+        empty. Returns None when every section failed, so the caller can use the single-call guide.
+        """
+        print(f"📝 Generating preparation guide in {len(GUIDE_SECTIONS)} parallel sections for {state.role} at {state.company}")
+        context = self.prompts.get_guide_context_prompt(
+            company=state.company,
+            role=state.role,
+            background=state.background.model_dump() if state.background else {},
+            process=state.interview_process.model_dump() if state.interview_process else {},
+            company_research=self._resolve_content(state.research_content),
+            interview_research=self._resolve_content(state.interview_research_content)
+        )
+        # Identical system + context prefix on every section keeps the provider's prompt cache warm
+        shared = [SystemMessage(content=self.prompts.get_guide_section_system_prompt()), HumanMessage(content=context)]
+        
+        def write_section(fields: Tuple[str, ...], max_tokens: int) -> Tuple[Dict[str, Any], List[Any]]:
+            messages = shared + [HumanMessage(content=self.prompts.get_guide_section_prompt(fields))]
+            parse = lambda content: self._parse_guide(content).model_dump(include=set(fields))
+            return self._invoke(state, "generate_guide", messages, parse, config=config, max_tokens=max_tokens)
+        
+        values: Dict[str, Any] = {}
+        usage = []
+        failed = []
+        with ThreadPoolExecutor(max_workers=len(GUIDE_SECTIONS), thread_name_prefix="guide") as executor:
+            futures = {
+                name: executor.submit(write_section, fields, max_tokens)
+                for name, (fields, max_tokens) in GUIDE_SECTIONS.items()
             }
+            for name, future in futures.items():
+                try:
+                    section, section_usage = future.result()
+                    values.update(section)
+                    usage.extend(section_usage)
+                except Exception as e:
+                    if is_transient_error(e):
+                        raise  # Let the node retry policy / checkpoint resume handle it
+                    print(f"  ⚠️ Guide section '{name}' failed: {str(e)[:200]}")
+                    usage.extend(getattr(e, "usage", []))
+                    failed.append(name)
+        
+        if len(failed) == len(GUIDE_SECTIONS):
+            print("⚠️ All guide sections failed; generating the guide in one call")
+            return None
+        print(f"✅ Successfully generated {len(GUIDE_SECTIONS) - len(failed)}/{len(GUIDE_SECTIONS)} guide sections for {state.role} at {state.company}")
+        return {"preparation_guide": PreparationGuide(**values), "usage": usage}
+
+    def run(self, company: str, role: str, config: Optional[RunnableConfig] = None,
+            force: bool = False, profile: bool = False, priority: str = "interactive") -> ResearchState:
+        """
+        Execute the research workflow.
+
+        Stored results younger than RESEARCH_MAX_AGE_HOURS are returned immediately; older ones
+        are refreshed incrementally. Pass force=True to always run the full workflow.
+
+        Steps that fall back to placeholder output ("Unknown") are listed in result.errors;
+        such results are returned but not stored.
+
+        Refreshes and full runs are admitted by the admission controller first: priority is
+        "interactive" or "batch", and AdmissionRejected is raised when the run cannot get a
+        slot in time.
+
+        With profile=True every node is profiled (cProfile, sampled stacks, tracemalloc); the
+        reports are written to RESEARCH_PROFILE_DIR and summarized on result.profile.
+        """
+        if not profile:
+            return self._run(company, role, config, force, priority)
+        profiler = RunProfiler(research_key(company, role))
+        token = _run_profiler.set(profiler)
+        try:
+            with profiler:
+                result = self._run(company, role, config, force, priority)
+        finally:
+            _run_profiler.reset(token)
+        summary = profiler.write()
+        print("\n⏱️ Profile by node:")
+        print(format_profile(summary))
+        return result.model_copy(update={"profile": summary})
+
+    def _run(self, company: str, role: str, config: Optional[RunnableConfig] = None,
+             force: bool = False, priority: str = "interactive") -> ResearchState:
+        company = self.companies.resolve(company)
+        if priority == "interactive":
+            try:
+                # Demand signal for the cache warmer; batch jobs are not user demand
+                self.store.log_query(company, role)
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not log query: {e}")
+        if not force:
+            stored = self.store.get(company, role, max_age=self.max_age)
+            if stored is not None:
+                print(f"⚡ Serving stored research for {role} at {company}")
+                return stored
+        with self.admission.slot(priority):
+            if not force and self.store.refreshed_at(company, role):
+                return self.refresh(company, role, config=config)
+            return self._execute(company, role, config, force)
+
+    def _execute(self, company: str, role: str, config: Optional[RunnableConfig] = None,
+                 force: bool = False) -> ResearchState:
+        """
+        Run the graph and persist the result.
+
+        Each (company, role) pair has its own checkpoint thread. If a previous run of the same
+        pair stopped part-way (crash, timeout, retries exhausted), it resumes after the last
+        completed node instead of starting over.
+        """
+        thread_id = self.thread_id(company, role)
+        config = dict(config or {})
+        config["configurable"] = {**config.get("configurable", {}), "thread_id": thread_id}
+        
+        run = research_key(company, role)
+        self.budget.start_run(run)
+        try:
+            snapshot = self.workflow.get_state(config)
+            if snapshot.next:
+                print(f"⏯️ Resuming research for {role} at {company} from: {', '.join(snapshot.next)}")
+                final_state = self.workflow.invoke(None, config=config)
+            else:
+                initial_state = ResearchState(company=company, role=role, force=force)
+                final_state = self.workflow.invoke(initial_state, config=config)
+            
+            result = ResearchState(**final_state)
+            if result.usage:
+                print("\n🧮 LLM usage by node:")
+                print(format_usage(result.usage))
+                print("🧾 Prompt tokens by template:")
+                print(self.prompts.registry.report())
+            print(f"💰 Run spend: {self.budget.report(run)}")
+        finally:
+            self.budget.finish_run(run)
+        # The run finished; the checkpoint is only needed for unfinished runs
+        self.checkpointer.delete_thread(thread_id)
+        if result.errors:
+            # Not stored, so the next request (or a job retry) researches again instead of serving placeholders
+            print(f"⚠️ Research incomplete, result not stored: {'; '.join(result.errors)}")
+            return result
+        self.store.save(result)
+        try:
+            # Learn the name so later misspellings resolve to this research
+            self.companies.add(company)
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not update company index: {e}")
+        return result
+
+    def refresh(self, company: str, role: str, config: Optional[RunnableConfig] = None) -> ResearchState:
+        """
+        Incrementally refresh a stored result.
+
+        Every stored source is checked with a conditional request (ETag/Last-Modified) and,
+        when the server cannot answer that, re-scraped and compared by content hash. Company-site
+        sources are compared with the crawler's current excerpt instead, which it re-fetches when
+        the sitemap lastmod changes. Only the research nodes whose sources changed are re-run,
+        followed by the guide.
+        """
+        company = self.companies.resolve(company)
+        state = self.store.get(company, role)
+        documents = self.store.get_documents(company, role)
+        if state is None or not documents:
+            return self._execute(company, role, config)
+        
+        print(f"🔄 Checking {sum(len(d) for d in documents.values())} stored sources for {role} at {company}")
+        # Usage and errors are appended by their reducers: start this refresh's own
+        state = state.model_copy(update={"usage": [], "errors": []})
+        run = research_key(company, role)
+        self.budget.start_run(run)
+        try:
+            extractors = {
+                "research_company": self._extract_company,
+                "research_process": self._extract_process,
+            }
+            content_fields = {"research_company": "research_content", "research_process": "interview_research_content"}
+            changed_nodes = []
+            refreshed_documents: Dict[str, List[SourceDocument]] = {}
+            probes: Dict[str, Dict[str, Any]] = {}  # url -> conditional request result, shared across nodes
+            site_pages: Dict[str, CrawledPage] = {}
+            if any(record.site for node_documents in documents.values() for record, _ in node_documents):
+                site_pages = {page.url: page for page in self._crawl_site(company, run)}
+            for node, extract in extractors.items():
+                with self._profile_node(node):
+                    refreshed, changed = self._refresh_documents(node, documents.get(node, []), probes, run, site_pages)
+                    refreshed_documents[node] = refreshed
+                    if changed:
+                        state = self._apply_update(state, extract(state, refreshed, config))
+                if changed:
+                    changed_nodes.append(node)
+                else:
+                    # Re-intern the kept excerpts: their chunks may have been evicted since the result was stored
+                    state = self._apply_update(state, {"sources": [record for record, _ in refreshed],
+                                                       content_fields[node]: self._store_chunks(refreshed, node)})
+        
+            if changed_nodes:
+                print(f"  🔁 Re-ran {', '.join(changed_nodes)}; regenerating guide")
+                with self._profile_node("generate_guide"):
+                    state = self._apply_update(state, self._generate_guide(state, config))
+            else:
+                print("  ✅ No source changes; keeping stored research")
+        
+            print(f"💰 Refresh spend: {self.budget.report(run)}")
+        finally:
+            self.budget.finish_run(run)
+        if state.errors:
+            print(f"⚠️ Refresh incomplete, keeping the stored result: {'; '.join(state.errors)}")
+            return state
+        for node, refreshed in refreshed_documents.items():
+            self.store.save_documents(company, role, node, refreshed)
+        self.store.save(state)
+        return state
+
+    def _refresh_documents(self, node: str, documents: List[SourceDocument], probes: Dict[str, Dict[str, Any]],
+                           run: str = "", site_pages: Optional[Dict[str, CrawledPage]] = None
+                           ) -> Tuple[List[SourceDocument], bool]:
+        """
+        Re-validate a node's stored source excerpts, re-scraping only those that may have changed.
+
+        Content hashes are only compared between excerpts produced the same way: search sources
+        are re-scraped with the node's keywords and stored limit, while company-site sources take
+        the crawler's current (unfiltered) excerpt from site_pages.
+        """
+        refreshed = []
+        changed = False
+        for record, content in documents:
+            if record.site:
+                page = (site_pages or {}).get(record.url)
+                if page is None:
+                    # No longer selected by the crawl (or no crawler): keep the stored excerpt
+                    refreshed.append((record, content))
+                    continue
+                # Cut the same way the run did (records stored before max_chars was kept are whole)
+                chunk_id, excerpt = self.chunks.intern(page.excerpt[:record.max_chars] if record.max_chars else page.excerpt)
+                updated = record.model_copy(update={"content_hash": chunk_id, "fetched_at": page.fetched_at})
+                if updated.content_hash != record.content_hash:
+                    print(f"  🔄 Source changed: {record.url}")
+                    changed = True
+                refreshed.append((updated, excerpt))
+                continue
+            if record.url not in probes:
+                probes[record.url] = self.firecrawl.probe_url(record.url, record.etag, record.last_modified)
+            probe = probes[record.url]
+            unchanged = probe["status"] == 304 or (
+                probe["status"] == 200 and (
+                    (record.etag and probe["etag"] == record.etag) or
+                    (record.last_modified and probe["last_modified"] == record.last_modified)
+                )
+            )
+            if unchanged:
+                refreshed.append((record, content))
+                continue
+            
+            # No usable validators: re-scrape the same way the node did and compare content hashes
+            max_chars = record.max_chars or MAX_SOURCE_CHARS
+            scraped = self._scrape(record.url, node, max_chars)
+            self.budget.record(run or node, scrapes=1)
+            markdown = ((scraped.get('markdown') if scraped else None) or "")[:max_chars]
+            if not isinstance(markdown, str) or len(markdown) < 50:
+                # Keep the stored excerpt rather than dropping a source on a transient failure
+                refreshed.append((record, content))
+                continue
+            
+            chunk_id, excerpt = self.chunks.intern(markdown)
+            updated = record.model_copy(update={
+                "content_hash": chunk_id,
+                "etag": probe["etag"],
+                "last_modified": probe["last_modified"],
+                "fetched_at": utc_now()
+            })
+            if updated.content_hash != record.content_hash:
+                print(f"  🔄 Source changed: {record.url}")
+                changed = True
+            refreshed.append((updated, excerpt))
+        return refreshed, changed
 
-    def run(self, company: str, role: str, config: Optional[RunnableConfig] = None) -> ResearchState:
-        """Execute the research workflow"""
-        initial_state = ResearchState(company=company, role=role)
-        final_state = self.workflow.invoke(initial_state, config=config)
-        return ResearchState(**final_state)
\ No newline at end of file
+    @staticmethod
+    def _apply_update(state: ResearchState, update: Dict[str, Any]) -> ResearchState:
+        """Apply a node update outside the graph, honouring the state's field reducers"""
+        values = {}
+        for key, value in update.items():
+            field = ResearchState.model_fields.get(key)
+            if field is None:
+                continue
+            reducer = next((m for m in field.metadata if callable(m)), None)
+            values[key] = reducer(getattr(state, key), value) if reducer else value
+        return state.model_copy(update=values)
@@ -0,0 +1,77 @@
+import threading
+import time
+import pytest
+from src.admission import ADJUST_EVERY, AdmissionController, AdmissionRejected
+
+def test_latency_is_compared_per_upstream_kind():
+    """Healthy LLM calls interleaved with fast scrapes do not look like congestion."""
+    controller = AdmissionController(max_in_flight=4, min_in_flight=1)
+    for _ in range(ADJUST_EVERY * 5):
+        controller.observe(1.0, kind="scrape")
+        controller.observe(15.0, kind="gpt-4o")
+    assert controller.limit == 4
+
+    for _ in range(ADJUST_EVERY):
+        controller.observe(6.0, kind="scrape")  # Scrapes slow down sixfold
+    assert controller.limit == 3
+
+def test_throttling_cuts_the_limit_once_per_cooldown():
+    controller = AdmissionController(max_in_flight=4, min_in_flight=1)
+    controller.observe(1.0, throttled=True)
+    controller.observe(1.0, throttled=True)
+    assert controller.limit == 3
+    assert controller.stats()["throttled"] == 2
+
+def test_disabled_queue_rejects_instead_of_failing():
+    controller = AdmissionController(max_in_flight=1, queue_size=0)
+    with controller.slot():
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.acquire("interactive", timeout=5)
+    assert rejected.value.status == AdmissionRejected.QUEUE_FULL
+    assert controller.stats()["in_flight"] == 0
+
+def _wait_queued(controller, count):
+    while controller.stats()["queued"] < count:
+        time.sleep(0.01)
+
+def test_interactive_run_displaces_queued_batch_run():
+    controller = AdmissionController(max_in_flight=1, queue_size=1)
+    outcomes = {}
+
+    def run(name, priority):
+        try:
+            with controller.slot(priority, timeout=5):
+                outcomes[name] = "admitted"
+        except AdmissionRejected as e:
+            outcomes[name] = e.status
+
+    controller.acquire()
+    batch = threading.Thread(target=run, args=("batch", "batch"))
+    batch.start()
+    _wait_queued(controller, 1)
+    interactive = threading.Thread(target=run, args=("interactive", "interactive"))
+    interactive.start()
+    batch.join(timeout=5)
+    assert outcomes["batch"] == AdmissionRejected.SHED
+    controller.release()
+    interactive.join(timeout=5)
+    assert outcomes["interactive"] == "admitted"
+
+def test_run_is_rejected_after_its_deadline():
+    controller = AdmissionController(max_in_flight=1)
+    with controller.slot():
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.acquire("interactive", timeout=0.05)
+    assert rejected.value.status == AdmissionRejected.DEADLINE
+    assert controller.stats()["queued"] == 0
+
+def test_prefetch_takes_a_slot_but_never_waits(make_workflow):
+    controller = AdmissionController(max_in_flight=1)
+    workflow = make_workflow(admission=controller)
+    with controller.slot():
+        with pytest.raises(AdmissionRejected):
+            workflow.prefetch_company("Acme").result(timeout=5)
+
+    workflow.prefetch_company("Acme").result(timeout=5)  # A failed prefetch is retried
+    assert controller.stats()["admitted"] == 2
+    assert controller.stats()["in_flight"] == 0
@@ -0,0 +1,69 @@
+import sqlite3
+import time
+from types import SimpleNamespace
+import pytest
+from conftest import FakeWeb
+from src.budget import BudgetGovernor
+
+def make_governor(tmp_path, **kwargs):
+    kwargs.setdefault("run_limits", {"searches": 10})
+    kwargs.setdefault("window_limits", {"tokens": 0})
+    return BudgetGovernor(path=str(tmp_path / "budget.db"), **kwargs)
+
+def test_stages_follow_run_spend(tmp_path):
+    budget = make_governor(tmp_path)
+    budget.start_run("acme")
+    stages = []
+    for searches in (5, 1, 1.5, 1, 1):  # 50%, 60%, 75%, 85%, 95%
+        budget.record("acme", searches=searches)
+        stages.append(budget.stage("acme"))
+    assert stages == [0, 1, 2, 3, 4]
+    assert budget.stage("other") == 0  # Run budgets are per run
+    assert budget.finish_run("acme")["searches"] == 9.5
+
+def test_upcoming_spend_counts_towards_the_stage(tmp_path):
+    budget = make_governor(tmp_path, run_limits={"tokens": 1000})
+    budget.record("acme", tokens=500)
+    assert budget.stage("acme") == 0
+    assert budget.stage("acme", {"tokens": 450}) == 4
+
+def test_window_budget_is_shared_and_rolls_over(tmp_path):
+    make_governor(tmp_path).record("acme", tokens=900)
+    other = make_governor(tmp_path, window_limits={"tokens": 1000})
+    assert other.stage("globex") == 3  # Spend from another process counts
+
+    with sqlite3.connect(other.path) as conn:
+        conn.execute("UPDATE spend SET ts = ?", (time.time() - 40 * 86400,))
+    assert make_governor(tmp_path, window_limits={"tokens": 1000}).stage("globex") == 0
+
+def test_workflow_degrades_under_budget_pressure(make_workflow, tmp_path):
+    from src.workflow import MAX_SOURCE_CHARS, MAX_SOURCES
+    budget = make_governor(tmp_path, run_limits={"tokens": 0}, window_limits={"tokens": 1000})
+    budget.record("earlier", tokens=1000)  # The shared window is used up
+    workflow = make_workflow(budget=budget)
+    assert workflow._source_limits("acme|engineer") == (MAX_SOURCES - 1, MAX_SOURCE_CHARS // 2)
+
+    result = workflow.run("Acme", "Engineer")
+    assert len(result.source_urls("research_company")) <= MAX_SOURCES - 1
+    assert all(record.max_chars == MAX_SOURCE_CHARS // 2 for record in result.sources)
+    assert result.preparation_guide.strategy.startswith("Preparation guide skipped")
+    assert result.errors == ["generate_guide: skipped for budget"]
+    assert workflow.store.get("Acme", "Engineer") is None  # A skipped guide is never served from the store
+
+def test_runs_are_finished_when_research_fails(make_workflow):
+    class BrokenSearch(FakeWeb):
+        def search_web(self, query, num_results=5):
+            raise RuntimeError("search down")
+
+    workflow = make_workflow(web=BrokenSearch())
+    update, _ = workflow._company_research("Acme")
+    assert update["errors"]
+    assert workflow.budget._runs == {}
+
+    def invoke(state, config=None):
+        workflow.budget.record("acme|engineer", searches=1)
+        raise RuntimeError("graph failed")
+    workflow.workflow = SimpleNamespace(get_state=lambda config: SimpleNamespace(next=()), invoke=invoke)
+    with pytest.raises(RuntimeError):
+        workflow._execute("Acme", "Engineer")
+    assert workflow.budget._runs == {}
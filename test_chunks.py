@@ -0,0 +1,72 @@
+from src.models import MAX_CONTENT_REFS, ContentRef, merge_content
+
+def test_merge_content_replaces_node_refs_and_dedupes():
+    left = [ContentRef(chunk_id="a", node="research_company"), ContentRef(chunk_id="b", node="research_process")]
+    right = [ContentRef(chunk_id="c", node="research_company"), ContentRef(chunk_id="b", node="research_company")]
+    merged = merge_content(left, right)
+    # The company node's old reference is replaced; chunk "b" is kept once
+    assert [ref.chunk_id for ref in merged] == ["b", "c"]
+
+    many = [ContentRef(chunk_id=str(i), node="research_company") for i in range(MAX_CONTENT_REFS + 5)]
+    assert len(merge_content([], many)) == MAX_CONTENT_REFS
+
+def test_state_carries_chunk_references(make_workflow):
+    """Evidence reaches the guide as chunk ids that resolve to the scraped excerpts."""
+    workflow = make_workflow()
+    result = workflow.run("Acme", "Engineer")
+    refs = result.research_content + result.interview_research_content
+    assert refs
+    for ref in refs:
+        text = workflow.chunks.get(ref.chunk_id)
+        assert text is not None and len(text) == ref.chars
+    assert {ref.chunk_id for ref in result.research_content} == {
+        record.content_hash for record in result.sources if record.node == "research_company"
+    }
+
+def test_disk_tier_is_capped_and_keeps_recently_read_chunks(tmp_path):
+    import os
+    from src.chunks import ChunkStore
+
+    store = ChunkStore(max_total_chars=1, directory=str(tmp_path), max_disk_bytes=3500)
+    first, _ = store.intern("a" * 1000)
+    os.utime(store._path(first), (1, 1))
+    second, _ = store.intern("b" * 1000)
+    os.utime(store._path(second), (2, 2))
+    assert store.get(first) == "a" * 1000  # Reading marks the chunk as recently used
+    store.intern("c" * 1000)
+    store.intern("d" * 1000)  # Over the cap: the least recently used file goes
+    assert store.get(second) is None
+    assert store.get(first) == "a" * 1000
+    assert sum(size for _, size, _ in store._files()) <= 3500
+
+def test_cache_size_has_one_default():
+    from src import chunks
+    assert chunks.ChunkStore().max_total_chars == chunks.CACHE_CHARS == chunks.chunk_store.max_total_chars
+
+def test_concurrent_writes_of_a_chunk_are_counted_once(tmp_path):
+    import threading
+    from src.chunks import ChunkStore
+
+    store = ChunkStore(max_total_chars=1, directory=str(tmp_path))
+    barrier = threading.Barrier(8)
+
+    def write():
+        barrier.wait()
+        store._write("ab" * 32, "x" * 1000)
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store._disk_bytes == 1000
+
+def test_prompt_context_is_joined_from_chunk_views(make_workflow):
+    workflow = make_workflow()
+    first, _ = workflow.chunks.intern("first excerpt " * 10)
+    assert list(workflow.chunks.iter_text([first, "missing"])) == [(first, "first excerpt " * 10)]
+
+    from src.models import ContentRef
+    refs = [ContentRef(chunk_id=first, node="research_company", url="https://a.example"),
+            ContentRef(chunk_id="missing", node="research_company", url="https://b.example")]
+    context = workflow._resolve_content(refs)
+    assert "https://a.example" in context and "https://b.example" not in context
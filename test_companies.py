@@ -0,0 +1,39 @@
+from src.companies import CompanyIndex, _edit_distance, normalize_company
+
+def make_index(tmp_path):
+    return CompanyIndex(str(tmp_path / "companies.db"))
+
+def test_normalize_company_drops_legal_suffixes():
+    assert normalize_company("The Walt Disney Co.") == "walt disney"
+    assert normalize_company("Google LLC") == "google"
+
+def test_lookup_by_alias_ticker_and_domain(tmp_path):
+    index = make_index(tmp_path)
+    assert index.lookup("Alphabet Inc.") == "Google"
+    assert index.lookup("msft") == "Microsoft"
+    assert index.lookup("https://careers.google.com/jobs") == "Google"
+
+def test_lookup_tolerates_typos(tmp_path):
+    index = make_index(tmp_path)
+    assert index.lookup("Microsft") == "Microsoft"
+    assert index.lookup("Micorsoft") == "Microsoft"
+    assert index.lookup("Salesfroce") == "Salesforce"
+
+def test_lookup_does_not_guess_unrelated_names(tmp_path):
+    index = make_index(tmp_path)
+    assert index.lookup("Beta") is None  # Short names need an exact match
+    assert index.lookup("Microchip") is None
+    assert index.lookup("Stride") is None  # One letter from Stripe, but too short for a typo match
+    assert index.lookup("Acme Robotics") is None
+
+def test_learned_names_persist_and_resolve_misspelled(tmp_path):
+    make_index(tmp_path).add("Databricks", domains=["databricks.com"])
+    index = make_index(tmp_path)
+    assert index.resolve("  Databricks  ") == "Databricks"
+    assert index.resolve("Databriks") == "Databricks"
+    assert index.domains("Databricks") == ["databricks.com"]
+
+def test_edit_distance_counts_swaps_once():
+    assert _edit_distance("microsft", "microsoft") == 1
+    assert _edit_distance("micorsoft", "microsoft") == 1
+    assert _edit_distance("kitten", "sitting") == 3
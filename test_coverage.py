@@ -0,0 +1,25 @@
+from conftest import FakeWeb, PAGE_TEXT
+from src.coverage import estimate_coverage
+from src.workflow import COVERAGE_TARGET, MIN_SOURCES, SOURCE_CAP
+
+THIN_TEXT = "Acme culture is discussed on its blog, which covers various topics of general interest. " * 3
+
+def test_estimate_coverage_scores_field_signals():
+    rich = estimate_coverage("research_company", [PAGE_TEXT * 2])
+    assert rich.score >= COVERAGE_TARGET
+    thin = estimate_coverage("research_company", [THIN_TEXT])
+    assert thin.score < COVERAGE_TARGET
+    assert "company_size" in thin.missing
+    assert estimate_coverage("generate_guide", [PAGE_TEXT]) is None
+
+def test_gathering_stops_once_fields_are_covered(make_workflow):
+    web = FakeWeb()
+    workflow = make_workflow(web=web)
+    documents = workflow._gather_sources("acme company profile", "research_company", "Scraping", job="acme")
+    assert len(documents) == len(web.scrapes) == MIN_SOURCES
+
+def test_gathering_continues_while_pages_are_thin(make_workflow):
+    web = FakeWeb({f"https://site{i}.example/post": THIN_TEXT for i in range(6)})
+    workflow = make_workflow(web=web)
+    documents = workflow._gather_sources("acme company profile", "research_company", "Scraping", job="acme")
+    assert len(documents) == len(web.scrapes) == SOURCE_CAP
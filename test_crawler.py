@@ -0,0 +1,113 @@
+import pytest
+from conftest import FakeWeb, PAGE_TEXT
+from src.companies import CompanyIndex
+from src.crawler import SiteCrawler, classify, page_score, parse_sitemap, registrable_domain
+from src.scheduler import ScrapeScheduler
+
+CAREERS = "https://acme.example/careers/how-we-hire"
+BLOG = "https://acme.example/engineering/architecture"
+LISTING = "https://acme.example/jobs/123456"
+
+def _sitemap(pages):
+    urls = "".join(f"<url><loc>{url}</loc><lastmod>{lastmod}</lastmod></url>" for url, lastmod in pages.items())
+    return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'.encode()
+
+@pytest.fixture
+def site(monkeypatch):
+    """robots.txt, sitemap and pages of acme.example, served instead of the network"""
+    lastmods = {CAREERS: "2024-01-01", BLOG: "2024-01-01", LISTING: "2024-01-01",
+                "https://acme.example/careers/internal": "2024-01-01", "https://acme.example/pricing": "2024-01-01"}
+    robots = b"User-agent: *\nDisallow: /careers/internal\nSitemap: https://acme.example/sitemap.xml\n"
+
+    def get(url, max_bytes):
+        if url == "https://acme.example/robots.txt":
+            return robots
+        if url == "https://acme.example/sitemap.xml":
+            return _sitemap(lastmods)
+        return None
+
+    monkeypatch.setattr(SiteCrawler, "_get", staticmethod(get))
+    web = FakeWeb({url: PAGE_TEXT * 4 for url in lastmods})
+    return web, lastmods
+
+@pytest.fixture
+def make_crawler(tmp_path):
+    companies = CompanyIndex(str(tmp_path / "companies.db"))
+    scheduler = ScrapeScheduler(max_workers=2, spacing=0, limits={})
+    return lambda **kwargs: SiteCrawler(str(tmp_path / "crawl.db"), companies=companies, scheduler=scheduler, **kwargs)
+
+def test_urls_are_classified_and_ranked():
+    assert classify(CAREERS) == "careers"
+    assert classify("https://careers.acme.example/teams") == "careers"
+    assert classify(BLOG) == "engineering"
+    assert classify("https://acme.example/pricing") is None
+    assert page_score(CAREERS, "careers") > page_score(LISTING, "careers")
+    assert registrable_domain("careers.acme.co.uk") == "acme.co.uk"
+
+def test_sitemap_index_and_truncated_sitemap_are_parsed():
+    index = b'<sitemapindex><sitemap><loc>https://acme.example/careers.xml</loc></sitemap></sitemapindex>'
+    assert parse_sitemap(index) == (["https://acme.example/careers.xml"], [])
+    truncated = _sitemap({CAREERS: "2024-01-01", BLOG: "2024-02-01"})[:-40]
+    assert parse_sitemap(truncated) == ([], [(CAREERS, "2024-01-01")])
+
+def test_crawl_selects_allowed_section_pages(site, make_crawler):
+    web, _ = site
+    crawler = make_crawler(max_pages=2)
+    crawl = crawler.crawl("Acme", web)
+    assert crawl.searches == 1  # The site was found by searching for its careers page
+    assert {page.url for page in crawl.pages} == {CAREERS, BLOG}
+    assert all(max_chars and not keywords for _, max_chars, keywords in web.scrapes)
+    # robots.txt and the sitemap are charged along with the two pages
+    assert crawler.budget.finish_run("acme") == {"searches": 1, "scrapes": 4, "tokens": 0}
+
+def test_later_crawls_fetch_only_changed_pages(site, make_crawler):
+    web, lastmods = site
+    crawler = make_crawler(max_pages=2)
+    crawler.crawl("Acme", web)
+    scrapes = len(web.scrapes)
+
+    again = crawler.crawl("Acme", web)
+    assert (again.fetched, again.searches) == (0, 0)
+    assert len(web.scrapes) == scrapes
+
+    lastmods[BLOG] = "2024-03-01"
+    web.pages[BLOG] = PAGE_TEXT * 5
+    crawler._save_site("acme", {**crawler._site("acme"), "checked_at": None})  # Sitemap due for a re-read
+    changed = crawler.crawl("Acme", web)
+    assert changed.fetched == 1
+    assert [url for url, _, _ in web.scrapes[scrapes:]] == [BLOG]
+    assert next(page for page in changed.pages if page.url == BLOG).excerpt == PAGE_TEXT * 5
+
+def test_refresh_compares_site_sources_with_the_crawl(site, make_crawler, make_workflow):
+    """Site pages are stored unfiltered, so refresh must not re-scrape them with the node keywords."""
+    web, lastmods = site
+    crawler = make_crawler(max_pages=2)
+    workflow = make_workflow(web=web, crawler=crawler, companies=crawler.companies)
+    crawler.crawl("Acme", web)
+    result = workflow.run("Acme", "Engineer")
+    assert any(record.site for record in result.sources)
+
+    prompts = len(workflow.model.prompts)
+    workflow.refresh("Acme", "Engineer")
+    assert len(workflow.model.prompts) == prompts
+    assert not [url for url, _, keywords in web.scrapes if url in (CAREERS, BLOG) and keywords]
+
+    lastmods[CAREERS] = "2024-03-01"
+    web.pages[CAREERS] = PAGE_TEXT.replace("3-4 weeks", "6 weeks") * 4
+    crawler._save_site("acme", {**crawler._site("acme"), "checked_at": None})
+    crawler.crawl_later("Acme", web).result(timeout=5)
+    refreshed = workflow.refresh("Acme", "Engineer")
+    assert len(workflow.model.prompts) > prompts
+    stored = {record.url: record for record in refreshed.sources}
+    assert stored[CAREERS].site
+
+def test_research_runs_leave_discovery_to_the_background(site, make_crawler, make_workflow):
+    web, _ = site
+    crawler = make_crawler(max_pages=2)
+    workflow = make_workflow(web=web, crawler=crawler, companies=crawler.companies)
+    assert workflow._site_sources("Acme", "research_process", "run") == []
+    crawler.crawl_later("Acme", web).result(timeout=5)
+    assert crawler.budget.totals()["scrapes"] == 4  # Charged to the background crawl's own run
+
+    documents = workflow._site_sources("Acme", "research_process", "run", max_chars=100)
+    assert documents and all(len(excerpt) == 100 and record.max_chars == 100 for record, excerpt in documents)
@@ -0,0 +1,26 @@
+import sqlite3
+import time
+from src.domains import MIN_ATTEMPTS, DomainStats, domain_of
+
+def test_domain_of_strips_www_and_port():
+    assert domain_of("https://www.Example.com:8443/path") == "example.com"
+
+def test_rank_prefers_reliable_domains_and_skips_failing_ones(tmp_path):
+    stats = DomainStats(str(tmp_path / "domains.db"))
+    stats.record_scrapes([("https://good.example/a", True, 5000, 0.5)] * 5)
+    stats.record_scrapes([("https://paywall.example/a", False, 0, 0.5)] * MIN_ATTEMPTS * 2)
+    stats.record_used(["https://good.example/a"] * 3)
+
+    urls = ["https://unknown.example/a", "https://paywall.example/b", "https://good.example/b"]
+    assert stats.rank(urls) == ["https://good.example/b", "https://unknown.example/a"]
+    # Blocked domains still fill the minimum when nothing else is left
+    assert stats.rank(urls, keep=3)[-1] == "https://paywall.example/b"
+
+def test_old_failures_decay(tmp_path):
+    stats = DomainStats(str(tmp_path / "domains.db"), half_life_days=1)
+    stats.record_scrapes([("https://flaky.example/a", False, 0, 0.5)] * MIN_ATTEMPTS * 2)
+    assert stats.rank(["https://flaky.example/b"]) == []
+
+    with sqlite3.connect(stats.path) as conn:
+        conn.execute("UPDATE domain_stats SET updated_at = ?", (time.time() - 10 * 86400,))
+    assert stats.rank(["https://flaky.example/b"]) == ["https://flaky.example/b"]
@@ -0,0 +1,48 @@
+import pytest
+from src.export import NESTED_MODELS, flatten_result
+from src.models import CompanyBackground, InterviewProcess, NodeUsage, ResearchState, SourceRecord
+
+STATE = ResearchState(
+    company="Acme",
+    role="Engineer",
+    background=CompanyBackground(company_size="1001-5000", industry="Fintech", company_culture="Remote"),
+    interview_process=InterviewProcess(typical_stages=["Screen", "Onsite"], duration="3 weeks", system_design=True),
+    sources=[SourceRecord(url="https://acme.example/jobs", node="research_company")],
+    usage=[NodeUsage(node="research_company", model="gpt-4o-mini", input_tokens=100, output_tokens=20)],
+)
+
+def test_flatten_result_prefixes_nested_fields_and_adds_aggregates():
+    row = flatten_result(STATE, "2026-01-02T03:04:05+00:00")
+    assert row["key"] == "acme|engineer"
+    assert row["background_industry"] == "Fintech"
+    assert row["interview_process_typical_stages"] == ["Screen", "Onsite"]
+    assert row["interview_process_system_design"] is True
+    assert row["preparation_guide_strategy"] is None  # Missing model: null columns
+    assert (row["source_count"], row["llm_calls"], row["input_tokens"], row["output_tokens"]) == (1, 1, 100, 20)
+    assert row["refreshed_at"].year == 2026
+
+def test_schema_matches_flattened_rows():
+    pytest.importorskip("pyarrow")
+    from src.export import result_schema
+    schema = result_schema()
+    assert set(schema.names) == set(flatten_result(STATE))
+    for prefix, model in NESTED_MODELS.items():
+        assert all(f"{prefix}_{name}" in schema.names for name in model.model_fields)
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_export_round_trips_stored_results(tmp_path, suffix):
+    pytest.importorskip("pyarrow")
+    from src.export import export_results, iter_rows
+    from src.store import ResultStore
+
+    store = ResultStore(str(tmp_path / "results.db"))
+    store.save(STATE)
+    store.save(STATE.model_copy(update={"role": "Designer", "background": None}))
+    path = str(tmp_path / f"results{suffix}")
+    assert export_results(path, store=store, batch_size=1) == 2
+
+    rows = {row["role"]: row for row in iter_rows(path, columns=["role", "background_industry"])}
+    assert rows == {
+        "Engineer": {"role": "Engineer", "background_industry": "Fintech"},
+        "Designer": {"role": "Designer", "background_industry": None},
+    }
@@ -0,0 +1,123 @@
+import time
+import pytest
+from src import jobs
+from src.jobs import RedisJobQueue, ResearchWorker, SQLiteJobQueue, retry_delay
+from src.models import ResearchState
+
+@pytest.fixture(params=["sqlite", "redis"])
+def queue(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    # The Lua scripts run on fakeredis when it is installed with Lua support
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return RedisJobQueue(prefix="test:jobs", client=fakeredis.FakeRedis(decode_responses=True))
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(jobs, "RETRY_BACKOFF", 0.0)
+
+def test_claim_leases_a_job_to_one_worker(queue):
+    job_id = queue.enqueue("Acme", "Engineer")
+    job = queue.claim("w1", visibility_timeout=60)
+    assert (job.id, job.status, job.attempts, job.lease_owner) == (job_id, "running", 1, "w1")
+    assert queue.claim("w2", visibility_timeout=60) is None
+    assert queue.heartbeat(job_id, "w1", 60)
+    assert not queue.heartbeat(job_id, "w2", 60)
+
+def test_expired_lease_is_reclaimed(queue):
+    job_id = queue.enqueue("Acme", "Engineer")
+    queue.claim("w1", visibility_timeout=0.01)
+    time.sleep(0.05)
+    job = queue.claim("w2", visibility_timeout=60)
+    assert (job.id, job.lease_owner, job.attempts) == (job_id, "w2", 2)
+    # The first worker lost the job: its late report changes nothing
+    assert queue.fail(job_id, "w1", "too late") == "lost"
+    assert queue.get(job_id).lease_owner == "w2"
+
+def test_expired_lease_on_last_attempt_is_dead_lettered(queue):
+    job_id = queue.enqueue("Acme", "Engineer", max_attempts=1)
+    queue.claim("w1", visibility_timeout=0.01)
+    time.sleep(0.05)
+    assert queue.claim("w2") is None
+    job = queue.get(job_id)
+    assert job.status == "dead" and "visibility timeout" in job.error
+
+def test_failed_job_waits_for_its_backoff(queue):
+    job_id = queue.enqueue("Acme", "Engineer")
+    queue.claim("w1")
+    before = time.time()
+    assert queue.fail(job_id, "w1", "boom") == "queued"
+    job = queue.get(job_id)
+    assert job.error == "boom"
+    assert float(job.available_at) >= before + retry_delay(1) - 1
+    assert queue.claim("w1") is None
+
+def test_job_is_dead_lettered_after_max_attempts(queue, no_backoff):
+    job_id = queue.enqueue("Acme", "Engineer", max_attempts=2)
+    for expected in ("queued", "dead"):
+        assert queue.claim("w1").id == job_id
+        assert queue.fail(job_id, "w1", "boom") == expected
+    assert queue.claim("w1") is None
+    assert queue.stats() == {"dead": 1}
+
+def test_released_job_returns_without_using_an_attempt(queue):
+    job_id = queue.enqueue("Acme", "Engineer", max_attempts=1)
+    queue.claim("w1")
+    assert queue.release(job_id, "w2", delay=0) == "lost"
+    assert queue.release(job_id, "w1", delay=0) == "queued"
+    job = queue.get(job_id)
+    assert (job.status, int(job.attempts), job.lease_owner) == ("queued", 0, None)
+    assert queue.claim("w1").id == job_id  # Still claimable on its only attempt
+
+def test_retry_delay_doubles():
+    assert [retry_delay(n) for n in (1, 2, 3)] == [jobs.RETRY_BACKOFF * k for k in (1, 2, 4)]
+
+class ScriptedWorkflow:
+    """Returns (or raises) the given outcomes in order."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    def run(self, company, role, priority="interactive"):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+def test_worker_retries_incomplete_results_and_stores_complete_ones(tmp_path, no_backoff):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("Acme", "Engineer")
+    incomplete = ResearchState(company="Acme", role="Engineer", errors=["research_company: no sources found"])
+    complete = ResearchState(company="Acme", role="Engineer")
+    worker = ResearchWorker(queue, ScriptedWorkflow(RuntimeError("rate limited"), incomplete, complete))
+
+    job = worker.run_once()
+    assert (job.id, job.status, job.error) == (job_id, "queued", "RuntimeError: rate limited")
+    job = worker.run_once()
+    assert job.status == "queued" and "no sources found" in job.error
+    job = worker.run_once()
+    assert (job.status, job.error, job.result) == ("done", None, complete)
+
+def test_worker_requeues_jobs_rejected_by_admission(tmp_path, monkeypatch):
+    from src.admission import AdmissionRejected
+    monkeypatch.setattr(jobs, "RELEASE_DELAY", 0.0)
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("Acme", "Engineer", max_attempts=1)
+    complete = ResearchState(company="Acme", role="Engineer")
+    shed = AdmissionRejected(AdmissionRejected.SHED, "displaced")
+    worker = ResearchWorker(queue, ScriptedWorkflow(shed, shed, complete))
+
+    for _ in range(2):
+        job = worker.run_once()
+        assert (job.id, job.status, job.attempts, job.error) == (job_id, "queued", 0, None)
+    assert worker.run_once().status == "done"
+
+def test_incomplete_research_is_reported_and_not_stored(make_workflow):
+    from conftest import FakeWeb
+    web = FakeWeb()
+    web.search_web = lambda query, num_results=5: []
+    workflow = make_workflow(web=web)
+    result = workflow.run("Acme", "Engineer")
+    assert any(error.startswith("research_company") for error in result.errors)
+    assert workflow.store.get("Acme", "Engineer") is None
@@ -0,0 +1,35 @@
+def test_forced_run_does_not_reuse_prefetched_research(make_workflow, capsys):
+    workflow = make_workflow()
+    workflow.prefetch_company("Acme").result()
+    workflow.run("Acme", "Engineer")
+    assert "Using prefetched company research" in capsys.readouterr().out
+
+    workflow.run("Acme", "Engineer", force=True)
+    assert "Using prefetched company research" not in capsys.readouterr().out
+
+def test_reusing_a_prefetch_keeps_its_creation_time(make_workflow):
+    workflow = make_workflow()
+    workflow.prefetch_company("Acme").result()
+    created = workflow._prefetch["acme"][1]
+    workflow.run("Acme", "Engineer")
+    workflow.run("Acme", "Designer")
+    assert workflow._prefetch["acme"][1] == created
+
+def test_forced_run_does_not_reuse_stored_company_research(make_workflow):
+    workflow = make_workflow()
+    workflow.run("Acme", "Engineer")
+    searches = workflow.firecrawl.searches
+    workflow._prefetch.clear()
+
+    workflow.run("Acme", "Designer")
+    assert workflow.firecrawl.searches == searches + 1  # Company research stored with Engineer is reused
+
+    workflow.run("Acme", "Designer", force=True)
+    assert workflow.firecrawl.searches == searches + 3
+
+def test_only_interactive_queries_are_logged(make_workflow):
+    workflow = make_workflow()
+    workflow.run("Acme", "Engineer", priority="batch")
+    assert workflow.store.popular(since=3600) == []
+    workflow.run("Acme", "Engineer")
+    assert workflow.store.popular(since=3600) == [("Acme", "Engineer", 1)]
@@ -0,0 +1,26 @@
+import threading
+import tracemalloc
+
+def test_overlapping_runs_keep_separate_profiles(make_workflow, tmp_path, monkeypatch):
+    from src import profiling
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    workflow = make_workflow()
+    results = {}
+
+    def research(company, profile):
+        results[company] = workflow.run(company, "Engineer", profile=profile)
+
+    threads = [threading.Thread(target=research, args=(company, profile))
+               for company, profile in (("Acme", True), ("Globex", True), ("Initech", False))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for company in ("Acme", "Globex"):
+        nodes = [node.node for node in results[company].profile.nodes]
+        # Each profile holds exactly its own run's nodes
+        assert nodes.count("research_company") == 1
+        assert nodes.count("generate_guide") == 1
+    assert results["Initech"].profile is None
+    assert not tracemalloc.is_tracing()  # Stopped once the last profiled run finished
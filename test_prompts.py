@@ -0,0 +1,99 @@
+import json
+from typing import get_origin
+from pydantic import BaseModel
+from src.models import CompanyBackground, InterviewProcess, PreparationGuide, ResearchBundle
+from src.prompts import GUIDE_INSTRUCTIONS, InterviewResearchPrompts, minify, registry
+from src.schemas import parse_model, prompt_schema
+
+# Prompt template -> model its response is parsed into
+PROMPT_MODELS = {
+    "company_research": CompanyBackground,
+    "interview_process": InterviewProcess,
+    "prep_guide": PreparationGuide,
+    "fused_research": ResearchBundle,
+}
+# Templates whose response schema is sent per request instead of in the system message
+SECTION_TEMPLATES = {"guide_section"}
+
+def sample_response(model: type[BaseModel]) -> dict:
+    """Build a response with a non-default value for every field of a model."""
+    sample = {}
+    for name, field in model.model_fields.items():
+        if isinstance(field.annotation, type) and issubclass(field.annotation, BaseModel):
+            sample[name] = sample_response(field.annotation)
+        elif field.annotation is bool:
+            sample[name] = True
+        elif get_origin(field.annotation) is list:
+            sample[name] = [f"{name} 1", f"{name} 2"]
+        else:
+            sample[name] = f"sample {name}"
+    return sample
+
+def test_every_template_renders():
+    """Every registered prompt renders with all placeholders filled and asks for its model's fields."""
+    assert {template.name for template in registry} == set(PROMPT_MODELS) | SECTION_TEMPLATES
+    for template in registry:
+        user = template.render_user(**{field: f"<{field}>" for field in template.fields})
+        for field in template.fields:
+            assert f"<{field}>" in user
+        assert "{" not in user.replace("{}", "")
+        if template.name in SECTION_TEMPLATES:
+            continue
+        model = PROMPT_MODELS[template.name]
+        assert prompt_schema(model) in template.system
+        for name in model.model_fields:
+            assert f'"{name}"' in template.system
+
+def test_guide_prompts_share_instructions():
+    """The guide-writing prompts carry the same instructions, from one constant."""
+    for name in ("prep_guide", "guide_section", "fused_research"):
+        assert minify(GUIDE_INSTRUCTIONS) in registry[name].system
+
+def test_prompt_helpers_render():
+    prompts = InterviewResearchPrompts()
+    assert "Acme" in prompts.get_company_research_user_prompt("Acme", "content")
+    assert "Engineer" in prompts.get_interview_process_user_prompt("Acme", "Engineer", "content")
+    assert "Engineer" in prompts.get_prep_guide_user_prompt("Acme", "Engineer", {}, {}, "company", "interview")
+    assert "Engineer" in prompts.get_fused_research_user_prompt("Acme", "Engineer", "company", "interview")
+
+def test_guide_sections_cover_the_guide():
+    """Parallel guide sections together ask for every PreparationGuide field exactly once."""
+    from src.workflow import GUIDE_SECTIONS
+    requested = [field for fields, _ in GUIDE_SECTIONS.values() for field in fields]
+    assert sorted(requested) == sorted(PreparationGuide.model_fields)
+    for fields, max_tokens in GUIDE_SECTIONS.values():
+        prompt = InterviewResearchPrompts.get_guide_section_prompt(fields)
+        assert max_tokens > 0
+        for name in PreparationGuide.model_fields:
+            assert (f'"{name}"' in prompt) == (name in fields)
+
+def test_concurrent_renders_are_all_counted():
+    from concurrent.futures import ThreadPoolExecutor
+    from src.prompts import PromptTemplate
+    template = PromptTemplate("test", "System.", "Company: {company}")
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: template.render_user(company="x" * 400), range(400)))
+    assert template.renders == 400
+    assert template.last_tokens == template.static_tokens + 103  # "Company: " + 400 chars, estimated
+
+def test_sample_responses_round_trip():
+    """A response following each schema parses into the model without losing any field."""
+    for model in PROMPT_MODELS.values():
+        sample = sample_response(model)
+        fenced = f"Here you go:\n```json\n{json.dumps(sample, indent=2)}\n```"
+        parsed = parse_model(model, fenced)
+        assert parsed.model_dump() == sample
+
+def test_parse_fills_missing_and_null_fields():
+    parsed = parse_model(CompanyBackground, '{"industry": "Software", "values": null, "extra": 1}')
+    assert parsed.industry == "Software"
+    assert parsed.company_size == "Unknown"
+    assert parsed.values == []
+
+if __name__ == "__main__":
+    test_every_template_renders()
+    test_prompt_helpers_render()
+    test_guide_sections_cover_the_guide()
+    test_sample_responses_round_trip()
+    test_parse_fills_missing_and_null_fields()
+    print("✅ All prompt tests passed")
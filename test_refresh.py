@@ -0,0 +1,45 @@
+from conftest import FakeWeb, PAGE_TEXT
+from src.models import SourceRecord
+
+def test_sources_carry_validators_and_refresh_conditionally(make_workflow):
+    """Sources store their validators at fetch time, so an unchanged refresh re-scrapes nothing."""
+    web = FakeWeb()
+    web.validators = {url: (f'"{i}"', None) for i, url in enumerate(web.pages)}
+    workflow = make_workflow(web=web)
+    result = workflow.run("Acme", "Engineer")
+    assert result.sources and all(record.etag for record in result.sources)
+    assert all(record.max_chars for record in result.sources)
+    assert web.probes == 0  # Validators come with the scrape; fresh runs send no extra request
+
+    scrapes, prompts = len(web.scrapes), len(workflow.model.prompts)
+    workflow.refresh("Acme", "Engineer")
+    assert len(web.scrapes) == scrapes
+    assert len(workflow.model.prompts) == prompts
+
+def test_refresh_rescrapes_with_the_stored_limit(make_workflow):
+    """An excerpt cut short under budget pressure is re-scraped to the same length and not reported changed."""
+    web = FakeWeb({"https://acme.example/interviews": PAGE_TEXT * 10})
+    workflow = make_workflow(web=web)
+    url = "https://acme.example/interviews"
+    chunk_id, excerpt = workflow.chunks.intern(workflow._scrape(url, "research_company", 2500)["markdown"])
+    record = SourceRecord(url=url, node="research_company", content_hash=chunk_id, max_chars=2500)
+
+    refreshed, changed = workflow._refresh_documents("research_company", [(record, excerpt)], {})
+    assert not changed
+    assert web.scrapes[-1][1] == 2500
+    assert refreshed[0][0].content_hash == chunk_id
+
+def test_unchanged_refresh_reinterns_evicted_chunks_and_resets_usage(make_workflow, tmp_path):
+    from src.chunks import ChunkStore
+
+    web = FakeWeb()
+    web.validators = {url: (f'"{i}"', None) for i, url in enumerate(web.pages)}
+    workflow = make_workflow(web=web, chunks=ChunkStore(directory=str(tmp_path / "chunks")))
+    workflow.run("Acme", "Engineer")
+    workflow.chunks = ChunkStore(directory=str(tmp_path / "evicted"))  # Every chunk of the run is gone
+
+    for _ in range(2):
+        refreshed = workflow.refresh("Acme", "Engineer")
+        assert refreshed.usage == []  # Nothing re-ran, and earlier usage is not carried over
+    refs = refreshed.research_content + refreshed.interview_research_content
+    assert refs and all(workflow.chunks.get(ref.chunk_id) for ref in refs)
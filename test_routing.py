@@ -0,0 +1,47 @@
+import json
+from types import SimpleNamespace
+import pytest
+from src.routing import ModelRouter
+
+class ScriptedModel:
+    """Replies with fixed text and counts its calls."""
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def invoke(self, messages, config=None):
+        self.calls += 1
+        return SimpleNamespace(content=self.content, usage_metadata={"input_tokens": 10, "output_tokens": 5})
+
+    def bind(self, **kwargs):
+        return self
+
+def make_router(models):
+    return ModelRouter(routes={"research_company": "small"}, strong_model="strong",
+                       model_factory=lambda name: models[name])
+
+def test_invalid_small_model_output_escalates_to_the_strong_model():
+    models = {"small": ScriptedModel("not json"), "strong": ScriptedModel('{"industry": "Fintech"}')}
+    result, usage = make_router(models).invoke("research_company", [], json.loads)
+    assert result == {"industry": "Fintech"}
+    assert [(u.model, u.escalated) for u in usage] == [("small", False), ("strong", True)]
+
+def test_valid_small_model_output_is_not_escalated():
+    models = {"small": ScriptedModel('{"industry": "Fintech"}'), "strong": ScriptedModel("{}")}
+    _, usage = make_router(models).invoke("research_company", [], json.loads)
+    assert [u.model for u in usage] == ["small"]
+    assert models["strong"].calls == 0
+
+def test_failure_after_escalation_raises_with_usage():
+    models = {"small": ScriptedModel("nope"), "strong": ScriptedModel("still nope")}
+    with pytest.raises(json.JSONDecodeError) as error:
+        make_router(models).invoke("research_company", [], json.loads)
+    assert len(error.value.usage) == 2
+
+def test_economy_mode_uses_only_the_economy_model(monkeypatch):
+    monkeypatch.setenv("RESEARCH_ECONOMY_MODEL", "small")
+    models = {"small": ScriptedModel("nope"), "strong": ScriptedModel("{}")}
+    with pytest.raises(json.JSONDecodeError):
+        make_router(models).invoke("generate_guide", [], json.loads, economy=True)
+    assert models["strong"].calls == 0
@@ -0,0 +1,73 @@
+import threading
+import time
+import pytest
+from src.scheduler import ScrapeScheduler
+
+def test_jobs_are_served_round_robin():
+    scheduler = ScrapeScheduler(max_workers=1, spacing=0, limits={})
+    gate = threading.Event()
+    order = []
+    blocker = scheduler.submit("gate", "https://gate.example", gate.wait)
+    futures = [scheduler.submit("batch", f"https://site{i}.example", lambda i=i: order.append(f"batch{i}")) for i in range(3)]
+    futures.append(scheduler.submit("interactive", "https://other.example", lambda: order.append("interactive")))
+    gate.set()
+    for future in [blocker, *futures]:
+        future.result(timeout=5)
+    # The interactive job is not stuck behind the whole batch
+    assert order == ["batch0", "interactive", "batch1", "batch2"]
+
+def test_requests_to_a_domain_are_spaced():
+    scheduler = ScrapeScheduler(max_workers=2, spacing=0.2, limits={})
+    starts = {}
+    futures = [
+        scheduler.submit("job", url, lambda url=url: starts.setdefault(url, time.monotonic()))
+        for url in ("https://a.example/1", "https://a.example/2", "https://b.example/1")
+    ]
+    for future in futures:
+        future.result(timeout=5)
+    assert starts["https://a.example/2"] - starts["https://a.example/1"] >= 0.19
+    assert starts["https://b.example/1"] - starts["https://a.example/1"] < 0.15
+
+def test_domain_concurrency_is_capped():
+    scheduler = ScrapeScheduler(max_workers=3, spacing=0, limits={"slow.example": (1, 0.0)})
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def fetch():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+
+    futures = [scheduler.submit("job", f"https://www.slow.example/{i}", fetch) for i in range(3)]
+    for future in futures:
+        future.result(timeout=5)
+    assert max(peak) == 1
+
+def test_errors_reach_the_caller():
+    scheduler = ScrapeScheduler(max_workers=1, spacing=0, limits={})
+
+    def fail():
+        raise RuntimeError("blocked")
+
+    with pytest.raises(RuntimeError, match="blocked"):
+        scheduler.submit("job", "https://a.example", fail).result(timeout=5)
+    assert scheduler.pending() == 0
+
+def test_idle_domains_are_forgotten():
+    scheduler = ScrapeScheduler(max_workers=2, spacing=0, limits={})
+    futures = [scheduler.submit("job", f"https://site{i}.example/", lambda: None) for i in range(20)]
+    for future in futures:
+        future.result(timeout=5)
+    with scheduler._condition:
+        assert len(scheduler._last_start) == 20
+        scheduler._evict_idle(time.monotonic())
+        assert scheduler._last_start == {} and scheduler._in_flight == {}
+
+def test_limits_are_shared_between_processes():
+    scheduler = ScrapeScheduler(concurrency=2, spacing=1.0, limits={"slow.example": (1, 5.0)}, processes=4)
+    assert scheduler._limits("a.example") == (1, 4.0)
+    assert scheduler._limits("www.slow.example") == (1, 20.0)
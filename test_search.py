@@ -0,0 +1,14 @@
+from types import SimpleNamespace
+from src.firecrawl import SearchResult
+
+def test_search_results_keep_only_the_fields_used():
+    item = SimpleNamespace(url="https://acme.example/jobs", title="Jobs", description="Open roles",
+                           markdown="# Jobs\n\n" + "x" * 10000, score=3)
+    result = SearchResult.from_firecrawl(item, position=2)
+    assert result == SearchResult(url="https://acme.example/jobs", title="Jobs", snippet="Open roles", position=2, score=3.0)
+    assert not hasattr(result, "__dict__")  # Slotted: no per-instance dict, no page content
+
+def test_search_results_read_dict_items_and_skip_items_without_url():
+    item = {"metadata": {"sourceURL": "https://acme.example", "title": "Acme"}}
+    assert SearchResult.from_firecrawl(item) == SearchResult(url="https://acme.example", title="Acme")
+    assert SearchResult.from_firecrawl({"title": "No URL"}) is None
@@ -0,0 +1,32 @@
+import pytest
+from src import similarity
+from src.similarity import most_similar, normalize_role, similarities
+
+def test_normalize_role_folds_abbreviations_and_levels():
+    assert normalize_role("Sr. SWE II") == "senior software engineer"
+    assert normalize_role("Backend Software Engineer") == "software engineer"
+    assert normalize_role("Software Developer L4") == "software engineer"
+
+def test_most_similar_picks_the_role_variant():
+    roles = ["Product Manager", "Software Developer", "Data Scientist"]
+    index, score = most_similar("SWE II", roles)
+    assert roles[index] == "Software Developer"
+    assert score > 0.99
+    assert max(similarities("Recruiter", roles)) < 0.5
+    assert most_similar("SWE", []) is None
+
+def test_numpy_and_pure_python_scores_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    roles = ["Senior Software Engineer", "Machine Learning Engineer", "Product Manager"]
+    vectorized = similarities("Sr. Backend Engineer", roles)
+    monkeypatch.setattr(similarity, "np", None)
+    assert similarities("Sr. Backend Engineer", roles) == pytest.approx(vectorized)
+
+def test_similar_role_reuses_the_stored_process(make_workflow):
+    workflow = make_workflow()
+    first = workflow.run("Acme", "Software Engineer")
+    searches = workflow.firecrawl.searches
+    result = workflow.run("Acme", "SWE II")
+    assert result.process_reused_from == "Software Engineer"
+    assert result.interview_process == first.interview_process
+    assert workflow.firecrawl.searches == searches  # Company research is reused too
@@ -0,0 +1,34 @@
+from src.firecrawl import STREAM_READ_BYTES, WebResearchService, clean_markdown
+
+RELEVANT = "The interview process has a recruiter screen and an onsite with coding rounds."
+FILLER = "Our offices have plants, a coffee machine and a view over the harbour downtown."
+
+def test_clean_markdown_stops_at_the_budget():
+    markdown = "\n\n".join([RELEVANT] * 200)
+    cleaned = clean_markdown(markdown, 500)
+    assert len(cleaned) <= 500
+    assert cleaned.startswith(RELEVANT)
+
+def test_clean_markdown_keeps_relevant_blocks_and_headings():
+    markdown = "\n\n".join(["# Careers", "Home", FILLER, *[RELEVANT] * 4])
+    cleaned = clean_markdown(markdown, 5000, keywords=["interview"])
+    assert cleaned.split("\n\n") == ["# Careers", *[RELEVANT] * 4]
+
+def test_clean_markdown_falls_back_to_the_lead_when_little_matches():
+    markdown = "\n\n".join([FILLER] * 5 + [RELEVANT])
+    cleaned = clean_markdown(markdown, 5000, keywords=["interview"])
+    assert cleaned.split("\n\n") == [FILLER] * 5 + [RELEVANT]
+
+def test_stream_page_drops_chrome_and_stops_at_the_budget(tmp_path):
+    body = "".join(f"<p>{RELEVANT} ({i})</p>" for i in range(2000))
+    page = tmp_path / "page.html"
+    page.write_text(f"<html><head><script>var x = 1;</script></head><body><nav>{RELEVANT}</nav>"
+                    f"<h2>Hiring</h2>{body}</body></html>")
+    assert page.stat().st_size > 10 * STREAM_READ_BYTES
+
+    service = WebResearchService.__new__(WebResearchService)  # Streaming needs no Firecrawl client
+    text, validators = service._stream_page(page.as_uri(), 1000, ["interview"])
+    assert text.startswith(f"## Hiring\n\n{RELEVANT} (0)")
+    assert "var x" not in text
+    assert len(text) <= 1000
+    assert validators["last_modified"]  # Taken from the response itself, no separate probe
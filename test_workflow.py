@@ -6,14 +6,14 @@ from src.workflow import Workflow
 # Load environment variables
 load_dotenv()
 
-def test_workflow(company: str, role: str):
+def test_workflow(company: str, role: str, profile: bool = False):
     """Test the workflow with the given company and role."""
     print(f"🚀 Starting test workflow for {role} at {company}")
     print("-" * 50)
     
     # Initialize and run the workflow
     workflow = Workflow()
-    result = workflow.run(company=company, role=role)
+    result = workflow.run(company=company, role=role, profile=profile)
     
     # Print the results
     print("\n" + "="*50)
@@ -38,17 +38,18 @@ def test_workflow(company: str, role: str):
         print(f"Technical Assessment: {'Yes' if result.interview_process.technical_assessment else 'No'}")
         print(f"System Design: {'Yes' if result.interview_process.system_design else 'No'}")
     
-    # Print preparation guide overview
+    # Print preparation guide summary
     if hasattr(result, 'preparation_guide') and result.preparation_guide:
         print("\n📚 Preparation Guide:")
         print("-" * 30)
-        print(result.preparation_guide.overview[:500] + "..." if len(result.preparation_guide.overview) > 500 else result.preparation_guide.overview)
+        strategy = result.preparation_guide.strategy
+        print(strategy[:500] + "..." if len(strategy) > 500 else strategy)
         
-        # Print timeline if available
-        if hasattr(result.preparation_guide, 'preparation_timeline') and result.preparation_guide.preparation_timeline:
-            print("\n⏰ Preparation Timeline:")
-            for i, step in enumerate(result.preparation_guide.preparation_timeline[:3], 1):
-                print(f"{i}. {step[:100]}..." if len(step) > 100 else f"{i}. {step}")
+        # Print technical topics if available
+        if result.preparation_guide.technical_topics:
+            print("\n🧠 Technical Topics:")
+            for i, topic in enumerate(result.preparation_guide.technical_topics[:3], 1):
+                print(f"{i}. {topic[:100]}..." if len(topic) > 100 else f"{i}. {topic}")
     
     print("\n" + "="*50)
     print(f"🎉 Test completed for {role} at {company}")
@@ -60,9 +61,11 @@ if __name__ == "__main__":
     test_role = "Software Engineer"
     
     # Use command line arguments if provided
-    if len(sys.argv) > 1:
-        test_company = sys.argv[1]
-    if len(sys.argv) > 2:
-        test_role = " ".join(sys.argv[2:])
+    profile = "--profile" in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != "--profile"]
+    if len(args) > 0:
+        test_company = args[0]
+    if len(args) > 1:
+        test_role = " ".join(args[1:])
     
-    test_workflow(test_company, test_role)
+    test_workflow(test_company, test_role, profile=profile)
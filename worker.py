@@ -0,0 +1,84 @@
+import argparse
+import multiprocessing
+import os
+import signal
+from typing import Optional
+from dotenv import load_dotenv
+from src.jobs import ResearchWorker, VISIBILITY_TIMEOUT, open_queue
+from src.langsmith_config import langsmith_config
+
+load_dotenv()
+
+def run_worker(queue_url: str, max_jobs: Optional[int] = None):
+    """Run one worker process until interrupted."""
+    from src.workflow import Workflow
+    langsmith_config.setup()
+    worker = ResearchWorker(open_queue(queue_url), Workflow(), visibility_timeout=VISIBILITY_TIMEOUT)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    print(f"👷 Worker {worker.worker_id} waiting for research jobs")
+    try:
+        worker.run_forever(max_jobs=max_jobs)
+    except KeyboardInterrupt:
+        pass
+
+def run_warmer(ranked_list: Optional[str], max_requests: Optional[int], once: bool):
+    """Keep stored research for popular companies and roles fresh."""
+    from src.warmer import CacheWarmer
+    from src.workflow import Workflow
+    langsmith_config.setup()
+    warmer = CacheWarmer(Workflow(), ranked_list=ranked_list, max_requests=max_requests)
+    if once:
+        warmer.run_once()
+        return
+    print(f"🔥 Cache warmer running during off-peak hours {warmer.window[0]:02d}:00-{warmer.window[1]:02d}:00")
+    try:
+        warmer.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Research job queue worker")
+    parser.add_argument("--queue", default="", help="Queue URL: redis://host:6379/0 or a SQLite path (default: RESEARCH_QUEUE_URL or .research_data/jobs.db)")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start on this machine")
+    parser.add_argument("--max-jobs", type=int, default=None, help="Exit after processing this many jobs (per process)")
+    parser.add_argument("--enqueue", nargs=2, metavar=("COMPANY", "ROLE"), help="Add a job instead of working")
+    parser.add_argument("--stats", action="store_true", help="Print job counts by status and exit")
+    parser.add_argument("--warm", action="store_true", help="Run the cache warmer instead of working on jobs")
+    parser.add_argument("--warm-once", action="store_true", help="Run one cache warming cycle now and exit")
+    parser.add_argument("--warm-list", default=None, help="Ranked 'Company[, Role]' list (default: RESEARCH_WARM_LIST or learned from queries)")
+    parser.add_argument("--warm-budget", type=int, default=None, help="Firecrawl requests per warming cycle (default: RESEARCH_WARM_MAX_REQUESTS)")
+    args = parser.parse_args()
+
+    if args.warm or args.warm_once:
+        run_warmer(args.warm_list, args.warm_budget, args.warm_once)
+        return
+
+    queue = open_queue(args.queue)
+    if args.enqueue:
+        print(f"📥 Queued job {queue.enqueue(*args.enqueue)}")
+        return
+    if args.stats:
+        print(queue.stats())
+        return
+
+    # Per-process limits (domain politeness, admission) split their budget across the processes;
+    # with workers on several hosts, set RESEARCH_PROCESSES to the total instead
+    os.environ.setdefault("RESEARCH_PROCESSES", str(max(1, args.processes)))
+    if args.processes <= 1:
+        run_worker(args.queue, args.max_jobs)
+        return
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(args.queue, args.max_jobs), name=f"research-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+if __name__ == "__main__":
+    main()